@@ -1,14 +1,23 @@
 """
 Converts between a GoPro's USB (RNDIS) IP address and the 3-digit serial
-suffix used in src/gopro_lsl/config.py, and discovers candidate IPs from the
-machine's own network adapters.
+suffix used in src/gopro_lsl/config.py, discovers candidate IPs from the
+machine's own network adapters, and probes them concurrently for live cameras.
 
 Mirrors the formula in src/gopro_lsl/gopro_control.py:
     x = serial_last3[0]; yz = serial_last3[1:]
     camera_ip = f"172.2{x}.1{yz}.51"
 """
+import json
 import re
+import socket
+import struct
 import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
 
 IP_PATTERN = re.compile(r"^172\.2(\d)\.1(\d{2})\.\d{1,3}$")
@@ -17,6 +26,14 @@ SERIAL_LINE_PATTERN = re.compile(r'^(GOPRO_SERIAL\s*=\s*)"(\d{3})"(.*)$', re.MUL
 
 CONFIG_PATH_PARTS = ("src", "gopro_lsl", "config.py")
 
+CAMERA_PORT = 8080
+PROBE_TIMEOUT = 0.3          # seconds per camera probe (all probes run concurrently)
+DISCOVERY_CACHE_TTL = 5.0    # seconds a discovery result is reused
+SIOCGIFADDR = 0x8915         # Linux ioctl: get interface IPv4 address
+
+# Camera probes go straight to the USB link, never through HTTP(S)_PROXY
+_probe_opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+
 
 def serial_from_ip(ip: str) -> str | None:
     """Returns the 3-digit serial suffix if `ip` matches GoPro's USB scheme, else None."""
@@ -33,23 +50,122 @@ def ip_from_serial(serial_last3: str) -> str:
     return f"172.2{x}.1{yz}.51"
 
 
-def discover_candidate_ips() -> list[str]:
-    """Runs `ipconfig` (no shell) and returns IPv4 addresses matching GoPro's USB subnet."""
+def _linux_ipv4_addresses() -> list[str]:
+    """Reads each interface's IPv4 address via SIOCGIFADDR (no subprocess)."""
+    import fcntl
+
+    addresses = []
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        for _, name in socket.if_nameindex():
+            request = struct.pack("256s", name.encode()[:15])
+            try:
+                reply = fcntl.ioctl(sock.fileno(), SIOCGIFADDR, request)
+            except OSError:
+                continue  # interface is down or has no IPv4 address
+            addresses.append(socket.inet_ntoa(reply[20:24]))
+    return addresses
+
+
+def _ipconfig_ipv4_addresses() -> list[str]:
+    """Runs `ipconfig` (no shell) and returns every IPv4-looking address in its output."""
     try:
         result = subprocess.run(
             ["ipconfig"], capture_output=True, text=True, timeout=5
         )
     except (OSError, subprocess.TimeoutExpired):
         return []
+    return [match.group(1) for match in IPV4_LINE_PATTERN.finditer(result.stdout)]
+
+
+def local_ipv4_addresses() -> list[str]:
+    """IPv4 addresses of this machine's adapters (native ioctl on Linux, `ipconfig` elsewhere)."""
+    if sys.platform.startswith("linux"):
+        return _linux_ipv4_addresses()
+    return _ipconfig_ipv4_addresses()
+
 
+def discover_candidate_ips() -> list[str]:
+    """Returns local IPv4 addresses matching GoPro's USB subnet (172.2X.1YZ.*)."""
     candidates = []
-    for match in IPV4_LINE_PATTERN.finditer(result.stdout):
-        ip = match.group(1)
+    for ip in local_ipv4_addresses():
         if serial_from_ip(ip) is not None and ip not in candidates:
             candidates.append(ip)
     return candidates
 
 
+@dataclass
+class DiscoveredCamera:
+    ip: str
+    serial: str
+    firmware: str | None
+    model: str | None
+    latency_ms: float
+
+
+def probe_camera(serial_last3: str, timeout: float = PROBE_TIMEOUT) -> DiscoveredCamera | None:
+    """GETs /gp/gpControl/info on the camera for `serial_last3`; None if it doesn't answer."""
+    ip = ip_from_serial(serial_last3)
+    url = f"http://{ip}:{CAMERA_PORT}/gp/gpControl/info"
+    started = time.perf_counter()
+    try:
+        with _probe_opener.open(url, timeout=timeout) as response:
+            body = response.read()
+    except (OSError, ValueError):
+        return None
+    latency_ms = (time.perf_counter() - started) * 1000
+
+    try:
+        info = json.loads(body).get("info", {})
+    except (ValueError, AttributeError):
+        info = {}
+    return DiscoveredCamera(
+        ip=ip,
+        serial=serial_last3,
+        firmware=info.get("firmware_version"),
+        model=info.get("model_name"),
+        latency_ms=latency_ms,
+    )
+
+
+_discovery_cache: tuple[float, list[DiscoveredCamera], list[str]] | None = None
+_discovery_lock = threading.Lock()
+
+
+def discover(extra_serials: list[str] = (), timeout: float = PROBE_TIMEOUT,
+             max_age: float = DISCOVERY_CACHE_TTL) -> tuple[list[DiscoveredCamera], list[str]]:
+    """
+    Probes every camera implied by the local GoPro USB adapters (plus `extra_serials`)
+    concurrently. Returns (cameras that answered, fastest first; local adapter IPs).
+    Results younger than `max_age` seconds are returned from cache; pass 0 to force a scan.
+    Blocks for up to `timeout`: call it off the GUI thread.
+    """
+    global _discovery_cache
+    with _discovery_lock:
+        if _discovery_cache is not None and time.monotonic() - _discovery_cache[0] <= max_age:
+            return list(_discovery_cache[1]), list(_discovery_cache[2])
+
+        candidates = discover_candidate_ips()
+        serials = []
+        for serial in [serial_from_ip(ip) for ip in candidates] + list(extra_serials):
+            if serial and serial not in serials:
+                serials.append(serial)
+
+        cameras = []
+        if serials:
+            with ThreadPoolExecutor(max_workers=min(len(serials), 16)) as pool:
+                cameras = [c for c in pool.map(lambda s: probe_camera(s, timeout), serials) if c]
+        cameras.sort(key=lambda c: c.latency_ms)
+
+        _discovery_cache = (time.monotonic(), cameras, candidates)
+        return list(cameras), list(candidates)
+
+
+def discover_cameras(extra_serials: list[str] = (), timeout: float = PROBE_TIMEOUT,
+                     max_age: float = DISCOVERY_CACHE_TTL) -> list[DiscoveredCamera]:
+    """Cameras that answered (see discover()), fastest first."""
+    return discover(extra_serials, timeout, max_age)[0]
+
+
 def _config_path(project_root: Path) -> Path:
     return project_root.joinpath(*CONFIG_PATH_PARTS)
 
@@ -1,3 +1,5 @@
+import queue
+import threading
 import tkinter as tk
 from pathlib import Path
 from tkinter import ttk
@@ -21,6 +23,8 @@ class GoproRpiTab(BaseProcessTab):
             note="Runs on the RPi-connected machine — start_rpi_agent_with_heartbeat.py",
         )
         self._project_root = project_root
+        self._scan_results = queue.Queue()
+        self._scanning = False
         self._build_ip_panel()
 
     def _build_ip_panel(self):
@@ -35,18 +39,59 @@ class GoproRpiTab(BaseProcessTab):
         self._ip_combo = ttk.Combobox(row, textvariable=self._ip_var, width=22)
         self._ip_combo.pack(side="left", padx=6)
 
-        ttk.Button(row, text="Rescan", command=self._rescan).pack(side="left", padx=(0, 6))
+        ttk.Button(row, text="Rescan", command=lambda: self._rescan(max_age=0)).pack(side="left", padx=(0, 6))
         ttk.Button(row, text="Apply", style="Accent.TButton", command=self._apply).pack(side="left")
 
         self._serial_var = tk.StringVar()
         self._serial_label = ttk.Label(panel, textvariable=self._serial_var, style="Stopped.Status.TLabel")
         self._serial_label.pack(anchor="w", pady=(6, 0))
 
+        self._found_var = tk.StringVar()
+        ttk.Label(panel, textvariable=self._found_var).pack(anchor="w", pady=(2, 0))
+
         self._rescan()
         self._refresh_current_serial()
 
-    def _rescan(self):
-        self._ip_combo.configure(values=gopro_ip_tools.discover_candidate_ips())
+    def _rescan(self, max_age: float = gopro_ip_tools.DISCOVERY_CACHE_TTL):
+        # Probing takes up to the probe timeout: run it in a worker and poll for the result
+        if self._scanning:
+            return
+        self._scanning = True
+        self._found_var.set("Scanning...")
+        current = gopro_ip_tools.read_current_serial(self._project_root)
+        extra = [current] if current else []
+        threading.Thread(target=self._scan, args=(extra, max_age), daemon=True).start()
+        self.after(100, self._poll_scan)
+
+    def _scan(self, extra_serials: list[str], max_age: float):
+        try:
+            self._scan_results.put(gopro_ip_tools.discover(extra_serials=extra_serials, max_age=max_age))
+        except Exception as exc:
+            self._scan_results.put(exc)
+
+    def _poll_scan(self):
+        try:
+            result = self._scan_results.get_nowait()
+        except queue.Empty:
+            self.after(100, self._poll_scan)
+            return
+        self._scanning = False
+        if isinstance(result, Exception):
+            self._found_var.set(f"Scan failed: {result}")
+            return
+        self._show_scan(*result)
+
+    def _show_scan(self, cameras: list, candidate_ips: list[str]):
+        # Live cameras first, then any adapter IPs whose camera didn't answer
+        values = list(dict.fromkeys([c.ip for c in cameras] + candidate_ips))
+        self._ip_combo.configure(values=values)
+
+        if cameras:
+            self._found_var.set("Live: " + ", ".join(
+                f"{c.serial} ({c.firmware or 'fw ?'}, {c.latency_ms:.0f} ms)" for c in cameras
+            ))
+        else:
+            self._found_var.set("No camera answered")
 
     def _refresh_current_serial(self):
         serial = gopro_ip_tools.read_current_serial(self._project_root)
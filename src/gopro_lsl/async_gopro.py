@@ -0,0 +1,185 @@
+"""
+asyncio front end for GoPro control.
+
+AsyncGoProCamera wraps a GoProCamera and offers the same operations
+(wired-USB enable, keep-alive, status, shutter with confirmation) as
+coroutines. It is not a second client: every request goes through the
+camera's GoProTransport and CameraCommandQueue (so it is serialized with, and
+prioritized against, the blocking callers, and fails over between links the
+same way), status reads share the camera's StatusCache, and confirmations
+learn in the same AdaptivePoller.
+
+Requests are queued with GoProHttpClient.submit() and awaited through
+asyncio.wrap_future, so waiting costs no thread: one event loop can drive
+many cameras, keep-alive timers and status polls, while the HTTP calls
+themselves run on each camera's single queue worker.
+"""
+
+import asyncio
+
+import requests
+from pylsl import local_clock
+
+from src.gopro_lsl.config import DEFAULT_TIMEOUT
+from src.gopro_lsl.confirmation import model_key
+from src.gopro_lsl.gopro_control import GoProCamera
+from src.gopro_lsl.shutter_timing import ShutterTiming
+from src.log.logger import logger
+
+
+class AsyncGoProCamera:
+    def __init__(self, camera: GoProCamera):
+        """
+        camera: the GoProCamera whose transport, command queue, status cache and poller are used
+        """
+        self.camera = camera
+
+    def __repr__(self):
+        return f"<AsyncGoProCamera name={self.name}, base_url={self.camera.base_url}>"
+
+    @property
+    def name(self) -> str:
+        return self.camera.name
+
+    async def _get(self, endpoint: str, path: str, **kwargs) -> requests.Response:
+        """Queue a request on the camera's transport and await the response without blocking the loop."""
+        return await asyncio.wrap_future(self.camera.http.submit(endpoint, path, **kwargs))
+
+    async def enable_wired_usb_control(self) -> bool:
+        """GET /gopro/camera/control/wired_usb?p=1 (404 on firmware that does not need it counts as success)."""
+        try:
+            r = await self._get("wired_usb", "/gopro/camera/control/wired_usb", params={"p": 1})
+            if r.status_code == 404:
+                print(f"[{self.name}] ⚠ wired_usb endpoint 404: not required/unsupported on this firmware, skipping")
+                return True
+            r.raise_for_status()
+            print(f"[{self.name}] ✔ wired USB control enabled")
+            return True
+        except requests.exceptions.RequestException as e:
+            print(f"[{self.name}] ✖ Request error in enable_wired_usb_control: {e}")
+            return False
+
+    async def keep_alive(self) -> bool:
+        """GET /gopro/camera/keep_alive. Returns True on success."""
+        try:
+            r = await self._get("keep_alive", "/gopro/camera/keep_alive")
+            r.raise_for_status()
+            return True
+        except requests.exceptions.RequestException as e:
+            print(f"[{self.name}] ⚠ keep_alive failed: {e}")
+            return False
+
+    async def get_status(self) -> dict | None:
+        """
+        Full status JSON. Coalesces with identical status requests still waiting
+        in the camera's queue, from coroutines and threads alike.
+        """
+        try:
+            r = await self._get("status", "/gp/gpControl/status")
+            if r.status_code == 200:
+                return r.json()
+            print(f"[{self.name}] Failed to get GoPro status (HTTP {r.status_code})")
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"[{self.name}] Error getting GoPro status: {e}")
+        return None
+
+    async def status_snapshot(self, max_age=None):
+        """
+        Cached, decoded status from the camera's StatusCache; fetched (and stored
+        there for every other caller) only if the cached one is older than `max_age`.
+        """
+        cache = self.camera.status
+        max_age = cache.ttl if max_age is None else max_age
+        snapshot = cache.latest
+        if snapshot is not None and snapshot.age <= max_age:
+            return snapshot
+        requested_at = local_clock()
+        return cache.store(await self.get_status(), requested_at=requested_at)
+
+    async def is_recording(self, max_age=None) -> bool:
+        snapshot = await self.status_snapshot(max_age)
+        return snapshot is not None and snapshot.encoding
+
+    async def send_shutter(self, mode: str, timing: ShutterTiming | None = None):
+        """
+        Send the shutter command only (see GoProCamera.send_shutter).
+        Raises requests.exceptions.RequestException on failure.
+        """
+        assert mode in ("start", "stop")
+        camera = self.camera
+        if timing is not None and mode == "start":
+            timing.armed = camera.armed
+
+        def stamp_send():
+            if timing is not None:
+                timing.sent_at = local_clock()
+
+        r = await self._get("shutter", f"/gopro/camera/shutter/{mode}", on_send=stamp_send)
+        if timing is not None:
+            timing.acked_at = local_clock()
+        camera.status.invalidate()
+        r.raise_for_status()
+        if mode == "start":
+            camera.armed = False
+        print(f"[{self.name}] ✔ shutter {mode}")
+
+    async def wait_for_recording(self, recording: bool, timeout=DEFAULT_TIMEOUT, poll_interval=None,
+                                 timing: ShutterTiming | None = None) -> bool:
+        """
+        Poll the encoding state until it equals `recording` or `timeout` expires
+        (see GoProCamera.wait_for_recording). Returns True if it was observed.
+        """
+        camera = self.camera
+        mode = "start" if recording else "stop"
+        key = model_key(camera.serial_last3, camera.firmware, mode)
+        schedule = camera.poller.schedule(key) if poll_interval is None else None
+        origin = timing.sent_at if timing is not None and timing.sent_at is not None else local_clock()
+        deadline = origin + timeout
+        delay = poll_interval or 0.0
+
+        while local_clock() < deadline:
+            snapshot = await self.status_snapshot(max_age=delay / 2)
+            if timing is not None:
+                timing.observe(snapshot, recording)
+            if snapshot is not None and snapshot.encoding is recording:
+                if timing is not None:
+                    timing.confirmed = True
+                    camera.poller.learn(key, timing)
+                logger.log(f"[{self.name}] GoPro recording {mode} confirmed.")
+                return True
+            if schedule is not None:
+                delay = schedule.next_delay(local_clock() - origin)
+            await asyncio.sleep(delay)
+
+        print(f"[{self.name}] Timeout: GoPro did not {mode} recording.")
+        return False
+
+    async def shutter(self, mode: str, timeout=DEFAULT_TIMEOUT, poll_interval=None,
+                      timing: ShutterTiming | None = None) -> bool:
+        """Start/stop recording and wait for the encoder state to follow. Returns True if confirmed."""
+        assert mode in ("start", "stop")
+        if timing is None:
+            timing = ShutterTiming(name=self.name, mode=mode)
+        try:
+            with self.camera.shutter_in_progress():
+                await self.send_shutter(mode, timing=timing)
+                return await self.wait_for_recording(mode == "start", timeout=timeout,
+                                                     poll_interval=poll_interval, timing=timing)
+        except requests.exceptions.RequestException as e:
+            timing.error = str(e)
+            print(f"[{self.name}] ✖ shutter {mode} failed: {e}")
+            return False
+
+    async def start_recording(self, **kwargs) -> bool:
+        return await self.shutter("start", **kwargs)
+
+    async def stop_recording(self, **kwargs) -> bool:
+        return await self.shutter("stop", **kwargs)
+
+
+async def shutter_all(cameras: list[AsyncGoProCamera], mode: str, **kwargs) -> list[ShutterTiming]:
+    """Shutter every camera concurrently on the running loop. Returns one ShutterTiming per camera."""
+    timings = [ShutterTiming(name=camera.name, mode=mode) for camera in cameras]
+    await asyncio.gather(*(camera.shutter(mode, timing=timing, **kwargs)
+                           for camera, timing in zip(cameras, timings)))
+    return timings
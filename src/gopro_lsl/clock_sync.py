@@ -0,0 +1,287 @@
+"""
+Camera clock offset/drift estimation against LSL local_clock().
+
+GoPro media carries camera-clock times, while markers use pylsl local_clock().
+The camera only reports its clock to the second, so instead of reading the
+value we locate the moments it ticks over: each request is bracketed by
+local_clock() stamps, and when two consecutive reads differ by one second the
+tick happened between the first request's send and the second one's reply.
+After the first tick, reads are concentrated around the next expected tick
+to keep those windows narrow.
+
+Tick estimates are then fitted (NTP-style) as
+    local_clock = offset + (1 + drift) * camera_seconds
+with iterative MAD outlier rejection. One sync samples for a few seconds,
+far too short to see drift, so each camera keeps the ticks of its earlier
+syncs (CLOCK_SYNC_HISTORY_SPAN) and every fit uses them too. Drift is only
+fitted once the ticks span CLOCK_SYNC_MIN_DRIFT_SPAN seconds (typically from
+the second sync of a run on); until then the result carries drift=None and
+drift_fitted=False. History that no longer agrees with the camera clock (it
+was set or reset) is dropped. Results are stored per session as JSON.
+"""
+
+import calendar
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, asdict, field
+from urllib.parse import unquote
+
+import requests
+from pylsl import local_clock
+
+from src.gopro_lsl.config import (
+    CLOCK_SYNC_DURATION,
+    CLOCK_SYNC_POLL_INTERVAL,
+    CLOCK_SYNC_GUARD,
+    CLOCK_SYNC_MIN_DRIFT_SPAN,
+    CLOCK_SYNC_HISTORY_SPAN,
+    CLOCK_SYNC_MAX_JUMP,
+    LATENCY_EXPORT_DIR,
+)
+
+STATUS_DATE_TIME = "40"  # gpControl status: "%YY%MM%DD%hh%mm%ss" as URL-encoded hex bytes
+
+
+def parse_status_date_time(value: str) -> int | None:
+    """Decodes gpControl status 40 into camera-clock seconds (camera local time read as UTC)."""
+    try:
+        raw = unquote(value, encoding="latin-1").encode("latin-1")
+        year, month, day, hour, minute, second = raw[:6]
+        return calendar.timegm((2000 + year, month, day, hour, minute, second))
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
+def parse_ogp_date_time(data: dict) -> int | None:
+    """Decodes GET /gopro/camera/get_date_time ({"date": "2023_1_31", "time": "3_4_5"})."""
+    try:
+        year, month, day = (int(v) for v in data["date"].split("_"))
+        hour, minute, second = (int(v) for v in data["time"].split("_"))
+        return calendar.timegm((year, month, day, hour, minute, second))
+    except (KeyError, ValueError, AttributeError):
+        return None
+
+
+@dataclass
+class ClockSample:
+    sent: float        # local_clock() before the request
+    received: float    # local_clock() after the reply
+    camera: int        # camera clock, whole seconds
+
+
+@dataclass
+class ClockSyncResult:
+    camera: str
+    offset: float | None = None      # local_clock() at camera time 0
+    drift: float | None = None       # fractional rate error (1e-6 = 1 ppm); None unless drift_fitted
+    drift_fitted: bool = False       # ticks spanned CLOCK_SYNC_MIN_DRIFT_SPAN, so drift was measured
+    residual: float | None = None    # RMS residual of accepted ticks (seconds)
+    uncertainty: float | None = None # median half-width of accepted tick windows (seconds)
+    ticks: int = 0
+    rejected: int = 0
+    history_ticks: int = 0           # ticks from earlier syncs included in the fit
+    span: float = 0.0                # camera seconds between the first and last fitted tick
+    samples: int = 0
+    source: str | None = None
+    tick_windows: list = field(default_factory=list)   # [camera_second, earliest, latest]
+
+    @property
+    def ok(self) -> bool:
+        return self.offset is not None
+
+    def to_lsl(self, camera_seconds: float) -> float:
+        """Map a camera-clock time (seconds, as decoded here) to local_clock() time."""
+        return self.offset + (1.0 + (self.drift or 0.0)) * camera_seconds
+
+    def to_camera(self, lsl_time: float) -> float:
+        return (lsl_time - self.offset) / (1.0 + (self.drift or 0.0))
+
+    def export(self, session_id: str, directory: str = LATENCY_EXPORT_DIR) -> str:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{session_id}_clock_{self.camera}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(asdict(self), f, indent=2)
+        return path
+
+
+def _fit(points: list[tuple[int, float, float]], fit_drift: bool = True):
+    """
+    Weighted least squares of tick time vs camera second. Returns (offset, slope, residuals).
+    With fit_drift=False the slope is fixed at 1 and only the offset is fitted.
+    """
+    weights = [1.0 / max(w, 1e-4) ** 2 for _, _, w in points]
+    sw = sum(weights)
+    mx = sum(w * x for w, (x, _, _) in zip(weights, points)) / sw
+    my = sum(w * y for w, (_, y, _) in zip(weights, points)) / sw
+    sxx = sum(w * (x - mx) ** 2 for w, (x, _, _) in zip(weights, points))
+    if sxx == 0 or not fit_drift:
+        slope = 1.0
+    else:
+        slope = sum(w * (x - mx) * (y - my) for w, (x, y, _) in zip(weights, points)) / sxx
+    offset = my - slope * mx
+    residuals = [y - (offset + slope * x) for x, y, _ in points]
+    return offset, slope, residuals
+
+
+def fit_ticks(ticks: list[tuple[int, float, float]], max_rounds: int = 3):
+    """
+    ticks: [(camera_second, tick_estimate, half_width)]
+    Returns (offset, slope, rms_residual, accepted, rejected, drift_fitted) with MAD-based
+    outlier rejection. Drift is only fitted when the ticks span at least
+    CLOCK_SYNC_MIN_DRIFT_SPAN seconds; over shorter spans the window noise would
+    dominate the slope, which is then fixed at 1.
+    """
+    fit_drift = ticks[-1][0] - ticks[0][0] >= CLOCK_SYNC_MIN_DRIFT_SPAN
+    accepted = list(ticks)
+    for _ in range(max_rounds):
+        offset, slope, residuals = _fit(accepted, fit_drift)
+        abs_res = sorted(abs(r) for r in residuals)
+        mad = abs_res[len(abs_res) // 2]
+        limit = max(3 * 1.4826 * mad, 0.005)
+        keep = [t for t, r in zip(accepted, residuals) if abs(r) <= limit]
+        if len(keep) == len(accepted) or len(keep) < 2:
+            break
+        accepted = keep
+    offset, slope, residuals = _fit(accepted, fit_drift)
+    rms = (sum(r * r for r in residuals) / len(residuals)) ** 0.5
+    return offset, slope, rms, accepted, len(ticks) - len(accepted), fit_drift
+
+
+def merge_history(history: list, ticks: list, span: float = CLOCK_SYNC_HISTORY_SPAN,
+                  max_jump: float = CLOCK_SYNC_MAX_JUMP) -> tuple[list, bool]:
+    """
+    Ticks of earlier syncs plus the new ones, sorted and limited to the last `span`
+    camera seconds. Returns (ticks, history_kept): the history is dropped when the
+    new ticks sit more than `max_jump` seconds off the line it predicts.
+    """
+    kept = bool(history)
+    if kept:
+        offset, slope, _, _, _, _ = fit_ticks(history)
+        error = sum(y - (offset + slope * x) for x, y, _ in ticks) / len(ticks)
+        kept = abs(error) <= max_jump
+    merged = sorted((list(history) if kept else []) + list(ticks))
+    latest = merged[-1][0]
+    return [tick for tick in merged if tick[0] >= latest - span], kept
+
+
+class CameraClockSync:
+    """Samples one GoProCamera's clock and fits its offset/drift against local_clock()."""
+
+    def __init__(self, camera, duration: float = CLOCK_SYNC_DURATION,
+                 poll_interval: float = CLOCK_SYNC_POLL_INTERVAL, guard: float = CLOCK_SYNC_GUARD,
+                 cancel: threading.Event | None = None, history: list | None = None):
+        """
+        cancel: event that ends the sampling early (e.g. GoProFleet.interrupted); the ticks so far are fitted
+        history: ticks of this camera's earlier syncs (the previous run's `history`), for the drift fit
+        """
+        self.camera = camera
+        self.duration = duration
+        self.poll_interval = poll_interval
+        self.guard = guard
+        self.cancel = cancel
+        self.history = list(history or [])   # updated by run() to include its ticks
+        self.source = None
+
+    def _sleep(self, seconds: float) -> bool:
+        """Sleep; returns True if the sync was cancelled meanwhile."""
+        if self.cancel is None:
+            time.sleep(seconds)
+            return False
+        return self.cancel.wait(seconds)
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel is not None and self.cancel.is_set()
+
+    def read_clock(self) -> ClockSample | None:
+        """One bracketed read of the camera clock (OGP get_date_time, falling back to status 40)."""
+        sent = []
+
+        def stamp_send():
+            # Bracket starts when the request leaves the command queue, not when it was queued
+            sent.append(local_clock())
+
+        try:
+            if self.source in (None, "get_date_time"):
+                r = self.camera.http.get("status", "/gopro/camera/get_date_time", on_send=stamp_send)
+                received = local_clock()
+                if r.status_code == 200:
+                    value = parse_ogp_date_time(r.json())
+                    if value is not None:
+                        self.source = "get_date_time"
+                        return ClockSample(sent[-1], received, value)
+                if self.source is not None:
+                    return None
+            r = self.camera.http.get("status", "/gp/gpControl/status", on_send=stamp_send)
+            received = local_clock()
+            r.raise_for_status()
+            value = parse_status_date_time(r.json().get("status", {}).get(STATUS_DATE_TIME, ""))
+        except (requests.exceptions.RequestException, ValueError):
+            return None
+        if value is None:
+            return None
+        self.source = "status"
+        return ClockSample(sent[-1], received, value)
+
+    def run(self) -> ClockSyncResult:
+        result = ClockSyncResult(camera=self.camera.name)
+        ticks = []
+        previous = None
+        deadline = local_clock() + self.duration
+
+        while local_clock() < deadline and not self.cancelled:
+            sample = self.read_clock()
+            if sample is None:
+                self._sleep(self.poll_interval)
+                continue
+            result.samples += 1
+
+            if previous is not None and sample.camera == previous.camera + 1:
+                earliest, latest = previous.sent, sample.received
+                ticks.append((sample.camera, (earliest + latest) / 2, (latest - earliest) / 2))
+                result.tick_windows.append([sample.camera, earliest, latest])
+                previous = sample
+                # Sleep until shortly before the next expected tick
+                next_tick = (earliest + latest) / 2 + 1.0
+                wait = next_tick - self.guard - local_clock()
+                if wait > 0:
+                    self._sleep(wait)
+                continue
+
+            previous = sample
+            self._sleep(self.poll_interval)
+
+        result.source = self.source
+        if self.cancelled:
+            print(f"[ClockSync] {self.camera.name}: interrupted by a shutter after {len(ticks)} tick(s)")
+        if len(ticks) < 2:
+            print(f"[ClockSync] {self.camera.name}: only {len(ticks)} clock ticks observed, no fit")
+            return result
+
+        earlier = len(self.history)
+        self.history, kept = merge_history(self.history, ticks)
+        if earlier and not kept:
+            print(f"[ClockSync] {self.camera.name}: camera clock jumped, dropping {earlier} tick(s) of history")
+        result.history_ticks = len(self.history) - len(ticks)
+        result.span = self.history[-1][0] - self.history[0][0]
+
+        offset, slope, rms, accepted, rejected, drift_fitted = fit_ticks(self.history)
+        result.offset = offset
+        result.drift = slope - 1.0 if drift_fitted else None
+        result.drift_fitted = drift_fitted
+        result.residual = rms
+        result.uncertainty = sorted(w for _, _, w in accepted)[len(accepted) // 2]
+        result.ticks = len(accepted)
+        result.rejected = rejected
+        if drift_fitted:
+            drift = f"drift {result.drift * 1e6:+.1f} ppm over {result.span:.0f} s"
+        else:
+            drift = (f"drift skipped: ticks span {result.span:.0f} s of the {CLOCK_SYNC_MIN_DRIFT_SPAN} s needed, "
+                     f"offset only until a later sync")
+        print(f"[ClockSync] {self.camera.name}: {result.ticks} ticks ({rejected} rejected, "
+              f"{result.history_ticks} from earlier syncs), "
+              f"{drift}, residual {rms * 1000:.1f} ms, "
+              f"tick window ±{result.uncertainty * 1000:.1f} ms")
+        return result
@@ -0,0 +1,192 @@
+"""
+Per-camera command queue.
+
+GoPro cameras misbehave when several HTTP commands arrive at once, so every
+request a GoProHttpClient makes goes through one CameraCommandQueue per
+camera, and a single worker thread sends them one at a time:
+
+  - requests are ordered by endpoint priority (shutter first, keep-alive
+    last), FIFO within the same priority
+  - a status or keep-alive request identical to one that is still waiting
+    is not queued again; the caller shares the waiting request's response
+  - depth and per-endpoint wait/run times are tracked for stats()
+
+Requests made from the worker thread itself run inline, so a queued command
+can never deadlock waiting on the queue it is running on. A closed queue stays
+closed: later submissions fail right away.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+
+import requests
+
+from src.gopro_lsl.config import COMMAND_PRIORITIES, COMMAND_COALESCE
+
+
+class _Command:
+    __slots__ = ("priority", "endpoint", "key", "fn", "future", "queued_at", "waiters")
+
+    def __init__(self, priority: int, endpoint: str, key, fn):
+        self.priority = priority
+        self.endpoint = endpoint
+        self.key = key
+        self.fn = fn
+        self.future = Future()
+        self.queued_at = time.perf_counter()
+        self.waiters = 1
+
+
+class EndpointMetrics:
+    """Counters for one endpoint (times in seconds)."""
+
+    __slots__ = ("sent", "coalesced", "failed", "wait_total", "wait_max", "run_total", "run_max")
+
+    def __init__(self):
+        self.sent = 0
+        self.coalesced = 0
+        self.failed = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.run_total = 0.0
+        self.run_max = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "failed": self.failed,
+            "wait_mean": self.wait_total / self.sent if self.sent else None,
+            "wait_max": self.wait_max,
+            "run_mean": self.run_total / self.sent if self.sent else None,
+            "run_max": self.run_max,
+        }
+
+
+class CameraCommandQueue:
+    def __init__(self, name: str, priorities: dict | None = None, coalesce=COMMAND_COALESCE):
+        """
+        name: camera name (used for the worker thread name)
+        priorities: endpoint -> priority overrides (lower runs first)
+        coalesce: endpoints whose identical waiting requests are merged
+        """
+        self.name = name
+        self.priorities = dict(COMMAND_PRIORITIES)
+        if priorities:
+            self.priorities.update(priorities)
+        self.coalesce = set(coalesce)
+        self.metrics = {}
+        self.max_depth = 0
+        self._heap = []
+        self._pending = {}   # coalescing key -> waiting _Command
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._worker = None
+        self._closed = False
+
+    def priority(self, endpoint: str) -> int:
+        return self.priorities.get(endpoint, self.priorities["default"])
+
+    @property
+    def depth(self) -> int:
+        """Commands waiting to be sent (not counting the one in flight)."""
+        return len(self._heap)
+
+    def _metrics(self, endpoint: str) -> EndpointMetrics:
+        metrics = self.metrics.get(endpoint)
+        if metrics is None:
+            metrics = self.metrics[endpoint] = EndpointMetrics()
+        return metrics
+
+    # ------------ Submission ------------ #
+
+    def _closed_error(self) -> requests.exceptions.ConnectionError:
+        return requests.exceptions.ConnectionError(f"{self.name}: command queue closed")
+
+    def submit(self, endpoint: str, fn, key=None) -> Future:
+        """
+        Queue fn() to run on the worker. Returns a Future with its result
+        (already failed with ConnectionError once the queue is closed).
+        key: identity for coalescing (only used for endpoints in `coalesce`)
+        """
+        with self._cond:
+            if self._closed:
+                future = Future()
+                future.set_exception(self._closed_error())
+                return future
+            if endpoint in self.coalesce and key is not None:
+                waiting = self._pending.get(key)
+                if waiting is not None:
+                    waiting.waiters += 1
+                    self._metrics(endpoint).coalesced += 1
+                    return waiting.future
+            command = _Command(self.priority(endpoint), endpoint, key, fn)
+            if endpoint in self.coalesce and key is not None:
+                self._pending[key] = command
+            heapq.heappush(self._heap, (command.priority, next(self._counter), command))
+            self.max_depth = max(self.max_depth, len(self._heap))
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, daemon=True, name=f"gopro-cmd-{self.name}")
+                self._worker.start()
+            self._cond.notify()
+            return command.future
+
+    def call(self, endpoint: str, fn, key=None):
+        """Run fn() through the queue and wait for its result (re-raising its exception)."""
+        if threading.current_thread() is self._worker:
+            return fn()
+        return self.submit(endpoint, fn, key).result()
+
+    # ------------ Worker ------------ #
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._heap and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                _, _, command = heapq.heappop(self._heap)
+                if self._pending.get(command.key) is command:
+                    del self._pending[command.key]
+
+            started = time.perf_counter()
+            wait = started - command.queued_at
+            try:
+                command.future.set_result(command.fn())
+                failed = False
+            except BaseException as e:
+                command.future.set_exception(e)
+                failed = True
+            run = time.perf_counter() - started
+
+            with self._cond:
+                metrics = self._metrics(command.endpoint)
+                metrics.sent += 1
+                metrics.failed += failed
+                metrics.wait_total += wait
+                metrics.wait_max = max(metrics.wait_max, wait)
+                metrics.run_total += run
+                metrics.run_max = max(metrics.run_max, run)
+
+    def close(self):
+        """Stop the worker and fail every command still waiting."""
+        with self._cond:
+            self._closed = True
+            waiting = [command for _, _, command in self._heap]
+            self._heap.clear()
+            self._pending.clear()
+            self._cond.notify_all()
+        for command in waiting:
+            command.future.set_exception(self._closed_error())
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "depth": len(self._heap),
+                "max_depth": self.max_depth,
+                "endpoints": {endpoint: m.to_dict() for endpoint, m in self.metrics.items()},
+            }
@@ -3,7 +3,8 @@ Configuration file for GoPro + LSL integration.
 """
 
 # === Connection mode ===
-# "wifi" (old behavior) or "usb"
+# "usb", "wifi", or "auto" (USB plus Wi-Fi for cameras with a "wifi_ip",
+# routed over the fastest healthy link with automatic failover)
 GOPRO_CONNECTION_MODE = "wifi"
 
 # Wi-Fi GoPro IP (unchanged)
@@ -32,9 +33,196 @@ DEFAULT_RECORDING_DURATION = 10
 # Default timeout for status checking (seconds)
 DEFAULT_TIMEOUT = 5.0
 
-# Default poll interval for status checking (seconds)
+# Fixed poll interval for status checking (seconds); shutter confirmation adapts instead unless one is given
 DEFAULT_POLL_INTERVAL = 0.2
 
 GOPRO_SERIAL = "195"  # serial = xyz s.t. ip="172.2{x}.1{yz}.51"   # e.g. serial ...794 -> 172.27.194.51
 
 GOPRO_STRAM_NAME = ""
+
+
+# === HTTP connection pool ===
+# Each camera keeps one persistent keep-alive session; these size its pool.
+HTTP_POOL_CONNECTIONS = 1   # host pools per session (one camera = one host)
+HTTP_POOL_MAXSIZE = 4       # sockets kept warm per camera
+
+# Per-endpoint policy: (timeout seconds, retries on connection errors, backoff seconds)
+# A ConnectionError can also mean the request was written before the socket died (e.g. a stale
+# keep-alive socket: "Connection aborted"), so the endpoints in HTTP_CONNECT_RETRY_ONLY are only
+# retried when the TCP connect itself failed and the camera provably never saw the command.
+HTTP_ENDPOINT_POLICIES = {
+    "wired_usb": (3.0, 1, 0.2),
+    "keep_alive": (3.0, 1, 0.5),
+    "probe": (1.0, 0, 0.0),        # transport link probes: a failure is an answer, never retried
+    "status": (2.0, 1, 0.05),
+    "shutter": (3.0, 1, 0.05),
+    "info": (2.0, 1, 0.1),
+    "settings": (3.0, 1, 0.1),
+    "hilight": (2.0, 1, 0.05),
+    "media_list": (5.0, 1, 0.2),
+    "media": (10.0, 2, 0.5),
+    "default": (3.0, 0, 0.0),
+}
+HTTP_CONNECT_RETRY_ONLY = ("shutter", "hilight")   # not idempotent: never resent once possibly delivered
+
+# === Transport (USB / Wi-Fi links) ===
+TRANSPORT_PROBE_INTERVAL = 10.0   # seconds between link reachability/RTT probes (CameraScheduler)
+TRANSPORT_PROBE_TIMEOUT = 1.0     # seconds before a probe counts as a failure
+TRANSPORT_PROBE_CONNECT_TIMEOUT = 0.3   # seconds to open the probe connection (a dead link fails fast)
+TRANSPORT_RTT_SMOOTHING = 0.3     # EWMA weight of the newest probe RTT
+TRANSPORT_SWITCH_MARGIN = 0.2     # switch links only if the other one is this much faster
+
+# === Per-camera command queue ===
+# Requests to one camera are sent one at a time, lowest priority value first.
+COMMAND_PRIORITIES = {
+    "shutter": 0,
+    "wired_usb": 1,
+    "hilight": 1,
+    "info": 2,
+    "settings": 2,
+    "status": 3,
+    "media_list": 4,
+    "default": 5,
+    "keep_alive": 9,
+    "probe": 9,
+}
+COMMAND_COALESCE = ("status", "keep_alive")   # identical waiting requests share one response
+COMMAND_QUEUE_BYPASS = ("media",)             # bulk range downloads use their own connections
+
+
+# === Camera fleet ===
+# name: a label that's easy for you to identify
+# serial_last3: last 3 digits of the camera's serial number
+# base_url (optional): explicit control URL, e.g. an emulator on loopback
+CAMERAS = [
+    {"name": "default", "serial_last3": GOPRO_SERIAL},
+    # {"name": "big1", "serial_last3": "794"},
+    # {"name": "big2", "serial_last3": "795", "wifi_ip": "10.5.5.9"},   # USB with Wi-Fi failover
+    # add more as needed
+]
+
+# Max seconds a fleet worker waits at the shutter barrier for the others
+FLEET_BARRIER_TIMEOUT = 5.0
+# Max seconds a shutter waits for interrupted background work (re-arm, clock sync) to return
+FLEET_INTERRUPT_TIMEOUT = 1.0
+
+
+# === Status cache ===
+# Seconds a decoded status snapshot is reused before /gp/gpControl/status is fetched again
+STATUS_CACHE_TTL = 0.5
+
+
+# === Shutter timing ===
+# START/STOP are stamped at the estimated encoder transition; a companion marker
+# "<label><suffix> <earliest> <latest>" carries the uncertainty window (local_clock seconds)
+MARKER_WINDOW_SUFFIX = "_WINDOW"
+
+# Per-session shutter latency statistics are written here as JSON
+LATENCY_EXPORT_DIR = "sessions"
+
+# === HiLight tags ===
+# Markers that also tag a HiLight moment in the video of every recording camera.
+# The tag is sent asynchronously through the camera command queue; its round trip is
+# written to <LATENCY_EXPORT_DIR>/<session_id>_hilight.json. STOP cannot be tagged:
+# its marker is pushed after the cameras stopped. Off by default: every tagged marker costs an
+# HTTP request per camera. Example: HILIGHT_MARKERS = (MARKER_START,)
+HILIGHT_MARKERS = ()
+
+
+
+# === Adaptive shutter confirmation ===
+# Used when shutter()/wait_for_recording() get poll_interval=None (the default)
+CONFIRM_BURST_INTERVAL = 0.02     # seconds between polls inside the expected transition window
+CONFIRM_BURST_COUNT = 10          # burst length before anything has been learned
+CONFIRM_BACKOFF_FACTOR = 1.5      # interval growth once past the expected window
+CONFIRM_MAX_INTERVAL = 0.5        # cap on the interval between polls
+CONFIRM_MIN_SAMPLES = 5           # confirmations needed before the learned window is trusted
+
+# Learned transition latencies per camera serial / firmware / mode
+TRANSITION_MODEL_PATH = "transition_model.json"
+TRANSITION_MODEL_MAX_SAMPLES = 200
+TRANSITION_MODEL_SAVE_DELAY = 2.0   # seconds after a confirmation before the model is written (batches a fleet)
+
+
+# === Background camera scheduler ===
+KEEP_ALIVE_INTERVAL = 3.0         # seconds between keep-alives per camera
+STATUS_REFRESH_INTERVAL = 5.0     # seconds between background status refreshes
+HEALTH_CHECK_INTERVAL = 10.0      # seconds between health evaluations
+HEALTH_FAILURE_THRESHOLD = 3      # consecutive failed contacts before a camera is unhealthy
+SCHEDULER_JITTER = 0.1            # +/- fraction of the interval added to every reschedule
+SCHEDULER_SHUTTER_BACKOFF = 0.5   # seconds to defer a job while a shutter is in flight
+SCHEDULER_WORKERS = 2             # threads executing due jobs (the timing runs on one thread)
+
+
+# === Camera settings presets ===
+# {setting_id: option}, applied in this order (resolution before FPS) and only where they differ.
+# 2 = resolution (1: 4K, 9: 1080p), 3 = FPS (0: 240, 5: 60, 8: 30), 121 = lens (0: wide, 4: linear)
+SETTINGS_PRESETS = {
+    "1080p60_wide": {2: 9, 3: 5, 121: 0},
+    "1080p30_linear": {2: 9, 3: 8, 121: 4},
+    "4k30_wide": {2: 1, 3: 8, 121: 0},
+}
+SETTINGS_CACHE_PATH = "camera_settings.json"   # last-known settings per camera serial
+SETTINGS_CACHE_MAX_AGE = 12 * 3600             # seconds the last-known settings are trusted without a status read
+SETTINGS_BUSY_TIMEOUT = 3.0                    # seconds to wait for a busy camera before retrying a setting
+
+# === Battery / storage telemetry ===
+TELEMETRY_ENABLED = True               # start the telemetry poller with the camera fleet
+TELEMETRY_INTERVAL_IDLE = 10.0         # seconds between samples while not recording
+TELEMETRY_INTERVAL_RECORDING = 30.0    # seconds between samples while recording (reuses cached status)
+TELEMETRY_INTERVAL_LOW = 5.0           # seconds between samples once little recording time is left
+TELEMETRY_LOW_THRESHOLD = 15 * 60      # seconds of recording left that count as "low"
+TELEMETRY_TREND_WINDOW = 15 * 60       # seconds of samples used for the time-to-empty trend
+TELEMETRY_MIN_TREND_SPAN = 60.0        # seconds of samples needed before predicting
+TELEMETRY_STREAM_NAME = "GOPRO_TELEMETRY"   # LSL stream (None = no LSL stream)
+
+# === Armed standby ===
+# arm() prepares cameras before the start command so the first shutter is not a cold start
+ARM_SETTINGS = {}                 # preset name (SETTINGS_PRESETS) or {setting_id: option} applied when arming
+ARM_ON_WARM_UP = True             # arm cameras as part of SessionManager.warm_up()
+ARM_READY_TIMEOUT = 5.0           # seconds to wait for the camera to stop being busy
+ARM_POLL_INTERVAL = 0.1           # seconds between readiness polls while arming
+ARM_CHECK_INTERVAL = 2.0          # seconds between readiness re-checks while armed (CameraScheduler)
+ARM_MIN_SD_KB = 1024 * 1024       # free SD space required to be ready (kB)
+ARM_MIN_BATTERY = 10              # battery percentage required to be ready
+
+
+# === Media offload ===
+OFFLOAD_DIR = "offload"                  # files land in <OFFLOAD_DIR>/<camera name>/<DCIM folder>/
+OFFLOAD_CHUNK_SIZE = 8 * 1024 * 1024     # bytes per HTTP range request
+OFFLOAD_CONNECTIONS_PER_CAMERA = 4       # concurrent range requests per camera
+OFFLOAD_PARALLEL_CAMERAS = 4             # cameras offloaded at the same time
+OFFLOAD_BANDWIDTH_LIMIT = None           # total bytes/s across all cameras (None = unlimited)
+
+
+# === Camera emulator (src.gopro_lsl.emulator) ===
+EMULATOR_HOST = "127.0.0.1"
+EMULATOR_BASE_PORT = 18080               # virtual camera i listens on EMULATOR_BASE_PORT + i
+EMULATOR_LATENCY = 0.005                 # seconds added to every response
+EMULATOR_LATENCY_JITTER = 0.002          # +/- uniform jitter on the response latency
+EMULATOR_TRANSITION_DELAY = 0.15         # seconds between shutter command and encoder state change
+EMULATOR_ERROR_RATE = 0.0                # fraction of requests answered with HTTP 500
+EMULATOR_SLEEP_AFTER = 30.0              # seconds without requests before a virtual camera dozes off
+EMULATOR_WAKE_DELAY = 0.4                # extra start latency when the shutter finds the camera asleep
+EMULATOR_SETTING_DELAY = 0.05            # seconds a virtual camera stays busy after a setting change
+EMULATOR_BATTERY_DRAIN = 0.01            # battery percent used per second of recording (~2.8 h per charge)
+
+
+# === Camera clock sync ===
+CLOCK_SYNC_DURATION = 10.0        # seconds of clock sampling per camera and sync
+CLOCK_SYNC_POLL_INTERVAL = 0.02   # seconds between reads while hunting for a clock tick
+CLOCK_SYNC_GUARD = 0.06           # start reading this long before the next expected tick
+CLOCK_SYNC_MIN_DRIFT_SPAN = 60    # seconds of ticks needed before drift is fitted (else offset only)
+CLOCK_SYNC_HISTORY_SPAN = 3600    # seconds of ticks from earlier syncs kept per camera for the drift fit
+CLOCK_SYNC_MAX_JUMP = 0.5         # seconds a camera clock may disagree with its history before it is dropped
+
+
+# === IMU alignment (GoPro GYRO vs Rebocap, src.gopro_lsl.imu_alignment) ===
+ALIGN_RATE = 100.0                # Hz of the common grid for the fine (per-window) search
+ALIGN_COARSE_RATE = 10.0          # Hz of the whole-recording coarse search
+ALIGN_MAX_LAG = 30.0              # seconds of offset searched in either direction
+ALIGN_WINDOW = 60.0               # seconds per window for the drift estimate
+ALIGN_HOP = 30.0                  # seconds between window starts
+ALIGN_FINE_MARGIN = 0.5           # seconds searched around the coarse lag in each window
+ALIGN_MIN_CORRELATION = 0.3       # windows with a weaker correlation peak are ignored
+REBOCAP_JOINT = 15                # Rebocap joint the camera is mounted on (SMPL order, 15 = head)
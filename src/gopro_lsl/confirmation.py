@@ -0,0 +1,196 @@
+"""
+Adaptive shutter-confirmation polling.
+
+Instead of polling the encoder state at a fixed interval, each confirmation
+follows a PollSchedule:
+  - sleep until just before the transition is expected,
+  - poll in a tight burst across the expected window,
+  - back off exponentially once past it.
+
+The expected window comes from TransitionModel, which learns how long each
+camera (serial + firmware) takes to start/stop encoding from past
+confirmations and persists the samples as JSON. The file is written off the
+confirmation path, TRANSITION_MODEL_SAVE_DELAY seconds after the first new
+sample (so one write covers a whole fleet), via a temp file and os.replace.
+"""
+
+import atexit
+import json
+import os
+import statistics
+import threading
+from collections import deque
+
+from src.gopro_lsl.config import (
+    CONFIRM_BURST_INTERVAL,
+    CONFIRM_BURST_COUNT,
+    CONFIRM_BACKOFF_FACTOR,
+    CONFIRM_MAX_INTERVAL,
+    CONFIRM_MIN_SAMPLES,
+    TRANSITION_MODEL_PATH,
+    TRANSITION_MODEL_MAX_SAMPLES,
+    TRANSITION_MODEL_SAVE_DELAY,
+)
+
+
+def model_key(serial_last3: str, firmware: str | None, mode: str) -> str:
+    return f"{serial_last3}/{firmware or 'unknown'}/{mode}"
+
+
+def _quantile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+class TransitionModel:
+    """
+    Learned transition latency (seconds from shutter request to encoder state change),
+    keyed by model_key(serial, firmware, mode).
+    """
+
+    def __init__(self, path: str | None = TRANSITION_MODEL_PATH,
+                 max_samples: int = TRANSITION_MODEL_MAX_SAMPLES,
+                 save_delay: float = TRANSITION_MODEL_SAVE_DELAY):
+        self.path = path
+        self.max_samples = max_samples
+        self.save_delay = save_delay
+        self._samples = {}
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()   # one writer at a time
+        self._dirty = False
+        self._timer = None
+        self.load()
+        if path:
+            atexit.register(self.save)   # samples still waiting for the delayed save
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"[TransitionModel] Could not load {self.path}: {e}")
+            return
+        with self._lock:
+            for key, values in data.items():
+                self._samples[key] = deque(values, maxlen=self.max_samples)
+
+    def save(self):
+        """Write unsaved samples now. The file is replaced atomically, never left half-written."""
+        if not self.path:
+            return
+        with self._save_lock:
+            with self._lock:
+                self._timer = None
+                if not self._dirty:
+                    return
+                data = {key: list(values) for key, values in self._samples.items()}
+                self._dirty = False
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            try:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(data, f)
+                os.replace(tmp, self.path)
+            except OSError as e:
+                with self._lock:
+                    self._dirty = True
+                print(f"[TransitionModel] Could not save {self.path}: {e}")
+
+    def record(self, key: str, latency: float, save: bool = True):
+        """Add a sample; with save, the model is written save_delay seconds later on a timer thread."""
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=self.max_samples)).append(latency)
+            self._dirty = True
+            if not save or not self.path or self._timer is not None:
+                return
+            self._timer = threading.Timer(self.save_delay, self.save)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def window(self, key: str) -> tuple[float, float] | None:
+        """(p10, p90) of the learned latency, or None until enough samples exist."""
+        with self._lock:
+            values = list(self._samples.get(key, ()))
+        if len(values) < CONFIRM_MIN_SAMPLES:
+            return None
+        return _quantile(values, 0.1), _quantile(values, 0.9)
+
+    def distribution(self, key: str) -> dict | None:
+        with self._lock:
+            values = list(self._samples.get(key, ()))
+        if not values:
+            return None
+        return {
+            "count": len(values),
+            "min": min(values),
+            "p10": _quantile(values, 0.1),
+            "median": statistics.median(values),
+            "p90": _quantile(values, 0.9),
+            "max": max(values),
+        }
+
+    def report(self) -> dict:
+        """Learned distribution for every camera/firmware/mode seen so far."""
+        with self._lock:
+            keys = list(self._samples)
+        return {key: self.distribution(key) for key in keys}
+
+
+class PollSchedule:
+    """Delays between confirmation polls for one shutter command."""
+
+    def __init__(self, window: tuple[float, float] | None,
+                 burst_interval: float = CONFIRM_BURST_INTERVAL,
+                 burst_count: int = CONFIRM_BURST_COUNT,
+                 backoff: float = CONFIRM_BACKOFF_FACTOR,
+                 max_interval: float = CONFIRM_MAX_INTERVAL):
+        self.burst_interval = burst_interval
+        self.backoff = backoff
+        self.max_interval = max_interval
+        if window is None:
+            # Nothing learned yet: burst right away for a fixed number of polls
+            self.burst_start = 0.0
+            self.burst_end = burst_interval * burst_count
+        else:
+            self.burst_start = max(0.0, window[0] - burst_interval)
+            self.burst_end = window[1] + burst_interval
+        self._interval = burst_interval
+
+    def next_delay(self, elapsed: float) -> float:
+        """Seconds to sleep before the next poll, `elapsed` seconds after the request was sent."""
+        if elapsed < self.burst_start:
+            return min(self.burst_start - elapsed, self.max_interval)
+        if elapsed <= self.burst_end:
+            return self.burst_interval
+        self._interval = min(self._interval * self.backoff, self.max_interval)
+        return self._interval
+
+
+class AdaptivePoller:
+    """Builds poll schedules from a TransitionModel and feeds confirmations back into it."""
+
+    def __init__(self, model: TransitionModel | None = None):
+        self._model = model
+
+    @property
+    def model(self) -> TransitionModel:
+        # Loaded on first use so importing the module never touches the disk
+        if self._model is None:
+            self._model = TransitionModel()
+        return self._model
+
+    def schedule(self, key: str) -> PollSchedule:
+        return PollSchedule(self.model.window(key))
+
+    def learn(self, key: str, timing):
+        """Record a confirmed ShutterTiming's transition latency."""
+        if timing.confirmed and timing.estimate is not None and timing.sent_at is not None:
+            self.model.record(key, timing.estimate - timing.sent_at)
+
+    def report(self) -> dict:
+        return self.model.report()
+
+
+# Shared poller used by every GoProCamera
+adaptive_poller = AdaptivePoller()
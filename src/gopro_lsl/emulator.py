@@ -0,0 +1,342 @@
+"""
+Local GoPro HTTP emulator.
+
+Serves the Open GoPro / gpControl endpoints this package uses so GoProCamera,
+GoProFleet, the scheduler and media offload can be exercised and benchmarked
+without hardware:
+
+  /gopro/camera/control/wired_usb     /gopro/camera/keep_alive
+  /gp/gpControl/status                /gp/gpControl/info
+  /gopro/camera/shutter/start|stop    /gopro/media/list
+  /gopro/camera/get_date_time         /gopro/camera/setting
+  /videos/DCIM/<folder>/<file>        (Range requests supported)
+
+Each VirtualCamera has its own response latency, encoder transition delay
+and error rate, and listens on its own loopback port. A camera left without
+requests dozes off, so its next start is slower (like a real cold start),
+and it reports busy for a moment after every setting change.
+"""
+
+import json
+import random
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from src.gopro_lsl.config import (
+    EMULATOR_HOST,
+    EMULATOR_BASE_PORT,
+    EMULATOR_LATENCY,
+    EMULATOR_LATENCY_JITTER,
+    EMULATOR_TRANSITION_DELAY,
+    EMULATOR_ERROR_RATE,
+    EMULATOR_SLEEP_AFTER,
+    EMULATOR_WAKE_DELAY,
+    EMULATOR_SETTING_DELAY,
+    EMULATOR_BATTERY_DRAIN,
+)
+from src.gopro_lsl.status_cache import (
+    STATUS_ENCODING,
+    STATUS_BUSY,
+    STATUS_SD_REMAINING,
+    STATUS_BATTERY,
+    STATUS_VIDEO_REMAINING,
+)
+
+MEDIA_FOLDER = "100GOPRO"
+MEDIA_BYTES_PER_SECOND = 2_000_000   # synthetic bitrate of emulated recordings
+
+
+class VirtualCamera:
+    """State and behavior of one emulated camera."""
+
+    def __init__(self, name: str, serial_last3: str, port: int,
+                 latency: float = EMULATOR_LATENCY,
+                 latency_jitter: float = EMULATOR_LATENCY_JITTER,
+                 transition_delay: float = EMULATOR_TRANSITION_DELAY,
+                 error_rate: float = EMULATOR_ERROR_RATE,
+                 clock_offset: float = 0.0,
+                 sleep_after: float = EMULATOR_SLEEP_AFTER,
+                 wake_delay: float = EMULATOR_WAKE_DELAY,
+                 setting_delay: float = EMULATOR_SETTING_DELAY,
+                 battery_drain: float = EMULATOR_BATTERY_DRAIN,
+                 firmware: str = "H22.01.02.10.00"):
+        self.name = name
+        self.serial_last3 = serial_last3
+        self.port = port
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.transition_delay = transition_delay
+        self.error_rate = error_rate
+        self.clock_offset = clock_offset   # seconds the camera clock is ahead of this machine
+        self.sleep_after = sleep_after
+        self.wake_delay = wake_delay
+        self.setting_delay = setting_delay
+        self.battery_drain = battery_drain   # battery percent used per second of recording
+        self.firmware = firmware
+
+        self.battery = 100.0
+        self.sd_remaining_kb = 64 * 1024 * 1024
+        self.media = []          # [(name, size, created)]
+        self.hilights = []       # [(file index, seconds into the recording)] of HiLight tags
+        self.settings = {}       # setting id -> option
+        self.requests = 0
+        self._last_contact = time.monotonic()
+        self._waking_until = 0.0
+        self._busy_until = 0.0
+        self._encoding = False
+        self._target = False
+        self._transition_at = 0.0
+        self._recording_since = None
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{EMULATOR_HOST}:{self.port}"
+
+    def config_entry(self) -> dict:
+        """Entry in config.CAMERAS format pointing at this virtual camera."""
+        return {"name": self.name, "serial_last3": self.serial_last3, "base_url": self.base_url}
+
+    # ------------ State ------------ #
+
+    def _settle(self):
+        """Apply a pending encoder transition once its delay has elapsed."""
+        now = time.monotonic()
+        if self._encoding != self._target and now >= self._transition_at:
+            self._encoding = self._target
+            if self._encoding:
+                self._recording_since = now
+            elif self._recording_since is not None:
+                self._finish_file(now - self._recording_since)
+                self._recording_since = None
+
+    def _finish_file(self, seconds: float):
+        index = len(self.media) + 1
+        size = max(1, int(seconds * MEDIA_BYTES_PER_SECOND))
+        self.media.append((f"GX01{index:04d}.MP4", size, int(time.time())))
+        self.sd_remaining_kb = max(0, self.sd_remaining_kb - size // 1024)
+        self.battery = max(0.0, self.battery - seconds * self.battery_drain)
+
+    def _consumption(self) -> tuple[float, int]:
+        """(battery %, free kB) including the recording in progress."""
+        battery, sd_kb = self.battery, self.sd_remaining_kb
+        if self._encoding and self._recording_since is not None:
+            seconds = time.monotonic() - self._recording_since
+            battery = max(0.0, battery - seconds * self.battery_drain)
+            sd_kb = max(0, sd_kb - int(seconds * MEDIA_BYTES_PER_SECOND) // 1024)
+        return battery, sd_kb
+
+    def touch(self):
+        """Register a request; one arriving after a long idle period wakes the camera up first."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_contact > self.sleep_after:
+                self._waking_until = now + self.wake_delay
+            self._last_contact = now
+
+    @property
+    def busy(self) -> bool:
+        return self._encoding != self._target or time.monotonic() < max(self._busy_until, self._waking_until)
+
+    def shutter(self, start: bool):
+        with self._lock:
+            self._settle()
+            if self._target != start:
+                self._target = start
+                ready_at = max(time.monotonic(), self._waking_until, self._busy_until)
+                self._transition_at = ready_at + self.transition_delay
+
+    def hilight(self) -> bool:
+        """Tag the current moment of the recording; False if not recording."""
+        with self._lock:
+            self._settle()
+            if not self._encoding or self._recording_since is None:
+                return False
+            self.hilights.append((len(self.media) + 1, time.monotonic() - self._recording_since))
+            return True
+
+    def apply_setting(self, setting: str, option: int):
+        with self._lock:
+            if self.settings.get(setting) != option:
+                self.settings[setting] = option
+                self._busy_until = time.monotonic() + self.setting_delay
+
+    def clock(self) -> time.struct_time:
+        """Camera wall clock, whole seconds (reported as camera local time)."""
+        return time.gmtime(time.time() + self.clock_offset)
+
+    def date_time(self) -> dict:
+        t = self.clock()
+        return {"date": f"{t.tm_year}_{t.tm_mon}_{t.tm_mday}",
+                "time": f"{t.tm_hour}_{t.tm_min}_{t.tm_sec}", "tzone": 0, "dst": 0}
+
+    def status(self) -> dict:
+        t = self.clock()
+        date_time = "".join(f"%{v:02X}" for v in (t.tm_year - 2000, t.tm_mon, t.tm_mday,
+                                                   t.tm_hour, t.tm_min, t.tm_sec))
+        with self._lock:
+            self._settle()
+            battery, sd_kb = self._consumption()
+            return {
+                "status": {
+                    STATUS_ENCODING: int(self._encoding),
+                    STATUS_BUSY: int(self.busy),
+                    STATUS_BATTERY: int(battery),
+                    STATUS_SD_REMAINING: sd_kb,
+                    STATUS_VIDEO_REMAINING: sd_kb * 1024 // MEDIA_BYTES_PER_SECOND,
+                    "40": date_time,
+                },
+                "settings": dict(self.settings),
+            }
+
+    def info(self) -> dict:
+        return {"info": {
+            "model_name": "HERO11 Black Mini (emulated)",
+            "firmware_version": self.firmware,
+            "serial_number": f"C3501324500{self.serial_last3}",
+        }}
+
+    def media_list(self) -> dict:
+        with self._lock:
+            self._settle()
+            files = [{"n": n, "s": str(s), "cre": str(c), "mod": str(c)} for n, s, c in self.media]
+        return {"id": "emulator", "media": [{"d": MEDIA_FOLDER, "fs": files}]}
+
+    def media_size(self, name: str) -> int | None:
+        for n, size, _ in self.media:
+            if n == name:
+                return size
+        return None
+
+
+def media_bytes(name: str, start: int, end: int) -> bytes:
+    """Deterministic synthetic file content, so offloads can be checksummed."""
+    pattern = (name.encode() * (4096 // len(name) + 1))[:4096]
+    offset = start % len(pattern)
+    length = end - start + 1
+    repeated = pattern * (length // len(pattern) + 2)
+    return repeated[offset:offset + length]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, like the real camera
+    camera: VirtualCamera = None    # set per server subclass
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        # Responses go out in one write; disable Nagle so small replies aren't delayed
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def _reply(self, code: int, body: bytes = b"{}", content_type: str = "application/json", headers=()):
+        head = [f"HTTP/1.1 {code} {self.responses.get(code, ('',))[0]}",
+                f"Content-Type: {content_type}",
+                f"Content-Length: {len(body)}"]
+        head += [f"{k}: {v}" for k, v in headers]
+        self.wfile.write(("\r\n".join(head) + "\r\n\r\n").encode() + body)
+
+    def _json(self, data: dict):
+        self._reply(200, json.dumps(data).encode())
+
+    def do_GET(self):
+        camera = self.camera
+        camera.requests += 1
+        camera.touch()
+        delay = camera.latency + random.uniform(-camera.latency_jitter, camera.latency_jitter)
+        if delay > 0:
+            time.sleep(delay)
+        if camera.error_rate and random.random() < camera.error_rate:
+            return self._reply(500, b'{"error": "emulated failure"}')
+
+        url = urlparse(self.path)
+        path = url.path
+        if path in ("/gopro/camera/control/wired_usb", "/gopro/camera/keep_alive"):
+            return self._json({})
+        if path == "/gp/gpControl/status":
+            return self._json(camera.status())
+        if path == "/gopro/camera/get_date_time":
+            return self._json(camera.date_time())
+        if path == "/gp/gpControl/info":
+            return self._json(camera.info())
+        if path in ("/gopro/camera/shutter/start", "/gopro/camera/shutter/stop"):
+            camera.shutter(path.endswith("start"))
+            return self._json({})
+        if path == "/gopro/media/hilight/moment":
+            if not camera.hilight():
+                return self._reply(409, b'{"error": "not recording"}')
+            return self._json({})
+        if path == "/gopro/camera/setting":
+            query = parse_qs(url.query)
+            try:
+                camera.apply_setting(query["setting"][0], int(query["option"][0]))
+            except (KeyError, ValueError):
+                return self._reply(400, b'{"error": "setting and integer option required"}')
+            return self._json({})
+        if path == "/gopro/media/list":
+            return self._json(camera.media_list())
+        if path.startswith(f"/videos/DCIM/{MEDIA_FOLDER}/"):
+            return self._media(path.rsplit("/", 1)[-1])
+        self._reply(404, b'{"error": "unknown endpoint"}')
+
+    def _media(self, name: str):
+        size = self.camera.media_size(name)
+        if size is None:
+            return self._reply(404, b'{"error": "no such file"}')
+        start, end = 0, size - 1
+        range_header = self.headers.get("Range")
+        if range_header and range_header.startswith("bytes="):
+            first, _, last = range_header[6:].partition("-")
+            start = int(first or 0)
+            end = min(int(last), size - 1) if last else size - 1
+        code = 206 if range_header else 200
+        self._reply(code, media_bytes(name, start, end), "video/mp4",
+                    [("Content-Range", f"bytes {start}-{end}/{size}"), ("Accept-Ranges", "bytes")])
+
+
+class GoProEmulator:
+    """Runs several VirtualCameras on consecutive loopback ports."""
+
+    def __init__(self, count: int = 1, base_port: int = EMULATOR_BASE_PORT, **camera_kwargs):
+        """
+        count: number of virtual cameras
+        base_port: first port (0 = let the OS pick a free port per camera)
+        camera_kwargs: latency / transition_delay / error_rate ... applied to every camera
+        """
+        self.cameras = [
+            VirtualCamera(name=f"emu{i}", serial_last3=f"{900 + i:03d}",
+                          port=base_port + i if base_port else 0, **camera_kwargs)
+            for i in range(count)
+        ]
+        self._servers = []
+
+    def start(self):
+        for camera in self.cameras:
+            handler = type(f"Handler_{camera.name}", (_Handler,), {"camera": camera})
+            server = ThreadingHTTPServer((EMULATOR_HOST, camera.port), handler)
+            server.daemon_threads = True
+            camera.port = server.server_address[1]
+            threading.Thread(target=server.serve_forever, daemon=True, name=f"emu-{camera.name}").start()
+            self._servers.append(server)
+            print(f"[Emulator] {camera.name} (serial {camera.serial_last3}) on {camera.base_url}")
+        return self
+
+    def stop(self):
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+        self._servers.clear()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def camera_configs(self) -> list[dict]:
+        """Camera list in config.CAMERAS format, ready for GoProFleet.from_config()."""
+        return [camera.config_entry() for camera in self.cameras]
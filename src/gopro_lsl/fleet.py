@@ -0,0 +1,241 @@
+"""
+Multi-camera fleet controller.
+
+Fires the shutter on every configured camera at once: one worker thread per
+camera waits on a shared barrier, so all `shutter/start` requests leave within
+a scheduler tick of each other instead of one after another. Each camera is
+then confirmed concurrently and the inter-camera skew is reported.
+
+The shutter workers do nothing else: arming, presets, keep-alives and clock
+sync run on a separate pool (run_all), so they can never hold up a shutter.
+A shutter first interrupts that background work: queued jobs are cancelled
+and running ones see `interrupted` set and return, so their requests do not
+compete with the shutter on the camera queues. If a camera does not reach
+the barrier in time, no camera fires: the shutter is aborted and every result
+reports it, rather than starting the cameras unsynchronized.
+"""
+
+import threading
+from concurrent.futures import CancelledError, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+import requests
+from src.gopro_lsl.gopro_control import GoProCamera
+from src.gopro_lsl.shutter_timing import ShutterTiming, combined_window
+from src.gopro_lsl.config import CAMERAS, DEFAULT_TIMEOUT, FLEET_BARRIER_TIMEOUT, FLEET_INTERRUPT_TIMEOUT
+
+UNSYNCHRONIZED = "unsynchronized: fleet barrier broken, shutter not sent"
+
+
+@dataclass
+class FleetShutterReport:
+    mode: str
+    results: list[ShutterTiming] = field(default_factory=list)
+
+    @property
+    def all_confirmed(self) -> bool:
+        return bool(self.results) and all(r.confirmed for r in self.results)
+
+    def _spread(self, attr: str) -> float | None:
+        values = [getattr(r, attr) for r in self.results if getattr(r, attr) is not None]
+        if len(values) < 2:
+            return 0.0 if values else None
+        return max(values) - min(values)
+
+    @property
+    def unsynchronized(self) -> bool:
+        """True if the fleet barrier broke, so the shutter was not sent to any camera."""
+        return any(r.error == UNSYNCHRONIZED for r in self.results)
+
+    @property
+    def send_skew(self) -> float | None:
+        """Seconds between the first and last shutter request leaving this machine."""
+        return self._spread("sent_at")
+
+    @property
+    def ack_skew(self) -> float | None:
+        """Seconds between the first and last camera acknowledging the shutter request."""
+        return self._spread("acked_at")
+
+    @property
+    def confirm_skew(self) -> float | None:
+        """Seconds between the first and last confirmed encoder transition."""
+        return self._spread("confirmed_at")
+
+    @property
+    def transition(self) -> tuple[float, float, float] | None:
+        """(estimate, earliest, latest) of the fleet's encoder transition in local_clock() time."""
+        return combined_window(self.results)
+
+    def summary(self) -> str:
+        def ms(v):
+            return "n/a" if v is None else f"{v * 1000:.1f} ms"
+        ok = sum(r.confirmed for r in self.results)
+        return (f"shutter {self.mode}: {ok}/{len(self.results)} confirmed, "
+                f"send skew {ms(self.send_skew)}, ack skew {ms(self.ack_skew)}, "
+                f"confirm skew {ms(self.confirm_skew)}")
+
+
+class GoProFleet:
+    """Drives several GoProCamera instances together."""
+
+    def __init__(self, cameras: list[GoProCamera]):
+        if not cameras:
+            raise ValueError("GoProFleet needs at least one camera")
+        self.cameras = list(cameras)
+        # One long-lived worker per camera so no thread is spawned on the shutter path,
+        # reserved for shutters; everything else runs on the second pool
+        self._shutter_executor = ThreadPoolExecutor(max_workers=len(self.cameras),
+                                                    thread_name_prefix="gopro-shutter")
+        self._executor = ThreadPoolExecutor(max_workers=len(self.cameras),
+                                            thread_name_prefix="gopro-fleet")
+        self._shutter_lock = threading.Lock()   # one fleet shutter at a time (it needs every shutter worker)
+        self._interrupt = threading.Event()
+        self._background = set()                # futures of run_all() jobs not yet finished
+        self._background_lock = threading.Lock()
+        self.shutters = 0                       # fleet shutters sent so far
+
+    @classmethod
+    def from_config(cls, cameras: list[dict] = CAMERAS, **camera_kwargs):
+        """Builds a fleet from a list like config.CAMERAS (entries may add "base_url", "links" or "wifi_ip")."""
+        return cls([GoProCamera(name=c["name"], serial_last3=c["serial_last3"],
+                                base_url=c.get("base_url"), links=c.get("links"),
+                                wifi_ip=c.get("wifi_ip"), **camera_kwargs)
+                    for c in cameras])
+
+    def __repr__(self):
+        return f"<GoProFleet cameras={[c.name for c in self.cameras]}>"
+
+    def __len__(self):
+        return len(self.cameras)
+
+    @property
+    def interrupted(self) -> threading.Event:
+        """Set while a shutter is in progress: background jobs should return early."""
+        return self._interrupt
+
+    def run_all(self, fn) -> list:
+        """
+        Run fn(camera) for every camera concurrently on the background workers.
+        Returns the results in camera order, None for a job a shutter cancelled
+        before it started. Long jobs should return once `interrupted` is set.
+        """
+        with self._background_lock:
+            futures = [self._executor.submit(fn, camera) for camera in self.cameras]
+            self._background.update(futures)
+        try:
+            results = []
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except CancelledError:
+                    results.append(None)
+            return results
+        finally:
+            with self._background_lock:
+                self._background.difference_update(futures)
+
+    def _interrupt_background(self):
+        """Cancel queued background jobs and give running ones a moment to notice `interrupted`."""
+        self._interrupt.set()
+        with self._background_lock:
+            running = [future for future in self._background if not future.cancel()]
+        if running:
+            _, still_running = wait(running, timeout=FLEET_INTERRUPT_TIMEOUT)
+            if still_running:
+                print(f"[Fleet] ⚠ {len(still_running)} background job(s) still running at the shutter")
+
+    def keep_alive(self):
+        """Ping every camera concurrently (also warms each pooled socket)."""
+        self.run_all(lambda camera: camera.keep_alive())
+
+    def arm(self, settings: dict | None = None) -> dict:
+        """
+        Arm every camera concurrently (see GoProCamera.arm). Returns {name: armed}.
+        A shutter interrupts the arming; interrupted cameras count as not armed.
+        """
+        kwargs = {"cancel": self._interrupt}
+        if settings is not None:
+            kwargs["settings"] = settings
+        results = [bool(armed) for armed in self.run_all(lambda camera: camera.arm(**kwargs))]
+        print(f"[Fleet] armed {sum(results)}/{len(results)} cameras")
+        return {camera.name: armed for camera, armed in zip(self.cameras, results)}
+
+    def apply_preset(self, preset, use_cache: bool = True) -> dict:
+        """
+        Apply a settings preset (name or {setting id: option}) to every camera concurrently.
+        Returns {name: settings sent} (None for cameras that failed).
+        """
+        def apply(camera: GoProCamera):
+            try:
+                return camera.settings.apply(preset, use_cache=use_cache)
+            except requests.exceptions.RequestException as e:
+                print(f"[{camera.name}] ✖ preset failed: {e}")
+                return None
+
+        results = self.run_all(apply)
+        print(f"[Fleet] preset applied on {sum(r is not None for r in results)}/{len(results)} cameras, "
+              f"{sum(len(r) for r in results if r)} setting(s) sent")
+        return {camera.name: changes for camera, changes in zip(self.cameras, results)}
+
+    @property
+    def armed(self) -> bool:
+        return all(camera.armed for camera in self.cameras)
+
+    def shutter_all(self, mode: str, timeout=DEFAULT_TIMEOUT,
+                    poll_interval=None) -> FleetShutterReport:
+        """
+        Send `shutter/<mode>` to all cameras behind a barrier, then confirm each concurrently.
+        mode: "start" or "stop"
+        poll_interval: fixed confirmation poll interval, or None for adaptive polling
+        A failed camera's ShutterTiming carries the error. If the workers do not all reach
+        the barrier within FLEET_BARRIER_TIMEOUT, no camera fires (see report.unsynchronized).
+        """
+        assert mode in ("start", "stop")
+        barrier = threading.Barrier(len(self.cameras))
+
+        def fire(camera: GoProCamera) -> ShutterTiming:
+            result = ShutterTiming(name=camera.name, mode=mode)
+            with camera.shutter_in_progress():
+                try:
+                    barrier.wait(timeout=FLEET_BARRIER_TIMEOUT)
+                except threading.BrokenBarrierError:
+                    # Another worker never arrived: firing now would break the skew guarantee
+                    result.error = UNSYNCHRONIZED
+                    return result
+                try:
+                    camera.send_shutter(mode, timing=result)
+                except requests.exceptions.RequestException as e:
+                    result.error = str(e)
+                    print(f"[{camera.name}] ✖ shutter {mode} failed: {e}")
+                    return result
+
+                camera.wait_for_recording(mode == "start", timeout=timeout,
+                                          poll_interval=poll_interval, timing=result)
+            return result
+
+        with self._shutter_lock:
+            self._interrupt_background()
+            try:
+                futures = [self._shutter_executor.submit(fire, camera) for camera in self.cameras]
+                report = FleetShutterReport(mode=mode, results=[f.result() for f in futures])
+                self.shutters += 1
+            finally:
+                self._interrupt.clear()
+        if report.unsynchronized:
+            print(f"[Fleet] ✖ shutter {mode} aborted: a camera did not reach the barrier "
+                  f"within {FLEET_BARRIER_TIMEOUT:.1f} s")
+        print(f"[Fleet] {report.summary()}")
+        return report
+
+    def start_recording(self) -> FleetShutterReport:
+        return self.shutter_all("start")
+
+    def stop_recording(self) -> FleetShutterReport:
+        return self.shutter_all("stop")
+
+    def close(self):
+        self._shutter_executor.shutdown(wait=False)
+        self._executor.shutdown(wait=False)
+        for camera in self.cameras:
+            camera.close()
@@ -4,44 +4,82 @@ Provides functions to start and stop recording and query camera status.
 """
 
 import requests
+import threading
 import time
-from datetime import datetime
-from src.gopro_lsl.config import GOPRO_IP, GOPRO_SERIAL, DEFAULT_TIMEOUT, DEFAULT_POLL_INTERVAL
+from contextlib import contextmanager
+from src.gopro_lsl.config import GOPRO_SERIAL, DEFAULT_TIMEOUT, GOPRO_CONNECTION_MODE
+from src.gopro_lsl.config import (
+    ARM_SETTINGS,
+    ARM_READY_TIMEOUT,
+    ARM_POLL_INTERVAL,
+    ARM_MIN_SD_KB,
+    ARM_MIN_BATTERY,
+)
+from src.gopro_lsl.http_session import SessionPool
+from src.gopro_lsl.transport import GoProTransport, link_urls
+from src.gopro_lsl.status_cache import StatusCache
+from src.gopro_lsl.settings import CameraSettings
+from src.gopro_lsl.shutter_timing import ShutterTiming
+from src.gopro_lsl.confirmation import AdaptivePoller, adaptive_poller, model_key
 from src.log.logger import logger
 
-import requests
-import time
-import argparse
-
-from pylsl import StreamInfo, StreamOutlet
+from pylsl import local_clock
 
 # =====================================
-# Configure multiple cameras here
-# name: a label that's easy for you to identify
-# serial_last3: last 3 digits of the camera's serial number
+# Multiple cameras are configured in config.CAMERAS
+# and driven together by src.gopro_lsl.fleet.GoProFleet
 # =====================================
-# CAMERAS = [
-#     {"name": "big1", "serial_last3": "794"},
-#     # add more as needed
-# ]
 
 # =====================================
 # GoPro control class
 # =====================================
 class GoProCamera:
-    def __init__(self, name: str, serial_last3: str = GOPRO_SERIAL):
+    def __init__(self, name: str, serial_last3: str = GOPRO_SERIAL,
+                 pool: SessionPool | None = None, policies: dict | None = None,
+                 poller: AdaptivePoller = adaptive_poller, base_url: str | None = None,
+                 links: dict | None = None, wifi_ip: str | None = None,
+                 mode: str = GOPRO_CONNECTION_MODE):
+        """
+        base_url: explicit control URL (e.g. an emulator); overrides the links derived from mode
+        links: explicit link name -> base URL map, e.g. {"usb": ..., "wifi": ...}
+        wifi_ip: the camera's Wi-Fi address, adds a Wi-Fi link in "auto" mode
+        mode: "usb", "wifi" or "auto" (see config.GOPRO_CONNECTION_MODE)
+        pool: shared SessionPool (defaults to the module-wide shared pool)
+        policies: per-endpoint overrides, e.g. {"status": (1.0, 0, 0.0)}
+        poller: adaptive confirmation poller (learns per serial/firmware)
+
+        Blocks while it contacts the camera: every link is probed (an unreachable
+        one costs TRANSPORT_PROBE_CONNECT_TIMEOUT), then wired USB control is
+        enabled and the firmware read (camera_info), each with its endpoint's
+        timeout and retries. Build cameras off latency-sensitive threads, as
+        SessionManager does when it creates the fleet on first use or in warm-up.
+        """
         self.name = name
         self.serial_last3 = serial_last3
-        x = serial_last3[0]
-        yz = serial_last3[1:]
-        camera_ip = f"172.2{x}.1{yz}.51"
-        self.base_url = f"http://{camera_ip}:8080"
+        if links is None:
+            links = {"direct": base_url} if base_url else link_urls(serial_last3, mode, wifi_ip)
+        self.http = GoProTransport(name, links, pool=pool, policies=policies)
+        self.status = StatusCache(self.get_status)
+        self.settings = CameraSettings(self)
+        self.poller = poller
+        self.firmware = None
+        self.armed = False
+        self.armed_at = None
+        self.arm_problems = []
+        self._shutters_in_flight = 0
+        self._shutter_lock = threading.Lock()
 
         self.enable_wired_usb_control()
+        self.camera_info()
 
     def __repr__(self):
         return f"<GoProCamera name={self.name}, serial_last3={self.serial_last3}, base_url={self.base_url}>"
 
+    @property
+    def base_url(self) -> str:
+        """Control URL of the link currently carrying commands."""
+        return self.http.base_url
+
     def enable_wired_usb_control(self):
         """
         Enable wired USB control
@@ -49,9 +87,8 @@ class GoProCamera:
 
         Some firmware versions may return 404; if so, just log a warning and continue.
         """
-        url = f"{self.base_url}/gopro/camera/control/wired_usb"
         try:
-            r = requests.get(url, params={"p": 1}, timeout=3)
+            r = self.http.get("wired_usb", "/gopro/camera/control/wired_usb", params={"p": 1})
             r.raise_for_status()
             print(f"[{self.name}] ✔ wired USB control enabled")
         except requests.exceptions.HTTPError as e:
@@ -62,88 +99,278 @@ class GoProCamera:
         except requests.exceptions.RequestException as e:
             print(f"[{self.name}] ✖ Request error in enable_wired_usb_control: {e}")
 
+    def camera_info(self):
+        """
+        Query model/firmware/serial info and remember the firmware version.
+        GET /gp/gpControl/info
+        """
+        try:
+            r = self.http.get("info", "/gp/gpControl/info")
+            r.raise_for_status()
+            info = r.json().get("info", {})
+            self.firmware = info.get("firmware_version")
+            return info
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"[{self.name}] ⚠ camera info unavailable: {e}")
+            return None
+
     def keep_alive(self):
         """
         Keep-alive to prevent the camera from sleeping
         GET /gopro/camera/keep_alive
+        Returns True on success.
         """
-        url = f"{self.base_url}/gopro/camera/keep_alive"
         try:
-            r = requests.get(url, timeout=3)
+            r = self.http.get("keep_alive", "/gopro/camera/keep_alive")
             r.raise_for_status()
+            return True
         except requests.exceptions.RequestException as e:
             print(f"[{self.name}] ⚠ keep_alive failed: {e}")
+            return False
 
     def get_status(self):
-        """Query GoPro camera status."""
+        """Query the full GoPro camera status JSON. Prefer status_snapshot() for polling."""
         try:
-            print("Getting GoPro status...")
-            url = f"{self.base_url}/gp/gpControl/status"
-            response = requests.get(url, timeout=2)
-            print(f"response: {response.json()}")
+            response = self.http.get("status", "/gp/gpControl/status")
             if response.status_code == 200:
                 return response.json()
             else:
-                print("Failed to get GoPro status")
+                print(f"[{self.name}] Failed to get GoPro status (HTTP {response.status_code})")
                 return None
         except Exception as e:
-            print(f"Error getting GoPro status: {e}")
+            print(f"[{self.name}] Error getting GoPro status: {e}")
             return None
 
-    def is_recording(self):
+    def status_snapshot(self, max_age=None):
+        """
+        Cached, decoded status (see status_cache.StatusSnapshot).
+        max_age: maximum acceptable age in seconds (defaults to STATUS_CACHE_TTL).
+        """
+        return self.status.get(max_age)
+
+    def is_recording(self, max_age=None):
         """
         Returns True if the GoPro Hero11 Mini is actively recording.
         Uses encoding state ('10') as primary key for accuracy.
         """
+        snapshot = self.status_snapshot(max_age)
+        return snapshot is not None and snapshot.encoding
+
+    # ------------ Standby ------------ #
+
+    def set_setting(self, setting, option):
+        """
+        Apply one camera setting.
+        GET /gopro/camera/setting?setting=<id>&option=<value>
+        Raises requests.exceptions.RequestException on failure.
+        """
+        r = self.http.get("settings", "/gopro/camera/setting", params={"setting": setting, "option": option})
+        self.status.invalidate()
+        r.raise_for_status()
+        self.settings.cache.update(self.serial_last3, {str(setting): int(option)}, save=False)
+
+    def readiness_problems(self, snapshot) -> list[str]:
+        """Reasons the camera is not ready for an immediate start (empty list = ready)."""
+        if snapshot is None:
+            return ["status unavailable"]
+        problems = []
+        if snapshot.busy:
+            problems.append("busy")
+        if snapshot.encoding:
+            problems.append("already recording")
+        if snapshot.sd_remaining_kb is not None and snapshot.sd_remaining_kb < ARM_MIN_SD_KB:
+            problems.append(f"SD card nearly full ({snapshot.sd_remaining_kb // 1024} MB left)")
+        if snapshot.battery is not None and snapshot.battery < ARM_MIN_BATTERY:
+            problems.append(f"battery low ({snapshot.battery}%)")
+        return problems
 
-        status = self.get_status()
-        if not status:
+    def arm(self, settings: dict | str = ARM_SETTINGS, timeout=ARM_READY_TIMEOUT,
+            cancel: threading.Event | None = None) -> bool:
+        """
+        Prepare the camera for a fast start: wake it, apply `settings` (preset name
+        or {setting id: option}, only changed values are sent) and wait until it
+        is not busy, not recording and has enough SD space and battery.
+        While armed the scheduler keeps it awake and re-checks readiness.
+        cancel: event that stops the arming early (e.g. set by a fleet shutter)
+        Returns True if the camera is armed.
+        """
+        started = local_clock()
+        self.armed = False
+        try:
+            self.keep_alive()
+            if cancel is not None and cancel.is_set():
+                self.arm_problems = ["interrupted"]
+                return False
+            if settings:
+                self.settings.apply(settings)
+        except (requests.exceptions.RequestException, KeyError) as e:
+            self.arm_problems = [f"settings failed: {e}"]
+            print(f"[{self.name}] ✖ arm failed: {e}")
             return False
-        
-        print(status.get("status", {}).get("10"))
-        
-        if status.get("status", {}).get("10") == 1:
-            return True
 
+        deadline = started + timeout
+        pause = cancel.wait if cancel is not None else time.sleep
+        while True:
+            problems = self.readiness_problems(self.status_snapshot(max_age=0))
+            # Only "busy" (applying settings/preset) clears by itself
+            if not problems or problems != ["busy"] or local_clock() >= deadline:
+                break
+            if pause(ARM_POLL_INTERVAL):   # only cancel.wait() returns True
+                problems = ["interrupted"]
+                break
+
+        self.arm_problems = problems
+        self.armed = not problems
+        if self.armed:
+            self.armed_at = local_clock()
+            print(f"[{self.name}] ✔ armed in {(self.armed_at - started) * 1000:.0f} ms")
+        else:
+            print(f"[{self.name}] ⚠ not ready: {', '.join(problems)}")
+        return self.armed
+
+    def check_armed(self) -> bool:
+        """Re-verify readiness of an armed camera (fresh status). Disarms it if something changed."""
+        if not self.armed:
+            return False
+        problems = self.readiness_problems(self.status_snapshot(max_age=0))
+        if problems:
+            self.armed = False
+            self.arm_problems = problems
+            print(f"[{self.name}] ⚠ no longer armed: {', '.join(problems)}")
+        return self.armed
+
+    def disarm(self):
+        self.armed = False
+
+    @property
+    def shutter_active(self) -> bool:
+        """True while a shutter command or its confirmation is in progress."""
+        return self._shutters_in_flight > 0
+
+    @contextmanager
+    def shutter_in_progress(self):
+        """Marks the camera busy with a shutter command (background jobs back off meanwhile)."""
+        with self._shutter_lock:
+            self._shutters_in_flight += 1
+        try:
+            yield
+        finally:
+            with self._shutter_lock:
+                self._shutters_in_flight -= 1
+
+    def send_shutter(self, mode: str, timing: ShutterTiming | None = None):
+        """
+        Send the shutter command only, without waiting for confirmation.
+        GET /gopro/camera/shutter/start or /stop
+        timing: optional ShutterTiming to receive the request send/receive stamps
+        Raises requests.exceptions.RequestException on failure.
+        """
+        assert mode in ("start", "stop")
+        if timing is not None and mode == "start":
+            timing.armed = self.armed
+
+        def stamp_send():
+            if timing is not None:
+                timing.sent_at = local_clock()
+
+        # Stamped when the command leaves the queue, so queue wait is not counted as camera latency
+        r = self.http.get("shutter", f"/gopro/camera/shutter/{mode}", on_send=stamp_send)
+        if timing is not None:
+            timing.acked_at = local_clock()
+        self.status.invalidate()
+        r.raise_for_status()
+        if mode == "start":
+            self.armed = False   # re-arm after the recording to get another fast start
+        print(f"[{self.name}] ✔ shutter {mode}")
+
+    def wait_for_recording(self, recording: bool, timeout=DEFAULT_TIMEOUT, poll_interval=None,
+                           timing: ShutterTiming | None = None):
+        """
+        Poll the encoding state until it equals `recording` or `timeout` expires.
+        poll_interval: fixed seconds between polls, or None for the adaptive schedule
+        timing: optional ShutterTiming that records the transition window from each poll
+        Returns True if the expected state was observed.
+        """
+        mode = "start" if recording else "stop"
+        key = model_key(self.serial_last3, self.firmware, mode)
+        schedule = self.poller.schedule(key) if poll_interval is None else None
+        origin = timing.sent_at if timing is not None and timing.sent_at is not None else local_clock()
+        deadline = origin + timeout
+        delay = poll_interval or 0.0
+
+        while local_clock() < deadline:
+            # Half the poll interval keeps polls fresh while sharing fetches with monitors
+            snapshot = self.status_snapshot(max_age=delay / 2)
+            if timing is not None:
+                timing.observe(snapshot, recording)
+            if snapshot is not None and snapshot.encoding is recording:
+                if timing is not None:
+                    timing.confirmed = True
+                    self.poller.learn(key, timing)
+                logger.log(f"[{self.name}] GoPro recording {mode} confirmed.")
+                return True
+            if schedule is not None:
+                delay = schedule.next_delay(local_clock() - origin)
+            time.sleep(delay)
+
+        print(f"[{self.name}] Timeout: GoPro did not {mode} recording.")
         return False
 
-    def shutter(self, mode: str, timeout=DEFAULT_TIMEOUT, poll_interval=DEFAULT_POLL_INTERVAL):
+    def shutter(self, mode: str, timeout=DEFAULT_TIMEOUT, poll_interval=None,
+                timing: ShutterTiming | None = None):
         """
-        Start/stop recording
+        Start/stop recording and wait for the encoder state to follow.
         GET /gopro/camera/shutter/start or /stop
         mode: "start" or "stop"
+        poll_interval: fixed confirmation poll interval, or None for adaptive polling
+        timing: optional ShutterTiming filled with send/ack/confirmation stamps
         """
         assert mode in ("start", "stop")
-        url = f"{self.base_url}/gopro/camera/shutter/{mode}"
+        if timing is None:
+            timing = ShutterTiming(name=self.name, mode=mode)
         try:
-            r = requests.get(url, timeout=3)
-            r.raise_for_status()
-            print(f"[{self.name}] ✔ shutter {mode}")
-
-            # Wait for encoder state to turn OFF
-            deadline = time.time() + timeout
-
-            while time.time() < deadline:
-                if mode == "stop" and self.is_recording() is False:
-                    # print("GoPro recording start confirmed.")
-                    logger.log("GoPro recording stop confirmed.")
-                    return True
-                
-                elif mode == "start" and self.is_recording() is True:
-                    # log("GoPro recording stop confirmed.")
-                    logger.log("GoPro recording stop confirmed.")
-                    return True
-                time.sleep(poll_interval)
-
-            print("Timeout: GoPro did not stop recording.")
-            # logger.log("Timeout: GoPro did not stop recording.")
-            return False
+            with self.shutter_in_progress():
+                self.send_shutter(mode, timing=timing)
+                return self.wait_for_recording(mode == "start", timeout=timeout, poll_interval=poll_interval,
+                                               timing=timing)
 
         except requests.exceptions.RequestException as e:
+            if timing is not None:
+                timing.error = str(e)
             print(f"[{self.name}] ✖ shutter {mode} failed: {e}")
 
+    # ------------ HiLight tags ------------ #
+
+    def hilight(self, timing=None):
+        """
+        Tag the current moment of the recording as a HiLight.
+        GET /gopro/media/hilight/moment
+        timing: optional HilightTiming to receive the request send/receive stamps
+        Raises requests.exceptions.RequestException on failure.
+        """
+        def stamp_send():
+            if timing is not None:
+                timing.sent_at = local_clock()
+
+        r = self.http.get("hilight", "/gopro/media/hilight/moment", on_send=stamp_send)
+        if timing is not None:
+            timing.acked_at = local_clock()
+        r.raise_for_status()
+
     def start_recording(self):
         return self.shutter("start")
 
     def stop_recording(self):
         return self.shutter("stop")
+
+    def command_stats(self) -> dict:
+        """Command queue depth and per-endpoint wait/run times."""
+        return self.http.queue.stats()
+
+    def link_stats(self) -> dict:
+        """Active link, failovers and per-link health/RTT."""
+        return self.http.stats()
+
+    def close(self):
+        """Stop the command queue and release this camera's pooled HTTP sessions."""
+        self.http.close()
@@ -0,0 +1,372 @@
+"""
+GPMF telemetry extraction from GoPro MP4 files.
+
+The HERO11 writes its IMU (ACCL, GYRO, GRAV, CORI, ...) as GPMF payloads in
+a timed-metadata track ("gpmd") of every MP4. GPMFReader:
+  - memory-maps the file and walks the MP4 box tree by header sizes only, so
+    the multi-GB `mdat` is never read; sample data is decoded straight out of
+    the mapping with numpy.frombuffer (no copies of the raw file)
+  - turns the metadata track's sample tables (stts/stsz/stsc/stco) into
+    per-payload file offsets and media times with vectorized numpy
+  - decodes payloads one at a time (iter_payloads / iter_stream), so memory
+    use stays flat however long the recording is
+  - scales raw values by SCAL and spreads each payload's samples evenly over
+    its media duration
+
+Media time 0 is the first encoded frame; link_to_session() maps it to LSL
+time using the START transition estimate that recorder.py exports per
+session (sessions/<id>_shutter.json).
+"""
+
+import json
+import mmap
+import os
+import struct
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from src.gopro_lsl.config import LATENCY_EXPORT_DIR
+
+# GPMF type char -> (numpy big-endian dtype, size in bytes)
+GPMF_TYPES = {
+    b"b": (">i1", 1), b"B": (">u1", 1),
+    b"s": (">i2", 2), b"S": (">u2", 2),
+    b"l": (">i4", 4), b"L": (">u4", 4),
+    b"j": (">i8", 8), b"J": (">u8", 8),
+    b"f": (">f4", 4), b"d": (">f8", 8),
+    b"q": (">i4", 4),   # Q15.16 fixed point
+    b"Q": (">i8", 8),   # Q31.32 fixed point
+}
+FIXED_POINT = {b"q": 1 / 65536.0, b"Q": 1 / 4294967296.0}
+STRING_TYPES = {b"c", b"U", b"F"}
+NESTED = b"\x00"
+
+# Keys inside a STRM that describe the data rather than being the data
+STREAM_META_KEYS = {b"STNM", b"SCAL", b"SIUN", b"UNIT", b"TSMP", b"STMP", b"TICK", b"TOCK",
+                    b"ORIN", b"ORIO", b"MTRX", b"TMPC", b"TYPE", b"EMPT", b"RMRK", b"TIMO"}
+
+
+class GPMFError(Exception):
+    pass
+
+
+# ------------ MP4 box walk ------------ #
+
+def iter_boxes(buf, start: int = 0, end: int | None = None):
+    """Yields (type, payload_start, box_end) for each box in buf[start:end] without copying."""
+    end = len(buf) if end is None else end
+    pos = start
+    while pos + 8 <= end:
+        size, kind = struct.unpack_from(">I4s", buf, pos)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from(">Q", buf, pos + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header or pos + size > end:
+            raise GPMFError(f"corrupt MP4 box {kind!r} at offset {pos}")
+        yield kind, pos + header, pos + size
+        pos += size
+
+
+def find_box(buf, path: list[bytes], start: int = 0, end: int | None = None):
+    """(payload_start, box_end) of the first box at `path` (e.g. [b"moov", b"mvhd"]), or None."""
+    for kind, payload, box_end in iter_boxes(buf, start, end):
+        if kind == path[0]:
+            if len(path) == 1:
+                return payload, box_end
+            found = find_box(buf, path[1:], payload, box_end)
+            if found:
+                return found
+    return None
+
+
+@dataclass
+class SampleTable:
+    """File offsets, sizes and media times (seconds) of every sample in one track."""
+    offsets: np.ndarray
+    sizes: np.ndarray
+    times: np.ndarray
+    durations: np.ndarray
+    timescale: int
+
+    def __len__(self):
+        return len(self.offsets)
+
+
+def _full_box_table(buf, payload: int, fmt: str, columns: int):
+    """Entries of a full box laid out as version/flags, uint32 count, count x columns values."""
+    count = struct.unpack_from(">I", buf, payload + 4)[0]
+    return np.frombuffer(buf, dtype=fmt, count=count * columns, offset=payload + 8).reshape(count, columns)
+
+
+def read_sample_table(buf, trak: tuple[int, int]) -> SampleTable:
+    mdia = find_box(buf, [b"mdia"], *trak)
+    mdhd = find_box(buf, [b"mdhd"], *mdia)
+    version = buf[mdhd[0]]
+    timescale = struct.unpack_from(">I", buf, mdhd[0] + (20 if version == 1 else 12))[0]
+    stbl = find_box(buf, [b"minf", b"stbl"], *mdia)
+
+    stsz = find_box(buf, [b"stsz"], *stbl)
+    fixed_size, count = struct.unpack_from(">II", buf, stsz[0] + 4)
+    if fixed_size:
+        sizes = np.full(count, fixed_size, dtype=np.int64)
+    else:
+        sizes = np.frombuffer(buf, dtype=">u4", count=count, offset=stsz[0] + 12).astype(np.int64)
+
+    stco = find_box(buf, [b"stco"], *stbl)
+    if stco is not None:
+        chunk_offsets = _full_box_table(buf, stco[0], ">u4", 1)[:, 0].astype(np.int64)
+    else:
+        co64 = find_box(buf, [b"co64"], *stbl)
+        chunk_offsets = _full_box_table(buf, co64[0], ">u8", 1)[:, 0].astype(np.int64)
+
+    # stsc: (first_chunk (1-based), samples_per_chunk, description index) runs
+    stsc = _full_box_table(buf, find_box(buf, [b"stsc"], *stbl)[0], ">u4", 3).astype(np.int64)
+    run_starts = stsc[:, 0] - 1
+    run_lengths = np.diff(np.append(run_starts, len(chunk_offsets)))
+    per_chunk = np.repeat(stsc[:, 1], run_lengths)[:len(chunk_offsets)]
+    chunk_of_sample = np.repeat(np.arange(len(chunk_offsets)), per_chunk)[:count]
+    cumulative = np.concatenate(([0], np.cumsum(sizes)))
+    first_in_chunk = np.concatenate(([0], np.cumsum(per_chunk)))[:-1]
+    offsets = chunk_offsets[chunk_of_sample] + cumulative[:count] - cumulative[first_in_chunk[chunk_of_sample]]
+
+    # stts: (sample_count, sample_delta) runs
+    stts = _full_box_table(buf, find_box(buf, [b"stts"], *stbl)[0], ">u4", 2).astype(np.int64)
+    durations = np.repeat(stts[:, 1], stts[:, 0])[:count]
+    starts = np.concatenate(([0], np.cumsum(durations)))[:-1]
+    return SampleTable(offsets=offsets, sizes=sizes, times=starts / timescale,
+                       durations=durations / timescale, timescale=timescale)
+
+
+def _is_gpmd_track(buf, trak: tuple[int, int]) -> bool:
+    stsd = find_box(buf, [b"mdia", b"minf", b"stbl", b"stsd"], *trak)
+    # stsd: version/flags, entry count, then the first entry's size and format
+    return stsd is not None and bytes(buf[stsd[0] + 12:stsd[0] + 16]) == b"gpmd"
+
+
+# ------------ GPMF KLV decoding ------------ #
+
+def iter_klv(buf, start: int, end: int):
+    """Yields (key, type, struct_size, repeat, data_start) for the KLV items in buf[start:end]."""
+    pos = start
+    while pos + 8 <= end:
+        key, kind, struct_size, repeat = struct.unpack_from(">4scBH", buf, pos)
+        if key == b"\x00\x00\x00\x00":
+            break
+        data = pos + 8
+        length = struct_size * repeat
+        yield key, kind, struct_size, repeat, data
+        pos = data + ((length + 3) & ~3)
+
+
+def decode_value(buf, kind: bytes, struct_size: int, repeat: int, offset: int):
+    """
+    Decode one KLV value. Numeric types return a (repeat, elements) float64 array
+    (a zero-copy view is taken before the conversion); strings return str.
+    """
+    if kind in STRING_TYPES:
+        return bytes(buf[offset:offset + struct_size * repeat]).rstrip(b"\x00").decode("latin-1")
+    if kind not in GPMF_TYPES:
+        return None   # complex/structured types are not decoded
+    dtype, size = GPMF_TYPES[kind]
+    elements = struct_size // size
+    raw = np.frombuffer(buf, dtype=dtype, count=elements * repeat, offset=offset)
+    values = raw.astype(np.float64).reshape(repeat, elements)
+    if kind in FIXED_POINT:
+        values *= FIXED_POINT[kind]
+    return values
+
+
+@dataclass
+class StreamChunk:
+    """Samples of one sensor stream from one GPMF payload."""
+    key: str
+    values: np.ndarray        # (samples, axes), already divided by SCAL
+    name: str | None = None
+    units: str | None = None
+    stmp: int | None = None   # payload timestamp in microseconds, if present
+
+
+def parse_payload(buf, start: int, end: int) -> dict[str, StreamChunk]:
+    """Decode every sensor stream in one GPMF payload (DEVC -> STRM -> data)."""
+    streams = {}
+    for key, kind, size, repeat, data in iter_klv(buf, start, end):
+        if key != b"DEVC" or kind != NESTED:
+            continue
+        for skey, skind, ssize, srepeat, sdata in iter_klv(buf, data, data + size * repeat):
+            if skey != b"STRM" or skind != NESTED:
+                continue
+            strm_end = sdata + ssize * srepeat
+            meta = {}
+            for item in iter_klv(buf, sdata, strm_end):
+                ikey, ikind, isize, irepeat, idata = item
+                if ikey in STREAM_META_KEYS:
+                    meta[ikey] = decode_value(buf, ikind, isize, irepeat, idata)
+                    continue
+                values = decode_value(buf, ikind, isize, irepeat, idata)
+                if not isinstance(values, np.ndarray):
+                    continue
+                scale = meta.get(b"SCAL")
+                if isinstance(scale, np.ndarray):
+                    scale = scale.reshape(-1)
+                    if scale.size in (1, values.shape[1]):
+                        values = values / scale
+                stmp = meta.get(b"STMP")
+                streams[ikey.decode("latin-1")] = StreamChunk(
+                    key=ikey.decode("latin-1"),
+                    values=values,
+                    name=meta.get(b"STNM"),
+                    units=meta.get(b"SIUN") or meta.get(b"UNIT"),
+                    stmp=int(stmp[0, 0]) if isinstance(stmp, np.ndarray) else None,
+                )
+    return streams
+
+
+# ------------ Reader ------------ #
+
+@dataclass
+class GPMFPayload:
+    index: int
+    time: float        # media time of the payload start (seconds)
+    duration: float    # seconds covered by the payload
+    streams: dict[str, StreamChunk]
+
+
+@dataclass
+class SensorData:
+    """One sensor stream over the whole file (or a time range of it)."""
+    key: str
+    times: np.ndarray                 # media time of each sample (seconds since the first frame)
+    values: np.ndarray                # (samples, axes)
+    name: str | None = None
+    units: str | None = None
+    lsl_times: np.ndarray | None = None   # set by link_to_session()
+    lsl_uncertainty: float | None = None  # half-width of the START transition window (seconds)
+    meta: dict = field(default_factory=dict)
+
+    @property
+    def rate(self) -> float | None:
+        if len(self.times) < 2:
+            return None
+        return (len(self.times) - 1) / (self.times[-1] - self.times[0])
+
+
+class GPMFReader:
+    """Memory-mapped GPMF reader for one GoPro MP4 file. Use as a context manager."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.table = self._find_track()
+
+    def _find_track(self) -> SampleTable:
+        moov = find_box(self._mm, [b"moov"])
+        if moov is None:
+            raise GPMFError(f"{self.path}: no moov box (incomplete recording?)")
+        for kind, payload, end in iter_boxes(self._mm, *moov):
+            if kind == b"trak" and _is_gpmd_track(self._mm, (payload, end)):
+                return read_sample_table(self._mm, (payload, end))
+        raise GPMFError(f"{self.path}: no GPMF (gpmd) metadata track")
+
+    def __len__(self):
+        return len(self.table)
+
+    @property
+    def duration(self) -> float:
+        return float(self.table.times[-1] + self.table.durations[-1]) if len(self.table) else 0.0
+
+    def iter_payloads(self, start: float = 0.0, end: float | None = None):
+        """Yield GPMFPayload objects in order, optionally limited to a media time range."""
+        table = self.table
+        for i in range(len(table)):
+            t = float(table.times[i])
+            if t + table.durations[i] < start:
+                continue
+            if end is not None and t > end:
+                break
+            offset = int(table.offsets[i])
+            streams = parse_payload(self._mm, offset, offset + int(table.sizes[i]))
+            yield GPMFPayload(index=i, time=t, duration=float(table.durations[i]), streams=streams)
+
+    def iter_stream(self, key: str, payloads_per_chunk: int = 60, start: float = 0.0, end: float | None = None):
+        """
+        Yield SensorData chunks of one stream (e.g. "GYRO"), `payloads_per_chunk`
+        payloads (about one minute) at a time.
+        """
+        times, values, info = [], [], None
+        for payload in self.iter_payloads(start, end):
+            chunk = payload.streams.get(key)
+            if chunk is None or not len(chunk.values):
+                continue
+            n = len(chunk.values)
+            times.append(payload.time + payload.duration * np.arange(n) / n)
+            values.append(chunk.values)
+            info = chunk
+            if len(times) >= payloads_per_chunk:
+                yield SensorData(key=key, times=np.concatenate(times), values=np.concatenate(values),
+                                 name=info.name, units=info.units)
+                times, values = [], []
+        if times:
+            yield SensorData(key=key, times=np.concatenate(times), values=np.concatenate(values),
+                             name=info.name, units=info.units)
+
+    def read_stream(self, key: str, start: float = 0.0, end: float | None = None) -> SensorData:
+        """The whole stream (or a time range of it) as one SensorData."""
+        chunks = list(self.iter_stream(key, start=start, end=end))
+        if not chunks:
+            raise GPMFError(f"{self.path}: no {key} samples")
+        return SensorData(key=key, times=np.concatenate([c.times for c in chunks]),
+                          values=np.concatenate([c.values for c in chunks]),
+                          name=chunks[0].name, units=chunks[0].units)
+
+    def stream_keys(self) -> list[str]:
+        """Sensor streams present in the first payload."""
+        for payload in self.iter_payloads():
+            return sorted(payload.streams)
+        return []
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+# ------------ Session markers ------------ #
+
+def session_start(session_id: str, camera: str, recording: int = 0,
+                  directory: str = LATENCY_EXPORT_DIR) -> tuple[float, float]:
+    """
+    (estimate, uncertainty) in LSL time of the encoder start of `camera`'s
+    `recording`-th start in a session, from <directory>/<session_id>_shutter.json.
+    """
+    path = os.path.join(directory, f"{session_id}_shutter.json")
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    starts = [t for t in data.get("timings", [])
+              if t.get("name") == camera and t.get("mode") == "start" and t.get("estimate") is not None]
+    if recording >= len(starts):
+        raise GPMFError(f"{path}: no confirmed start #{recording} for camera {camera!r}")
+    return starts[recording]["estimate"], starts[recording]["uncertainty"]
+
+
+def link_to_session(data: SensorData, session_id: str, camera: str, recording: int = 0,
+                    media_offset: float = 0.0, directory: str = LATENCY_EXPORT_DIR) -> SensorData:
+    """
+    Set data.lsl_times so GPMF samples share the time base of the session's LSL markers.
+    media_offset: media time of this file's first frame within the recording
+                  (non-zero for the 2nd, 3rd ... chapter of a split recording)
+    """
+    estimate, uncertainty = session_start(session_id, camera, recording, directory)
+    data.lsl_times = estimate + media_offset + data.times
+    data.lsl_uncertainty = uncertainty
+    data.meta.update(session_id=session_id, camera=camera, recording=recording, media_offset=media_offset)
+    return data
@@ -0,0 +1,132 @@
+"""
+HiLight tags in lockstep with LSL markers.
+
+An LSL marker has no counterpart inside the video. When a marker listed in
+config.HILIGHT_MARKERS is sent, HilightTagger asks every camera to tag a
+HiLight moment (GET /gopro/media/hilight/moment). The request goes through
+the camera's command queue on a separate worker, so the marker is never held
+up, and its send/receive stamps are recorded:
+
+  sent_at   -> request leaves the command queue
+  acked_at  -> camera answers
+
+The tag lies inside [sent_at, acked_at]; the midpoint is its LSL time and the
+half-width its uncertainty. The HiLight times the camera stores in the MP4
+(HMMT box) can then be matched to markers by order instead of searched for.
+"""
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+
+import requests
+from pylsl import local_clock
+
+from src.gopro_lsl.config import HILIGHT_MARKERS, LATENCY_EXPORT_DIR
+from src.gopro_lsl.shutter_timing import summarize
+
+
+@dataclass
+class HilightTiming:
+    """One HiLight request on one camera. All times are local_clock() seconds."""
+    camera: str
+    label: str
+    marker_time: float              # timestamp of the LSL marker that triggered the tag
+    sent_at: float | None = None
+    acked_at: float | None = None
+    ok: bool = False
+    error: str | None = None
+
+    @property
+    def estimate(self) -> float | None:
+        """LSL time of the tag: midpoint of the request round trip."""
+        if not self.ok or self.sent_at is None or self.acked_at is None:
+            return None
+        return (self.sent_at + self.acked_at) / 2
+
+    @property
+    def uncertainty(self) -> float | None:
+        if self.estimate is None:
+            return None
+        return (self.acked_at - self.sent_at) / 2
+
+    @property
+    def marker_offset(self) -> float | None:
+        """Seconds from the marker to the tag (the tag is always later)."""
+        return None if self.estimate is None else self.estimate - self.marker_time
+
+    def to_dict(self) -> dict:
+        row = asdict(self)
+        row.update(estimate=self.estimate, uncertainty=self.uncertainty, marker_offset=self.marker_offset)
+        return row
+
+
+class HilightTagger:
+    def __init__(self, cameras, labels=HILIGHT_MARKERS):
+        """
+        cameras: GoProCamera instances to tag
+        labels: marker labels that trigger a tag
+        """
+        self.cameras = list(cameras)
+        self.labels = frozenset(labels)
+        self.timings = []
+        self._lock = threading.Lock()
+        # Separate from the fleet's workers so a slow tag never delays a shutter
+        self._executor = ThreadPoolExecutor(max_workers=len(self.cameras), thread_name_prefix="gopro-hilight")
+
+    def on_marker(self, marker: str, timestamp: float):
+        """MarkerSender listener: tag every camera if `marker` is one of the labels."""
+        if marker not in self.labels:
+            return
+        for camera in self.cameras:
+            self._executor.submit(self._tag, camera, marker, timestamp)
+
+    def _tag(self, camera, label: str, marker_time: float) -> HilightTiming:
+        timing = HilightTiming(camera=camera.name, label=label, marker_time=marker_time)
+        try:
+            camera.hilight(timing)
+            timing.ok = True
+            print(f"[{camera.name}] ✔ HiLight {label} ({(timing.acked_at - timing.sent_at) * 1000:.1f} ms round trip)")
+        except requests.exceptions.RequestException as e:
+            timing.error = str(e)
+            print(f"[{camera.name}] ⚠ HiLight {label} failed: {e}")
+        with self._lock:
+            self.timings.append(timing)
+        return timing
+
+    def summary(self, timings: list[HilightTiming] | None = None) -> dict:
+        if timings is None:
+            with self._lock:
+                timings = list(self.timings)
+        return {
+            "tags": sum(t.ok for t in timings),
+            "failed": sum(not t.ok for t in timings),
+            "uncertainty": summarize([t.uncertainty for t in timings if t.uncertainty is not None]),
+            "marker_offset": summarize([t.marker_offset for t in timings if t.marker_offset is not None]),
+        }
+
+    def export(self, session_id: str, directory: str = LATENCY_EXPORT_DIR) -> str | None:
+        """
+        Write the tags recorded so far to <directory>/<session_id>_hilight.json and
+        start a new list. Returns the path, or None if there was nothing to write.
+        """
+        with self._lock:
+            timings, self.timings = self.timings, []
+        if not timings:
+            return None
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{session_id}_hilight.json")
+        data = {
+            "session_id": session_id,
+            "exported_at": local_clock(),
+            "summary": self.summary(timings),
+            "timings": [t.to_dict() for t in sorted(timings, key=lambda t: (t.marker_time, t.camera))],
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        return path
+
+    def close(self):
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,198 @@
+"""
+HTTP session pooling for GoPro cameras.
+
+Every GoProCamera talks to its camera through a persistent requests.Session
+with keep-alive, so status polls, keep-alive pings and shutter commands reuse
+a warm TCP socket instead of paying for a new handshake on every call.
+
+A single SessionPool hands out one session per camera base URL, which keeps
+the socket budget predictable on multi-camera rigs. Requests are serialized
+per camera by a CameraCommandQueue (see command_queue.py).
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+from src.gopro_lsl.config import (
+    HTTP_POOL_CONNECTIONS,
+    HTTP_POOL_MAXSIZE,
+    HTTP_ENDPOINT_POLICIES,
+    HTTP_CONNECT_RETRY_ONLY,
+    COMMAND_QUEUE_BYPASS,
+)
+from src.gopro_lsl.command_queue import CameraCommandQueue
+
+
+class EndpointPolicy:
+    """Timeout and retry policy for one GoPro endpoint."""
+
+    __slots__ = ("timeout", "retries", "backoff")
+
+    def __init__(self, timeout: float, retries: int = 0, backoff: float = 0.0):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+
+    def __repr__(self):
+        return f"<EndpointPolicy timeout={self.timeout}, retries={self.retries}, backoff={self.backoff}>"
+
+
+def load_policies(overrides: dict | None = None) -> dict:
+    """Builds the endpoint -> EndpointPolicy table from config (plus optional overrides)."""
+    table = dict(HTTP_ENDPOINT_POLICIES)
+    if overrides:
+        table.update(overrides)
+    return {name: EndpointPolicy(*values) for name, values in table.items()}
+
+
+def never_sent(error: requests.exceptions.ConnectionError) -> bool:
+    """
+    True if `error` happened while opening the TCP connection, i.e. the camera
+    never received the request. Other ConnectionErrors ("Connection aborted",
+    RemoteDisconnected on a stale keep-alive socket) may come after the request
+    was written and must not resend a non-idempotent command.
+    """
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+def may_resend(endpoint: str, error: requests.exceptions.ConnectionError) -> bool:
+    """Whether a request to `endpoint` that failed with `error` can safely be sent again."""
+    return endpoint not in HTTP_CONNECT_RETRY_ONLY or never_sent(error)
+
+
+class SessionPool:
+    """
+    Shared pool manager: one keep-alive session per camera base URL.
+    Safe to share across threads and cameras.
+    """
+
+    def __init__(self, pool_connections: int = HTTP_POOL_CONNECTIONS,
+                 pool_maxsize: int = HTTP_POOL_MAXSIZE):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def _new_session(self) -> requests.Session:
+        session = requests.Session()
+        # Retries are handled per endpoint in GoProHttpClient, so the adapter never retries
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=0,
+        )
+        session.mount("http://", adapter)
+        session.headers.update({"Connection": "keep-alive"})
+        return session
+
+    def session_for(self, base_url: str) -> requests.Session:
+        """Returns the (possibly new) session owned by the camera at `base_url`."""
+        with self._lock:
+            session = self._sessions.get(base_url)
+            if session is None:
+                session = self._new_session()
+                self._sessions[base_url] = session
+            return session
+
+    def release(self, base_url: str):
+        """Closes and forgets the session for `base_url`."""
+        with self._lock:
+            session = self._sessions.pop(base_url, None)
+        if session is not None:
+            session.close()
+
+    def close_all(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+
+
+# Shared pool used by every GoProCamera unless one is passed explicitly
+shared_pool = SessionPool()
+
+
+class GoProHttpClient:
+    """
+    Thin per-camera HTTP client on top of a pooled session.
+    Applies the per-endpoint timeout and retry policy to each GET and sends
+    every request through the camera's command queue.
+    """
+
+    def __init__(self, base_url: str, pool: SessionPool | None = None,
+                 policies: dict | None = None, queue: CameraCommandQueue | None = None):
+        self.base_url = base_url
+        self.pool = pool or shared_pool
+        self.policies = load_policies(policies)
+        self.queue = queue or CameraCommandQueue(base_url)
+
+    @property
+    def session(self) -> requests.Session:
+        return self.pool.session_for(self.base_url)
+
+    def policy(self, endpoint: str) -> EndpointPolicy:
+        return self.policies.get(endpoint) or self.policies["default"]
+
+    def get(self, endpoint: str, path: str, params: dict | None = None,
+            timeout: float | None = None, on_send=None, **kwargs) -> requests.Response:
+        """
+        GET `path` on the camera using the policy registered for `endpoint`.
+        Extra keyword arguments (headers, stream, ...) are passed to requests.
+        on_send: optional callable run right before the request leaves the queue
+        Only connection errors are retried, and for HTTP_CONNECT_RETRY_ONLY endpoints
+        (shutter) only those of the connect phase, so a command is never triggered twice.
+        """
+        send, key = self._request(endpoint, path, params, timeout, on_send, kwargs)
+        if endpoint in COMMAND_QUEUE_BYPASS:
+            return send()
+        return self.queue.call(endpoint, send, key=key)
+
+    def submit(self, endpoint: str, path: str, params: dict | None = None,
+               timeout: float | None = None, on_send=None, **kwargs) -> Future:
+        """
+        Like get(), but queues the request and returns a concurrent Future with the
+        response instead of waiting (asyncio callers wrap it with asyncio.wrap_future).
+        Identical status/keep-alive requests coalesce with those of get() callers.
+        """
+        send, key = self._request(endpoint, path, params, timeout, on_send, kwargs)
+        return self.queue.submit(endpoint, send, key=key)
+
+    def _request(self, endpoint: str, path: str, params: dict | None, timeout: float | None,
+                 on_send, kwargs: dict):
+        """The send callable for one request and its coalescing key (None if it must not coalesce)."""
+        def send():
+            if on_send is not None:
+                on_send()
+            return self._send(endpoint, path, params, timeout, **kwargs)
+
+        key = None
+        if not kwargs and on_send is None:
+            key = (self.base_url, endpoint, path, tuple(sorted((params or {}).items())), timeout)
+        return send, key
+
+    def _send(self, endpoint: str, path: str, params: dict | None, timeout: float | None,
+              **kwargs) -> requests.Response:
+        policy = self.policy(endpoint)
+        url = f"{self.base_url}{path}"
+        attempt = 0
+        while True:
+            try:
+                return self.session.get(url, params=params, timeout=timeout or policy.timeout, **kwargs)
+            except requests.exceptions.ConnectionError as e:
+                if attempt >= policy.retries or not may_resend(endpoint, e):
+                    raise
+                attempt += 1
+                time.sleep(policy.backoff * attempt)
+
+    def close(self):
+        self.queue.close()
+        self.pool.release(self.base_url)
@@ -0,0 +1,275 @@
+"""
+Offline alignment of GoPro IMU data against Rebocap motion capture.
+
+Both sources are reduced to angular speed |w|, which does not depend on how
+the camera is mounted relative to the tracked joint:
+  - GoPro: norm of the GPMF GYRO samples (see gpmf.py)
+  - Rebocap: rotation angle between consecutive joint quaternions / dt
+
+Both are resampled onto one uniform LSL-time grid and normalized, then:
+  1. coarse: a single FFT cross-correlation at ALIGN_COARSE_RATE finds the
+     overall lag within +/- ALIGN_MAX_LAG
+  2. fine: the recording is cut into overlapping windows (ALIGN_WINDOW /
+     ALIGN_HOP) and every window is correlated around the coarse lag at
+     ALIGN_RATE, all windows in one batched FFT, with parabolic sub-sample
+     peak interpolation
+  3. a weighted line through the per-window lags (MAD outlier rejection)
+     gives offset and drift with their standard errors
+
+AlignmentResult.apply() maps GoPro LSL times onto the Rebocap time base.
+"""
+
+from dataclasses import dataclass, asdict, field
+
+import numpy as np
+
+from src.gopro_lsl.config import (
+    ALIGN_RATE,
+    ALIGN_COARSE_RATE,
+    ALIGN_MAX_LAG,
+    ALIGN_WINDOW,
+    ALIGN_HOP,
+    ALIGN_FINE_MARGIN,
+    ALIGN_MIN_CORRELATION,
+    REBOCAP_JOINT,
+)
+from src.motion_capture.config import STRAM_NAME as REBOCAP_STREAM_NAME
+
+
+# ------------ Angular speed ------------ #
+
+def gopro_angular_speed(data) -> tuple[np.ndarray, np.ndarray]:
+    """(times, |w| rad/s) from a gpmf.SensorData GYRO stream (LSL times if linked, else media times)."""
+    times = data.lsl_times if data.lsl_times is not None else data.times
+    return times, np.linalg.norm(data.values, axis=1)
+
+
+def gopro_angular_speed_chunks(reader, session_offset: float = 0.0) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Same as gopro_angular_speed() but reads a gpmf.GPMFReader chunk by chunk,
+    keeping only the speed (one float per sample) in memory.
+    session_offset: added to media times (e.g. the START estimate of the session)
+    """
+    times, speeds = [], []
+    for chunk in reader.iter_stream("GYRO"):
+        times.append(chunk.times + session_offset)
+        speeds.append(np.linalg.norm(chunk.values, axis=1))
+    return np.concatenate(times), np.concatenate(speeds)
+
+
+def quaternion_angular_speed(times: np.ndarray, quats: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (midpoint times, |w| rad/s) from unit quaternions (N, 4) as w, x, y, z.
+    The relative rotation angle between consecutive samples is 2*acos(|q_k . q_k+1|).
+    """
+    quats = quats / np.linalg.norm(quats, axis=1, keepdims=True)
+    dots = np.abs(np.einsum("ij,ij->i", quats[:-1], quats[1:]))
+    angles = 2.0 * np.arccos(np.clip(dots, 0.0, 1.0))
+    dt = np.diff(times)
+    valid = dt > 0
+    return ((times[:-1] + times[1:]) / 2)[valid], angles[valid] / dt[valid]
+
+
+def rebocap_angular_speed(times: np.ndarray, samples: np.ndarray,
+                          joint: int = REBOCAP_JOINT) -> tuple[np.ndarray, np.ndarray]:
+    """Angular speed of one joint from the 96-channel Rebocap stream (24 joints x w, x, y, z)."""
+    return quaternion_angular_speed(times, samples[:, joint * 4:joint * 4 + 4])
+
+
+def load_rebocap_xdf(path: str, stream_name: str = REBOCAP_STREAM_NAME) -> tuple[np.ndarray, np.ndarray]:
+    """(timestamps, samples) of the Rebocap stream in an XDF recording. Needs pyxdf."""
+    try:
+        import pyxdf
+    except ImportError as e:
+        raise ImportError("Reading XDF files needs pyxdf (pip install pyxdf)") from e
+    streams, _ = pyxdf.load_xdf(path)
+    for stream in streams:
+        if stream["info"]["name"][0] == stream_name:
+            return np.asarray(stream["time_stamps"]), np.asarray(stream["time_series"], dtype=np.float64)
+    raise ValueError(f"{path}: no stream named {stream_name!r}")
+
+
+# ------------ Signal preparation ------------ #
+
+def resample(times: np.ndarray, values: np.ndarray, grid: np.ndarray) -> np.ndarray:
+    """Linear interpolation onto `grid`; zero outside the recorded span."""
+    return np.interp(grid, times, values, left=0.0, right=0.0)
+
+
+def normalize(x: np.ndarray) -> np.ndarray:
+    std = x.std()
+    return (x - x.mean()) / std if std > 0 else x - x.mean()
+
+
+def xcorr(a: np.ndarray, b: np.ndarray, max_lag: int) -> np.ndarray:
+    """
+    Normalized cross-correlation c[k] = sum_n a[n] b[n + k] / (|a| |b|)
+    for k = -max_lag .. max_lag (index k + max_lag), via one real FFT.
+    """
+    n = len(a) + len(b)
+    size = 1 << (n - 1).bit_length()
+    spectrum = np.conj(np.fft.rfft(a, size)) * np.fft.rfft(b, size)
+    full = np.fft.irfft(spectrum, size)
+    corr = np.concatenate((full[-max_lag:], full[:max_lag + 1])) if max_lag else full[:1]
+    scale = np.sqrt(np.dot(a, a) * np.dot(b, b))
+    return corr / scale if scale > 0 else corr
+
+
+def parabolic_peak(corr: np.ndarray, index: int) -> float:
+    """Sub-sample position of the peak at `index` from a parabola through its neighbours."""
+    if index <= 0 or index >= len(corr) - 1:
+        return float(index)
+    left, mid, right = corr[index - 1], corr[index], corr[index + 1]
+    denom = left - 2 * mid + right
+    return index + (0.5 * (left - right) / denom if denom != 0 else 0.0)
+
+
+def window_lags(ref: np.ndarray, sig: np.ndarray, starts: np.ndarray, width: int,
+                center: int, margin: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Lag (samples, sub-sample) and peak correlation of sig against ref for every
+    window ref[s:s+width], searching center +/- margin. All windows are
+    correlated together in one batched FFT.
+    """
+    span = width + 2 * margin
+    padded = np.pad(sig, (margin + max(0, -center), margin + max(0, center)))
+    base = margin + max(0, -center) + center - margin   # index in `padded` of sig[s + center - margin]
+    idx = starts[:, None] + np.arange(width)[None, :]
+    ref_win = ref[idx]
+    sig_win = padded[(starts + base)[:, None] + np.arange(span)[None, :]]
+    ref_win = ref_win - ref_win.mean(axis=1, keepdims=True)
+    sig_win = sig_win - sig_win.mean(axis=1, keepdims=True)
+
+    size = 1 << (width + span - 1).bit_length()
+    full = np.fft.irfft(np.conj(np.fft.rfft(ref_win, size, axis=1)) * np.fft.rfft(sig_win, size, axis=1),
+                        size, axis=1)[:, :2 * margin + 1]
+    # Normalize each lag by the energy of the sig samples it overlapped
+    csum = np.concatenate((np.zeros((len(starts), 1)), np.cumsum(sig_win ** 2, axis=1)), axis=1)
+    sig_energy = csum[:, width:width + 2 * margin + 1] - csum[:, :2 * margin + 1]
+    ref_energy = np.sum(ref_win ** 2, axis=1, keepdims=True)
+    corr = full / np.sqrt(np.maximum(ref_energy * sig_energy, 1e-12))
+
+    peaks = np.argmax(corr, axis=1)
+    lags = np.array([parabolic_peak(row, p) for row, p in zip(corr, peaks)]) - margin + center
+    return lags, corr[np.arange(len(starts)), peaks]
+
+
+# ------------ Alignment ------------ #
+
+@dataclass
+class AlignmentResult:
+    """
+    GoPro time t maps to Rebocap time  t + offset + drift * (t - reference).
+    Times in seconds; drift in s/s (1e-6 = 1 ppm).
+    """
+    offset: float
+    drift: float
+    reference: float
+    offset_error: float | None = None
+    drift_error: float | None = None
+    correlation: float | None = None          # coarse (whole-recording) correlation peak
+    window_correlation: float | None = None   # median peak correlation of accepted windows
+    windows: int = 0
+    rejected: int = 0
+    window_lags: list = field(default_factory=list)   # [center time, lag, correlation, accepted]
+
+    @property
+    def confidence(self) -> float:
+        """0..1: median window correlation scaled by the fraction of windows that agreed."""
+        if not self.windows or self.window_correlation is None:
+            return 0.0
+        return float(self.window_correlation * (self.windows - self.rejected) / self.windows)
+
+    def apply(self, times: np.ndarray) -> np.ndarray:
+        return times + self.offset + self.drift * (times - self.reference)
+
+    def to_dict(self) -> dict:
+        row = asdict(self)
+        row["confidence"] = self.confidence
+        return row
+
+    def summary(self) -> str:
+        err = f" ± {self.offset_error * 1000:.2f}" if self.offset_error is not None else ""
+        return (f"offset {self.offset * 1000:.1f}{err} ms, drift {self.drift * 1e6:+.1f} ppm, "
+                f"{self.windows - self.rejected}/{self.windows} windows, confidence {self.confidence:.2f}")
+
+
+def _weighted_line(x: np.ndarray, y: np.ndarray, w: np.ndarray):
+    sw = w.sum()
+    mx, my = (w * x).sum() / sw, (w * y).sum() / sw
+    sxx = (w * (x - mx) ** 2).sum()
+    slope = (w * (x - mx) * (y - my)).sum() / sxx if sxx > 0 else 0.0
+    intercept = my - slope * mx
+    residuals = y - (intercept + slope * x)
+    dof = max(len(x) - 2, 1)
+    sigma2 = (w * residuals ** 2).sum() / sw * len(x) / dof
+    slope_err = np.sqrt(sigma2 / (sxx / sw * len(x))) if sxx > 0 else None
+    intercept_err = np.sqrt(sigma2 / len(x) + (slope_err or 0.0) ** 2 * mx ** 2)
+    return intercept, slope, residuals, intercept_err, slope_err
+
+
+def align(gopro_times: np.ndarray, gopro_speed: np.ndarray,
+          rebocap_times: np.ndarray, rebocap_speed: np.ndarray,
+          rate: float = ALIGN_RATE, coarse_rate: float = ALIGN_COARSE_RATE,
+          max_lag: float = ALIGN_MAX_LAG, window: float = ALIGN_WINDOW, hop: float = ALIGN_HOP,
+          fine_margin: float = ALIGN_FINE_MARGIN,
+          min_correlation: float = ALIGN_MIN_CORRELATION) -> AlignmentResult:
+    """Estimate the offset and drift that map GoPro angular speed onto Rebocap angular speed."""
+    start = max(gopro_times[0], rebocap_times[0]) - max_lag
+    end = min(gopro_times[-1], rebocap_times[-1]) + max_lag
+    if end - start <= 2 * max_lag:
+        raise ValueError("GoPro and Rebocap recordings do not overlap")
+
+    # 1. Coarse lag over the whole recording
+    coarse_grid = np.arange(start, end, 1.0 / coarse_rate)
+    ref = normalize(resample(rebocap_times, rebocap_speed, coarse_grid))
+    sig = normalize(resample(gopro_times, gopro_speed, coarse_grid))
+    coarse_lag = int(round(max_lag * coarse_rate))
+    corr = xcorr(ref, sig, coarse_lag)
+    peak = int(np.argmax(corr))
+    lag = (parabolic_peak(corr, peak) - coarse_lag) / coarse_rate
+
+    # 2. Fine lags per window around the coarse lag
+    grid = np.arange(start, end, 1.0 / rate)
+    ref = normalize(resample(rebocap_times, rebocap_speed, grid))
+    sig = normalize(resample(gopro_times, gopro_speed, grid))
+    width, step = int(window * rate), int(hop * rate)
+    margin = max(int(fine_margin * rate), 2)
+    center = int(round(lag * rate))
+    width = min(width, len(grid))   # short recording: a single window over all of it
+    starts = np.arange(0, len(grid) - width + 1, step)
+    lags, peaks = window_lags(ref, sig, starts, width, center, margin)
+    centers = grid[starts] + width / rate / 2
+    lag_seconds = lags / rate
+
+    # 3. Robust weighted line through the window lags (lag = time shift of the GoPro signal)
+    accepted = peaks >= min_correlation
+    for _ in range(3):
+        if accepted.sum() < 2:
+            break
+        intercept, slope, residuals, _, _ = _weighted_line(centers[accepted], lag_seconds[accepted],
+                                                           peaks[accepted] ** 2)
+        all_res = lag_seconds - (intercept + slope * centers)
+        mad = np.median(np.abs(all_res[accepted] - np.median(all_res[accepted])))
+        keep = accepted & (np.abs(all_res) <= max(3 * 1.4826 * mad, 1.0 / rate))
+        if keep.sum() == accepted.sum():
+            break
+        accepted = keep
+
+    reference = float(centers.mean())
+    result = AlignmentResult(offset=-lag, drift=0.0, reference=reference, correlation=float(corr[peak]),
+                             windows=len(starts), rejected=int((~accepted).sum()))
+    if accepted.sum() >= 2:
+        intercept, slope, _, intercept_err, slope_err = _weighted_line(
+            centers[accepted] - reference, lag_seconds[accepted], peaks[accepted] ** 2)
+        # sig(t + lag) matches ref(t): GoPro time t corresponds to Rebocap time t - lag
+        result.offset, result.drift = -float(intercept), -float(slope)
+        result.offset_error = float(intercept_err)
+        result.drift_error = None if slope_err is None else float(slope_err)
+    elif accepted.sum() == 1:
+        result.offset = -float(lag_seconds[accepted][0])
+    if accepted.any():
+        result.window_correlation = float(np.median(peaks[accepted]))
+    result.window_lags = [[float(c), float(l), float(p), bool(a)]
+                          for c, l, p, a in zip(centers, lag_seconds, peaks, accepted)]
+    return result
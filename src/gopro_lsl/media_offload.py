@@ -0,0 +1,323 @@
+"""
+Media offload from GoPro cameras.
+
+Pulls recorded files off one or many cameras over their control URL:
+  - lists media via GET /gopro/media/list
+  - downloads each file as concurrent HTTP range requests, streamed straight
+    into a preallocated `.part` file (never buffered whole in memory)
+  - resumes interrupted transfers from a `.part.json` ledger of finished chunks;
+    a chunk enters the ledger only once its bytes are fsynced to the `.part`
+  - checks every range reply against the camera: the Content-Range must cover
+    exactly the requested bytes of a file of the listed size, and the finished
+    file must have that size. The camera reports no checksum, so size is the
+    only reference it offers
+  - records a SHA-256 digest of the finished local file in `<file>.sha256`.
+    This is not a transfer check but a record later runs use to skip files
+    already safely on disk: the sidecar gets the file's mtime, so a file whose
+    size and mtime still match it is skipped without re-hashing (verify=True
+    re-hashes every file against its recorded digest)
+  - offloads several cameras in parallel, largest files first, under an
+    optional shared bandwidth budget
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import requests
+
+from src.gopro_lsl.gopro_control import GoProCamera
+from src.gopro_lsl.config import (
+    OFFLOAD_DIR,
+    OFFLOAD_CHUNK_SIZE,
+    OFFLOAD_CONNECTIONS_PER_CAMERA,
+    OFFLOAD_PARALLEL_CAMERAS,
+    OFFLOAD_BANDWIDTH_LIMIT,
+)
+
+STREAM_BLOCK = 256 * 1024  # bytes read from the socket per write
+
+
+@dataclass
+class MediaFile:
+    camera: str
+    folder: str
+    name: str
+    size: int
+    created: int | None = None
+
+    @property
+    def path(self) -> str:
+        return f"/videos/DCIM/{self.folder}/{self.name}"
+
+
+@dataclass
+class OffloadResult:
+    file: MediaFile
+    dest: str
+    ok: bool
+    skipped: bool = False
+    bytes_transferred: int = 0
+    seconds: float = 0.0
+    sha256: str | None = None
+    error: str | None = None
+
+    @property
+    def throughput(self) -> float:
+        """Bytes per second actually transferred (0 for skipped files)."""
+        return self.bytes_transferred / self.seconds if self.seconds > 0 else 0.0
+
+
+class BandwidthLimiter:
+    """Token bucket shared by every download. limit=None disables throttling."""
+
+    def __init__(self, limit: float | None = OFFLOAD_BANDWIDTH_LIMIT):
+        self.limit = limit
+        self._tokens = limit or 0.0
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, n: int):
+        if not self.limit:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.limit, self._tokens + (now - self._last) * self.limit)
+                self._last = now
+                if self._tokens >= n or self._tokens >= self.limit:
+                    self._tokens -= n
+                    return
+                wait = (n - self._tokens) / self.limit
+            time.sleep(min(wait, 0.1))
+
+
+class ChunkLedger:
+    """Finished-chunk bookkeeping for one `.part` file, persisted next to it."""
+
+    def __init__(self, path: str, size: int, chunk_size: int):
+        self.path = path
+        self.size = size
+        self.chunk_size = chunk_size
+        self.done = set()
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        # A ledger for a different size/chunking cannot be trusted
+        if data.get("size") == self.size and data.get("chunk_size") == self.chunk_size:
+            self.done = set(data.get("done", []))
+
+    def mark(self, index: int):
+        """Record chunk `index` as finished. Its bytes must already be fsynced to the `.part` file."""
+        with self._lock:
+            self.done.add(index)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"size": self.size, "chunk_size": self.chunk_size, "done": sorted(self.done)}, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def sha256_of(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class MediaOffloader:
+    def __init__(self, dest_dir: str = OFFLOAD_DIR,
+                 chunk_size: int = OFFLOAD_CHUNK_SIZE,
+                 connections_per_camera: int = OFFLOAD_CONNECTIONS_PER_CAMERA,
+                 parallel_cameras: int = OFFLOAD_PARALLEL_CAMERAS,
+                 limiter: BandwidthLimiter | None = None, verify: bool = False):
+        """
+        verify: re-hash files already offloaded instead of trusting size + mtime
+        """
+        self.dest_dir = dest_dir
+        self.chunk_size = chunk_size
+        self.connections_per_camera = connections_per_camera
+        self.parallel_cameras = parallel_cameras
+        self.limiter = limiter or BandwidthLimiter()
+        self.verify = verify
+
+    # ------------ Listing ------------ #
+
+    def list_media(self, camera: GoProCamera) -> list[MediaFile]:
+        """GET /gopro/media/list and flatten it into MediaFile entries."""
+        r = camera.http.get("media_list", "/gopro/media/list")
+        r.raise_for_status()
+        files = []
+        for folder in r.json().get("media", []):
+            for entry in folder.get("fs", []):
+                files.append(MediaFile(
+                    camera=camera.name,
+                    folder=folder.get("d", ""),
+                    name=entry["n"],
+                    size=int(entry.get("s", 0)),
+                    created=int(entry["cre"]) if entry.get("cre") else None,
+                ))
+        return files
+
+    def destination(self, media: MediaFile) -> str:
+        return os.path.join(self.dest_dir, media.camera, media.folder, media.name)
+
+    # ------------ Single file ------------ #
+
+    @staticmethod
+    def _record_digest(dest: str, sha256: str, name: str):
+        """Write `<dest>.sha256` and give it the mtime of `dest`, which marks the file as unchanged since."""
+        digest_path = dest + ".sha256"
+        with open(digest_path, "w", encoding="utf-8") as f:
+            f.write(f"{sha256}  {name}\n")
+        st = os.stat(dest)
+        os.utime(digest_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+    def _already_offloaded(self, dest: str, media: MediaFile) -> str | None:
+        """
+        Returns the recorded digest if `dest` is complete and unchanged: same size as
+        on the camera and same mtime as its digest sidecar. Only hashes the file
+        with verify=True or when the mtimes disagree (e.g. sidecars of older runs).
+        """
+        digest_path = dest + ".sha256"
+        try:
+            st = os.stat(dest)
+            digest_mtime = os.stat(digest_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        if st.st_size != media.size:
+            return None
+        with open(digest_path, encoding="utf-8") as f:
+            expected = f.read().split()[0]
+        if not self.verify and digest_mtime == st.st_mtime_ns:
+            return expected
+        if sha256_of(dest) != expected:
+            return None
+        self._record_digest(dest, expected, media.name)
+        return expected
+
+    @staticmethod
+    def _check_range(r: requests.Response, media: MediaFile, start: int, end: int):
+        """Raise IOError unless the reply covers bytes [start, end] of a file of media.size bytes."""
+        if r.status_code != 206:
+            return   # whole-file reply, accepted by the caller only when the whole file was asked for
+        content_range = r.headers.get("Content-Range", "")
+        expected = f"bytes {start}-{end}/{media.size}"
+        if content_range != expected:
+            raise IOError(f"{media.name}: camera sent {content_range or 'no Content-Range'}, expected {expected} "
+                          f"(file changed on the camera?)")
+
+    def _fetch_chunk(self, camera: GoProCamera, media: MediaFile, part: str, start: int, end: int) -> int:
+        """Stream bytes [start, end] into `part` at offset `start`. Returns bytes written."""
+        headers = {"Range": f"bytes={start}-{end}"}
+        written = 0
+        with camera.http.get("media", media.path, headers=headers, stream=True) as r:
+            r.raise_for_status()
+            if r.status_code != 206 and (start != 0 or end != media.size - 1):
+                raise IOError(f"camera ignored range request for {media.name} (HTTP {r.status_code})")
+            self._check_range(r, media, start, end)
+            with open(part, "r+b") as f:
+                f.seek(start)
+                for block in r.iter_content(STREAM_BLOCK):
+                    self.limiter.consume(len(block))
+                    f.write(block)
+                    written += len(block)
+                # On disk before the ledger lists the chunk, or a crash could resume past lost bytes
+                f.flush()
+                os.fsync(f.fileno())
+        if written != end - start + 1:
+            raise IOError(f"short read for {media.name} bytes {start}-{end}: got {written}")
+        return written
+
+    def download(self, camera: GoProCamera, media: MediaFile) -> OffloadResult:
+        """Download (or resume) one file with concurrent range requests, then record its digest."""
+        dest = self.destination(media)
+        result = OffloadResult(file=media, dest=dest, ok=False)
+
+        existing = self._already_offloaded(dest, media)
+        if existing:
+            result.ok, result.skipped, result.sha256 = True, True, existing
+            return result
+
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        part = dest + ".part"
+        ledger = ChunkLedger(part + ".json", media.size, self.chunk_size)
+        if not os.path.exists(part):
+            ledger.done.clear()
+        with open(part, "ab") as f:
+            f.truncate(media.size)
+
+        chunks = [(i, start, min(start + self.chunk_size, media.size) - 1)
+                  for i, start in enumerate(range(0, media.size, self.chunk_size))
+                  if i not in ledger.done]
+
+        def fetch(chunk):
+            index, start, end = chunk
+            n = self._fetch_chunk(camera, media, part, start, end)
+            ledger.mark(index)
+            return n
+
+        started = time.monotonic()
+        try:
+            with ThreadPoolExecutor(max_workers=self.connections_per_camera) as pool:
+                result.bytes_transferred = sum(pool.map(fetch, chunks))
+        except (requests.exceptions.RequestException, OSError) as e:
+            result.error = str(e)
+            result.seconds = time.monotonic() - started
+            print(f"[Offload] {media.camera}/{media.name} interrupted (resumable): {e}")
+            return result
+        result.seconds = time.monotonic() - started
+
+        if os.path.getsize(part) != media.size:
+            result.error = f"size mismatch: {os.path.getsize(part)} != {media.size}"
+            return result
+
+        result.sha256 = sha256_of(part)
+        os.replace(part, dest)
+        self._record_digest(dest, result.sha256, media.name)
+        ledger.remove()
+        result.ok = True
+        return result
+
+    # ------------ Cameras ------------ #
+
+    def offload_camera(self, camera: GoProCamera) -> list[OffloadResult]:
+        """Offload every file on one camera, largest first."""
+        try:
+            files = self.list_media(camera)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"[Offload] {camera.name}: cannot list media: {e}")
+            return []
+
+        results = []
+        for media in sorted(files, key=lambda m: m.size, reverse=True):
+            result = self.download(camera, media)
+            status = "skipped (already offloaded)" if result.skipped else ("ok" if result.ok else f"FAILED: {result.error}")
+            print(f"[Offload] {camera.name}/{media.folder}/{media.name}: {status}"
+                  + (f" at {result.throughput / 1e6:.1f} MB/s" if result.bytes_transferred else ""))
+            results.append(result)
+        return results
+
+    def offload(self, cameras: list[GoProCamera]) -> dict[str, list[OffloadResult]]:
+        """Offload several cameras in parallel. Returns results per camera name."""
+        with ThreadPoolExecutor(max_workers=self.parallel_cameras) as pool:
+            per_camera = list(pool.map(self.offload_camera, cameras))
+        return {camera.name: results for camera, results in zip(cameras, per_camera)}
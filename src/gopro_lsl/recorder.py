@@ -1,22 +1,74 @@
 """
 Recorder module for GoPro + LSL integration.
 Handles starting/stopping GoPro recordings and sending LSL markers.
+
+START/STOP markers are stamped at the estimated camera encoder transition
+(see shutter_timing) rather than at the moment the shutter call returned.
 """
 
 import time
-from src.gopro_lsl.gopro_control import GoProCamera
-from src.gopro_lsl.lsl_marker_stream import MarkerSender
-from src.gopro_lsl.config import MARKER_START, MARKER_STOP
+from pylsl import local_clock
+from src.gopro_lsl.fleet import FleetShutterReport
+from src.gopro_lsl.shutter_timing import SessionLatencyStats
+from src.gopro_lsl.confirmation import adaptive_poller
+from src.gopro_lsl.session_manager import SessionManager
+from src.gopro_lsl.config import MARKER_START, MARKER_STOP, MARKER_WINDOW_SUFFIX
 
-# Global marker sender instance
-marker_sender = MarkerSender()
-gopro = GoProCamera(name="default")  # Adjust as needed
+# Marker outlet, cameras (config.CAMERAS) and background jobs are created lazily;
+# call session.warm_up_async() to prepare them off the command path.
+session = SessionManager()
 recording_active = False
+latency_stats = None
+owns_journal_session = True   # False while a caller (the agent) opened and closes the journal session
 
 
-def start_record_session():
-    """Start a recording session with GoPro and LSL markers."""
-    global recording_active
+def _send_transition_marker(label: str, report: FleetShutterReport):
+    """
+    Push `label` at the fleet's estimated encoder transition, followed by a
+    companion "<label>_WINDOW <earliest> <latest>" marker with the uncertainty window.
+    Falls back to the current time if no camera confirmed.
+    """
+    transition = report.transition
+    marker_sender = session.marker_sender
+    if transition is None:
+        marker_sender.pulse(marker_sender.send_marker(label))
+        return
+    estimate, earliest, latest = transition
+    marker_sender.send_marker(label, timestamp=estimate)
+    marker_sender.pulse(timestamp=estimate)   # numeric sync pulse at the same instant
+    marker_sender.send_marker(f"{label}{MARKER_WINDOW_SUFFIX} {earliest:.6f} {latest:.6f}", timestamp=estimate)
+    print(f"[Recorder] {label} at {estimate:.6f} ± {(latest - earliest) / 2 * 1000:.1f} ms "
+          f"({(local_clock() - estimate) * 1000:.1f} ms ago)")
+
+
+def _report_start_latency(report: FleetShutterReport):
+    """Print each camera's start latency, labelled armed (warm standby) or cold."""
+    for timing in report.results:
+        if timing.confirm_latency is not None:
+            state = "armed" if timing.armed else "cold"
+            print(f"[Recorder] {timing.name} start latency {timing.confirm_latency * 1000:.0f} ms ({state})")
+
+
+def _export_hilights(session_id: str):
+    """Write the HiLight tags of the session next to its shutter stats."""
+    if session.hilights is not None:
+        path = session.hilights.export(session_id)
+        if path:
+            print(f"[Recorder] HiLight tag timings written to {path}")
+
+
+def arm_cameras():
+    """Put every camera in warm standby ahead of the start command."""
+    return session.arm()
+
+
+def start_record_session(session_id: str | None = None):
+    """
+    Start a recording session with GoPro and LSL markers.
+    session_id: journal session the caller already opened (and will close after the
+    stop); by default a new session is opened here and closed by stop_record_session().
+    """
+    global recording_active, latency_stats, owns_journal_session
     if recording_active:
         print("[Recorder] Recording already active.")
         return
@@ -24,13 +76,27 @@ def start_record_session():
     print("[Recorder] Starting GoPro + LSL session...")
 
     
-    status = gopro.start_recording() # Start GoPro recording
-    if status:
-        marker_sender.send_marker(MARKER_START) # Send START marker
-        marker_sender.start_heartbeat() # Start LSL heartbeat in background
-        recording_active = True
-    else:
+    latency_stats = SessionLatencyStats() if session_id is None else SessionLatencyStats(session_id=session_id)
+    owns_journal_session = session_id is None
+    if owns_journal_session:
+        session.marker_sender.begin_session(latency_stats.session_id) # Journal this session's markers under its id
+    report = session.fleet.start_recording() # Start GoPro recording on all cameras
+    latency_stats.add(report.results)
+    _report_start_latency(report)
+    failed = [timing.name for timing in report.results if not timing.confirmed]
+    if len(failed) == len(report.results):
+        # Nothing confirmed: stop any camera that started late so none keeps recording untracked
+        print("[Recorder] ✖ No camera confirmed the start, stopping the fleet.")
+        session.fleet.stop_recording()
+        if owns_journal_session:
+            session.marker_sender.end_session()
         return
+    if failed:
+        # Keep the cameras that did start: a partial session is tracked and stopped normally
+        print(f"[Recorder] ⚠ Partial session, not recording: {', '.join(failed)}")
+    _send_transition_marker(MARKER_START, report) # Send START marker at the estimated transition
+    session.marker_sender.start_heartbeat() # Start LSL heartbeat in background
+    recording_active = True
 
 
 def stop_record_session():
@@ -42,11 +108,22 @@ def stop_record_session():
 
     print("[Recorder] Stopping GoPro + LSL session...")
     
-    marker_sender.send_marker(MARKER_STOP) # Push STOP marker
-    gopro.stop_recording() # Stop GoPro recording
-    marker_sender.stop_heartbeat() # Push LSL heartbeat
+    report = session.fleet.stop_recording() # Stop GoPro recording
+    _send_transition_marker(MARKER_STOP, report) # Push STOP marker at the estimated transition
+    session.marker_sender.stop_heartbeat() # Push LSL heartbeat
+    if owns_journal_session:
+        session.marker_sender.end_session()
 
     recording_active = False
+    if latency_stats is not None:
+        latency_stats.add(report.results)
+        path = latency_stats.export(extra={"transition_model": adaptive_poller.report(),
+                                           "markers": session.marker_sender.stats(),
+                                           "heartbeat": session.marker_sender.heartbeat_stats()})
+        print(f"[Recorder] Shutter latency stats written to {path}")
+        _export_hilights(latency_stats.session_id)
+    # Back to warm standby for the next start, then relate camera clocks to LSL time
+    session.after_stop_async(latency_stats.session_id if latency_stats is not None else None)
 
 
 def record_session(duration_sec: int, marker_start: str = "START", marker_stop: str = "STOP"):
@@ -58,13 +135,24 @@ def record_session(duration_sec: int, marker_start: str = "START", marker_stop:
         marker (str): Marker label to push at start.
     """
     print("Starting recording session...")
-    marker_sender.send_marker(marker_start)   # Push start marker
-    gopro.start_recording()
+    stats = SessionLatencyStats()
+    session.marker_sender.begin_session(stats.session_id)
+    report = session.fleet.start_recording()
+    stats.add(report.results)
+    _report_start_latency(report)
+    _send_transition_marker(marker_start, report)   # Push start marker
     try:
         time.sleep(duration_sec)
     except KeyboardInterrupt:
         print("Recording interrupted!")
-    gopro.stop_recording()
-    marker_sender.send_marker(marker_stop)   # Push end marker
+    report = session.fleet.stop_recording()
+    stats.add(report.results)
+    _send_transition_marker(marker_stop, report)   # Push end marker
+    session.marker_sender.end_session()
+    path = stats.export(extra={"transition_model": adaptive_poller.report(),
+                               "markers": session.marker_sender.stats(),
+                               "heartbeat": session.marker_sender.heartbeat_stats()})
+    print(f"Shutter latency stats written to {path}")
+    _export_hilights(stats.session_id)
     print("Recording session completed")
     
\ No newline at end of file
@@ -0,0 +1,227 @@
+"""
+Centralized background scheduler for GoPro cameras.
+
+One timing thread keeps a heap of due jobs (keep-alive, status refresh,
+link probe, armed readiness, health check) for any number of cameras and hands due jobs to a small
+worker pool, instead of running one thread per camera.
+
+  - Jobs of the same kind are phase-spread across their interval and
+    rescheduled with random jitter, so requests to many cameras never burst.
+  - Keep-alive and status jobs are deferred while a shutter command is in
+    flight on that camera.
+  - A job is skipped if its previous run has not finished yet.
+  - stop() keeps the jobs; a later start() resumes them with a fresh worker pool.
+"""
+
+import heapq
+import itertools
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.gopro_lsl.config import (
+    KEEP_ALIVE_INTERVAL,
+    STATUS_REFRESH_INTERVAL,
+    HEALTH_CHECK_INTERVAL,
+    HEALTH_FAILURE_THRESHOLD,
+    TRANSPORT_PROBE_INTERVAL,
+    ARM_CHECK_INTERVAL,
+    SCHEDULER_JITTER,
+    SCHEDULER_SHUTTER_BACKOFF,
+    SCHEDULER_WORKERS,
+)
+
+
+class Job:
+    __slots__ = ("camera", "kind", "interval", "action", "defer_during_shutter", "running", "runs", "skips")
+
+    def __init__(self, camera, kind: str, interval: float, action, defer_during_shutter: bool = True):
+        self.camera = camera
+        self.kind = kind
+        self.interval = interval
+        self.action = action
+        self.defer_during_shutter = defer_during_shutter
+        self.running = False
+        self.runs = 0
+        self.skips = 0
+
+    def __repr__(self):
+        return f"<Job {self.kind} camera={self.camera.name} every {self.interval}s runs={self.runs}>"
+
+
+class CameraHealth:
+    """Contact bookkeeping for one camera."""
+
+    __slots__ = ("failures", "last_ok", "healthy")
+
+    def __init__(self):
+        self.failures = 0
+        self.last_ok = None
+        self.healthy = True
+
+    def record(self, ok: bool):
+        if ok:
+            self.failures = 0
+            self.last_ok = time.monotonic()
+        else:
+            self.failures += 1
+
+
+class CameraScheduler:
+    def __init__(self, jitter: float = SCHEDULER_JITTER, workers: int = SCHEDULER_WORKERS):
+        self.jitter = jitter
+        self.workers = workers
+        self._heap = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._executor = None   # created by start(), shut down by stop()
+        self._thread = None
+        self._running = False
+        self.jobs = []
+        self.health = {}
+
+    # ------------ Registration ------------ #
+
+    def add_job(self, job: Job, first_delay: float = 0.0):
+        with self._cond:
+            self.jobs.append(job)
+            heapq.heappush(self._heap, (time.monotonic() + first_delay, next(self._counter), job))
+            self._cond.notify()
+
+    def add_camera(self, camera, keep_alive: float | None = KEEP_ALIVE_INTERVAL,
+                   status: float | None = STATUS_REFRESH_INTERVAL,
+                   health: float | None = HEALTH_CHECK_INTERVAL,
+                   probe: float | None = TRANSPORT_PROBE_INTERVAL,
+                   armed: float | None = ARM_CHECK_INTERVAL):
+        """Schedule the standard jobs for one camera. Pass None to disable a job."""
+        self.add_cameras([camera], keep_alive=keep_alive, status=status, health=health, probe=probe,
+                         armed=armed)
+
+    def add_cameras(self, cameras, keep_alive: float | None = KEEP_ALIVE_INTERVAL,
+                    status: float | None = STATUS_REFRESH_INTERVAL,
+                    health: float | None = HEALTH_CHECK_INTERVAL,
+                    probe: float | None = TRANSPORT_PROBE_INTERVAL,
+                    armed: float | None = ARM_CHECK_INTERVAL):
+        """
+        Schedule the standard jobs for several cameras, phase-spreading each
+        kind evenly over its interval (camera i starts at i/N of the interval).
+        """
+        cameras = list(cameras)
+        n = len(cameras)
+        for i, camera in enumerate(cameras):
+            self.health.setdefault(camera.name, CameraHealth())
+            if keep_alive:
+                self.add_job(Job(camera, "keep_alive", keep_alive, self._keep_alive),
+                             first_delay=keep_alive * i / n)
+            if status:
+                self.add_job(Job(camera, "status", status, self._refresh_status),
+                             first_delay=status * i / n)
+            if health:
+                self.add_job(Job(camera, "health", health, self._check_health, defer_during_shutter=False),
+                             first_delay=health * (i + 0.5) / n)
+            if probe and hasattr(camera.http, "probe"):
+                self.add_job(Job(camera, "probe", probe, self._probe_links),
+                             first_delay=probe * (i + 0.5) / n)
+            if armed and hasattr(camera, "check_armed"):
+                self.add_job(Job(camera, "armed", armed, self._check_armed),
+                             first_delay=armed * i / n)
+
+    def remove_camera(self, camera):
+        with self._cond:
+            self.jobs = [job for job in self.jobs if job.camera is not camera]
+            self._heap = [entry for entry in self._heap if entry[2].camera is not camera]
+            heapq.heapify(self._heap)
+            self.health.pop(camera.name, None)
+
+    # ------------ Built-in jobs ------------ #
+
+    def _keep_alive(self, camera):
+        self.health[camera.name].record(camera.keep_alive())
+
+    def _refresh_status(self, camera):
+        self.health[camera.name].record(camera.status_snapshot(max_age=0) is not None)
+
+    def _probe_links(self, camera):
+        """Re-measure every link of the camera's transport and re-route if needed."""
+        camera.http.probe()
+
+    def _check_armed(self, camera):
+        """Keep an armed camera's readiness current; idle cameras cost nothing."""
+        if camera.armed:
+            camera.check_armed()
+
+    def _check_health(self, camera):
+        health = self.health[camera.name]
+        healthy = health.failures < HEALTH_FAILURE_THRESHOLD
+        if healthy != health.healthy:
+            print(f"[Scheduler] {camera.name} is {'healthy again' if healthy else 'UNHEALTHY'} "
+                  f"({health.failures} consecutive failures)")
+        health.healthy = healthy
+
+    # ------------ Timing loop ------------ #
+
+    def _next_due(self, job: Job) -> float:
+        spread = job.interval * self.jitter
+        return time.monotonic() + job.interval + random.uniform(-spread, spread)
+
+    def _run_job(self, job: Job):
+        try:
+            job.action(job.camera)
+            job.runs += 1
+        except Exception as e:
+            print(f"[Scheduler] {job.kind} job for {job.camera.name} failed: {e}")
+        finally:
+            job.running = False
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while self._running and (not self._heap or self._heap[0][0] > time.monotonic()):
+                    timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+                    self._cond.wait(timeout)
+                if not self._running:
+                    return
+                _, _, job = heapq.heappop(self._heap)
+
+                if job.defer_during_shutter and getattr(job.camera, "shutter_active", False):
+                    due = time.monotonic() + SCHEDULER_SHUTTER_BACKOFF
+                elif job.running:
+                    job.skips += 1
+                    due = self._next_due(job)
+                else:
+                    job.running = True
+                    try:
+                        self._executor.submit(self._run_job, job)
+                    except RuntimeError:
+                        return  # executor shut down (scheduler stopped or interpreter exiting)
+                    due = self._next_due(job)
+                heapq.heappush(self._heap, (due, next(self._counter), job))
+
+    def start(self):
+        if self._running:
+            return
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="gopro-sched")
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, daemon=True, name="gopro-scheduler")
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def stats(self) -> dict:
+        """Runs/skips per job and health per camera."""
+        return {
+            "jobs": [{"camera": j.camera.name, "kind": j.kind, "runs": j.runs, "skips": j.skips}
+                     for j in self.jobs],
+            "health": {name: {"healthy": h.healthy, "failures": h.failures}
+                       for name, h in self.health.items()},
+        }
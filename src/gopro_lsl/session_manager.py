@@ -0,0 +1,253 @@
+"""
+Lazy session resources for the recorder.
+
+Nothing here touches the network or LSL at import time. The marker outlet,
+the camera fleet and the background scheduler are created on first use, or
+ahead of time by warm_up_async() once the agent is already listening for
+commands; warm-up also arms the cameras (ARM_ON_WARM_UP). The battery/storage
+telemetry poller starts together with the fleet, and so does the HiLight
+tagger that follows selected markers (HILIGHT_MARKERS). Readiness state and
+measured startup time are exposed so callers can tell a cold start from a
+warm one.
+
+Each resource has its own creation lock: building the fleet contacts every
+camera, and that must not hold up a marker sent meanwhile.
+"""
+
+import threading
+import time
+
+from src.gopro_lsl.config import CAMERAS, ARM_ON_WARM_UP, TELEMETRY_ENABLED, TELEMETRY_STREAM_NAME, HILIGHT_MARKERS
+from src.gopro_lsl.clock_sync import CameraClockSync
+from src.gopro_lsl.fleet import GoProFleet
+from src.gopro_lsl.hilight import HilightTagger
+from src.gopro_lsl.lsl_marker_stream import MarkerSender
+from src.gopro_lsl.scheduler import CameraScheduler
+from src.gopro_lsl.telemetry import TelemetryPoller, TelemetryOutlet
+
+STATE_COLD = "cold"
+STATE_WARMING = "warming"
+STATE_READY = "ready"
+STATE_FAILED = "failed"
+
+
+class SessionManager:
+    def __init__(self, cameras: list[dict] = CAMERAS, schedule_background_jobs: bool = True):
+        """
+        cameras: camera list in config.CAMERAS format
+        schedule_background_jobs: run keep-alive/status/health jobs once the fleet exists
+        """
+        self.cameras = cameras
+        self.schedule_background_jobs = schedule_background_jobs
+        self.state = STATE_COLD
+        self.error = None
+        self.startup_time = None   # seconds from warm-up start until ready
+        self.timings = {}          # seconds spent creating each resource
+        self.clock_sync = {}       # camera name -> ClockSyncResult of the last sync
+        self._clock_history = {}   # camera name -> ticks of earlier syncs (drift is fitted across syncs)
+        self._marker_sender = None
+        self._fleet = None
+        self._scheduler = None
+        self._telemetry = None
+        self._hilights = None
+        self._marker_lock = threading.Lock()
+        self._fleet_lock = threading.Lock()
+        self._warm_lock = threading.Lock()   # held for a whole warm-up / close
+        self._lock = threading.Lock()        # warm-up thread handle
+        self._ready = threading.Event()
+        self._warm_thread = None
+
+    # ------------ Lazy resources ------------ #
+
+    def _timed(self, name: str, factory):
+        started = time.perf_counter()
+        value = factory()
+        self.timings[name] = time.perf_counter() - started
+        return value
+
+    @property
+    def marker_sender(self) -> MarkerSender:
+        """LSL marker outlet, created on first use."""
+        with self._marker_lock:
+            if self._marker_sender is None:
+                self._marker_sender = self._timed("marker_sender", MarkerSender)
+                self._marker_sender.subscribe(self._on_marker)
+            return self._marker_sender
+
+    @property
+    def fleet(self) -> GoProFleet:
+        """Camera fleet, created on first use (this contacts every camera)."""
+        with self._fleet_lock:
+            if self._fleet is None:
+                self._fleet = self._timed("fleet", lambda: GoProFleet.from_config(self.cameras))
+                if HILIGHT_MARKERS:
+                    self._hilights = HilightTagger(self._fleet.cameras)
+                if self.schedule_background_jobs:
+                    self._scheduler = CameraScheduler()
+                    self._scheduler.add_cameras(self._fleet.cameras)
+                    self._scheduler.start()
+                    if TELEMETRY_ENABLED:
+                        self._start_telemetry()
+            return self._fleet
+
+    def _start_telemetry(self):
+        names = [camera.name for camera in self._fleet.cameras]
+        try:
+            outlet = TelemetryOutlet(names) if TELEMETRY_STREAM_NAME else None
+        except Exception as e:
+            print(f"[Session] Telemetry LSL stream unavailable: {e}")
+            outlet = None
+        self._telemetry = TelemetryPoller(self._fleet.cameras, outlet=outlet)
+        self._telemetry.start()
+
+    def _on_marker(self, marker: str, timestamp: float):
+        # Markers sent before the fleet exists have no recording to tag
+        if self._hilights is not None:
+            self._hilights.on_marker(marker, timestamp)
+
+    @property
+    def hilights(self) -> HilightTagger | None:
+        return self._hilights
+
+    @property
+    def scheduler(self) -> CameraScheduler | None:
+        return self._scheduler
+
+    @property
+    def telemetry(self) -> TelemetryPoller | None:
+        return self._telemetry
+
+    def telemetry_report(self) -> list[dict]:
+        """Latest battery/storage sample per camera; empty until the fleet exists (never creates it)."""
+        return self._telemetry.report() if self._telemetry is not None else []
+
+    # ------------ Warm-up ------------ #
+
+    def warm_up(self):
+        """
+        Create every resource now (blocking). Safe to call more than once:
+        concurrent calls wait for the running warm-up instead of repeating it.
+        """
+        with self._warm_lock:
+            if self.state == STATE_READY:
+                return
+            self.state = STATE_WARMING
+            self.error = None
+            started = time.perf_counter()
+            try:
+                self.marker_sender
+                self.fleet
+                if ARM_ON_WARM_UP:
+                    self._timed("arm", self.fleet.arm)
+                self.state = STATE_READY
+            except Exception as e:
+                self.state = STATE_FAILED
+                self.error = str(e)
+                print(f"[Session] Warm-up failed: {e}")
+                return
+            finally:
+                self.startup_time = time.perf_counter() - started
+                self._ready.set()
+        print(f"[Session] Ready in {self.startup_time:.2f} s "
+              + ", ".join(f"{name} {seconds:.2f} s" for name, seconds in self.timings.items()))
+
+    def warm_up_async(self) -> threading.Thread:
+        """Warm up in a background thread so the caller (e.g. the MQTT agent) is not held up."""
+        with self._lock:
+            if self._warm_thread is None or not self._warm_thread.is_alive():
+                self._warm_thread = threading.Thread(target=self.warm_up, daemon=True, name="session-warmup")
+                self._warm_thread.start()
+            return self._warm_thread
+
+    def wait_ready(self, timeout: float | None = None) -> bool:
+        """Block until a warm-up finished (successfully or not). Returns True if ready."""
+        self._ready.wait(timeout)
+        return self.state == STATE_READY
+
+    @property
+    def is_ready(self) -> bool:
+        return self.state == STATE_READY
+
+    def readiness(self) -> dict:
+        return {
+            "state": self.state,
+            "startup_time": self.startup_time,
+            "timings": dict(self.timings),
+            "error": self.error,
+        }
+
+    # ------------ Standby ------------ #
+
+    def arm(self) -> dict:
+        """Arm every camera for a fast start (see GoProCamera.arm)."""
+        return self.fleet.arm()
+
+    def arm_async(self) -> threading.Thread:
+        thread = threading.Thread(target=self.arm, daemon=True, name="camera-arm")
+        thread.start()
+        return thread
+
+    # ------------ Clock sync ------------ #
+
+    def sync_clocks(self, session_id: str) -> dict:
+        """
+        Estimate each camera's clock offset against local_clock() (cameras in parallel,
+        on the fleet's background workers) and store the results as
+        <session_id>_clock_<camera>.json. A shutter interrupts the sampling.
+        Drift is fitted across this and the earlier syncs of each camera.
+        """
+        fleet = self.fleet
+
+        def sync(camera):
+            clock = CameraClockSync(camera, cancel=fleet.interrupted, history=self._clock_history.get(camera.name))
+            result = clock.run()
+            self._clock_history[camera.name] = clock.history
+            return result
+
+        results = [result for result in fleet.run_all(sync) if result is not None]
+        for result in results:
+            if result.ok:
+                result.export(session_id)
+        self.clock_sync = {result.camera: result for result in results}
+        return self.clock_sync
+
+    def sync_clocks_async(self, session_id: str) -> threading.Thread:
+        thread = threading.Thread(target=self.sync_clocks, args=(session_id,), daemon=True, name="clock-sync")
+        thread.start()
+        return thread
+
+    def after_stop_async(self, session_id: str | None = None) -> threading.Thread:
+        """
+        Re-arm the cameras, then sync their clocks for `session_id` (if given), one after
+        the other in the background so the clock reads never compete with arming.
+        Both give way to a shutter; the sync is skipped once a new recording started.
+        """
+        def run():
+            shutters = self.fleet.shutters
+            self.arm()
+            if session_id is not None:
+                if self.fleet.shutters != shutters:
+                    print(f"[Session] Clock sync for {session_id} skipped: a new shutter was sent")
+                    return
+                self.sync_clocks(session_id)
+
+        thread = threading.Thread(target=run, daemon=True, name="after-stop")
+        thread.start()
+        return thread
+
+    def close(self):
+        with self._warm_lock, self._fleet_lock:
+            if self._telemetry is not None:
+                self._telemetry.stop()
+                self._telemetry = None
+            if self._hilights is not None:
+                self._hilights.close()
+                self._hilights = None
+            if self._scheduler is not None:
+                self._scheduler.stop()
+                self._scheduler = None
+            if self._fleet is not None:
+                self._fleet.close()
+                self._fleet = None
+            self.state = STATE_COLD
+            self._ready.clear()
@@ -0,0 +1,177 @@
+"""
+Camera settings / preset management.
+
+Applying resolution, FPS and lens one HTTP call at a time for every camera
+before every session is slow, so CameraSettings:
+  - reads the current settings once from the cached status snapshot
+  - diffs them against a named preset (config.SETTINGS_PRESETS)
+  - sends only the settings that differ, in preset order
+  - remembers the last-known settings per camera serial (SettingsCache,
+    persisted as JSON), so a session whose preset is already in place is a
+    no-op without even reading the status
+
+GoProFleet.apply_preset() applies a preset to all cameras in parallel.
+"""
+
+import json
+import os
+import threading
+import time
+
+import requests
+from pylsl import local_clock
+
+from src.gopro_lsl.config import (
+    SETTINGS_PRESETS,
+    SETTINGS_CACHE_PATH,
+    SETTINGS_CACHE_MAX_AGE,
+    SETTINGS_BUSY_TIMEOUT,
+)
+
+
+def normalize(settings: dict) -> dict:
+    """{setting id: option} with string ids and int options, as the status JSON reports them."""
+    return {str(setting): int(option) for setting, option in settings.items()}
+
+
+def resolve(preset) -> dict:
+    """A preset name from config.SETTINGS_PRESETS, or an explicit {setting id: option} dict."""
+    if isinstance(preset, str):
+        if preset not in SETTINGS_PRESETS:
+            raise KeyError(f"Unknown settings preset {preset!r} (known: {', '.join(SETTINGS_PRESETS)})")
+        preset = SETTINGS_PRESETS[preset]
+    return normalize(preset)
+
+
+def diff(current: dict, wanted: dict) -> dict:
+    """Entries of `wanted` that `current` does not already have (keeps `wanted` order)."""
+    return {setting: option for setting, option in wanted.items() if current.get(setting) != option}
+
+
+class SettingsCache:
+    """Last-known settings per camera serial, with the wall time they were confirmed."""
+
+    def __init__(self, path: str | None = SETTINGS_CACHE_PATH):
+        self.path = path
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()   # cameras save concurrently; the last write must be the newest
+        self._loaded = False
+
+    def _load(self):
+        # Loaded on first use so importing the module never touches the disk
+        self._loaded = True
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"[SettingsCache] Could not load {self.path}: {e}")
+
+    def save(self):
+        """Write the cache. The file is replaced atomically, never left half-written."""
+        if not self.path:
+            return
+        with self._save_lock:
+            with self._lock:
+                data = dict(self._entries)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            try:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(data, f, indent=2)
+                os.replace(tmp, self.path)
+            except OSError as e:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                print(f"[SettingsCache] Could not save {self.path}: {e}")
+
+    def get(self, serial: str, max_age: float = SETTINGS_CACHE_MAX_AGE) -> dict | None:
+        """Settings known for `serial`, or None if unknown or older than max_age seconds."""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            entry = self._entries.get(serial)
+        if entry is None or time.time() - entry["updated"] > max_age:
+            return None
+        return entry["settings"]
+
+    def update(self, serial: str, settings: dict, save: bool = True):
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            known = dict(self._entries.get(serial, {}).get("settings", {}))
+            known.update(settings)
+            self._entries[serial] = {"settings": known, "updated": time.time()}
+        if save:
+            self.save()
+
+    def forget(self, serial: str):
+        with self._lock:
+            self._entries.pop(serial, None)
+
+
+# Shared cache used by every GoProCamera
+settings_cache = SettingsCache()
+
+
+class CameraSettings:
+    """Settings manager for one GoProCamera (available as camera.settings)."""
+
+    def __init__(self, camera, cache: SettingsCache = settings_cache):
+        self.camera = camera
+        self.cache = cache
+
+    def current(self, max_age: float | None = None) -> dict | None:
+        """Current settings from the (cached) status snapshot; None if the status is unavailable."""
+        snapshot = self.camera.status_snapshot(max_age)
+        if snapshot is None:
+            return None
+        self.cache.update(self.camera.serial_last3, snapshot.settings, save=False)
+        return snapshot.settings
+
+    def diff(self, preset, use_cache: bool = True) -> dict | None:
+        """
+        Settings that must change to reach `preset`.
+        use_cache: trust the last-known settings for this serial instead of reading the status
+        """
+        wanted = resolve(preset)
+        if use_cache:
+            known = self.cache.get(self.camera.serial_last3)
+            if known is not None and not diff(known, wanted):
+                return {}
+        current = self.current()
+        return None if current is None else diff(current, wanted)
+
+    def _wait_not_busy(self):
+        deadline = local_clock() + SETTINGS_BUSY_TIMEOUT
+        while local_clock() < deadline:
+            snapshot = self.camera.status_snapshot(max_age=0)
+            if snapshot is not None and not snapshot.busy:
+                return
+            time.sleep(0.05)
+
+    def apply(self, preset, use_cache: bool = True) -> dict:
+        """
+        Bring the camera to `preset`, sending only the settings that differ.
+        Returns {setting id: option} of the settings actually sent.
+        Raises requests.exceptions.RequestException if a setting cannot be applied.
+        """
+        changes = self.diff(preset, use_cache=use_cache)
+        if changes is None:
+            raise requests.exceptions.ConnectionError(f"{self.camera.name}: status unavailable, cannot diff settings")
+        if not changes:
+            print(f"[{self.camera.name}] settings already match, nothing to send")
+            return {}
+
+        for setting, option in changes.items():
+            try:
+                self.camera.set_setting(setting, option)
+            except requests.exceptions.HTTPError:
+                # Usually the camera is still busy with the previous change; wait once and retry
+                self._wait_not_busy()
+                self.camera.set_setting(setting, option)
+        self.cache.save()
+        print(f"[{self.camera.name}] ✔ applied {len(changes)} setting(s): "
+              + ", ".join(f"{setting}={option}" for setting, option in changes.items()))
+        return changes
@@ -0,0 +1,160 @@
+"""
+Shutter latency instrumentation.
+
+A shutter command is bracketed by LSL local_clock() stamps:
+  sent_at       -> request leaves this machine
+  acked_at      -> camera answers the shutter request
+  lower         -> latest moment the camera was still seen in the old state
+  confirmed_at  -> first status poll that showed the new encoder state
+
+The real encoder transition lies inside [lower, confirmed_at]; its midpoint is
+used as the marker timestamp and the half-width as the uncertainty.
+SessionLatencyStats collects these per session and exports them as JSON.
+"""
+
+import json
+import os
+import statistics
+from dataclasses import dataclass, asdict, field
+from datetime import datetime
+
+from src.gopro_lsl.config import LATENCY_EXPORT_DIR
+
+
+@dataclass
+class ShutterTiming:
+    """Timing of one shutter command on one camera. All times are local_clock() seconds."""
+    name: str
+    mode: str
+    sent_at: float | None = None
+    acked_at: float | None = None
+    lower: float | None = None
+    confirmed_at: float | None = None
+    confirmed: bool = False
+    polls: int = 0
+    armed: bool | None = None   # start commands: whether the camera was armed (warm) or cold
+    error: str | None = None
+
+    def observe(self, snapshot, expected: bool):
+        """Fold one status snapshot (with requested_at/fetched_at stamps) into the window."""
+        self.polls += 1
+        if snapshot is None:
+            return
+        if snapshot.encoding is expected:
+            if self.confirmed_at is None or snapshot.fetched_at < self.confirmed_at:
+                self.confirmed_at = snapshot.fetched_at
+        elif snapshot.requested_at is not None:
+            self.lower = max(self.lower or snapshot.requested_at, snapshot.requested_at)
+
+    @property
+    def window(self) -> tuple[float, float] | None:
+        """(earliest, latest) possible transition time, or None if unconfirmed."""
+        if not self.confirmed or self.sent_at is None or self.confirmed_at is None:
+            return None
+        earliest = max(self.sent_at, self.lower or self.sent_at)
+        return earliest, max(earliest, self.confirmed_at)
+
+    @property
+    def estimate(self) -> float | None:
+        window = self.window
+        return None if window is None else (window[0] + window[1]) / 2
+
+    @property
+    def uncertainty(self) -> float | None:
+        """Half-width of the transition window (seconds)."""
+        window = self.window
+        return None if window is None else (window[1] - window[0]) / 2
+
+    @property
+    def request_rtt(self) -> float | None:
+        if self.sent_at is None or self.acked_at is None:
+            return None
+        return self.acked_at - self.sent_at
+
+    @property
+    def confirm_latency(self) -> float | None:
+        if self.sent_at is None or self.confirmed_at is None:
+            return None
+        return self.confirmed_at - self.sent_at
+
+    def to_dict(self) -> dict:
+        row = asdict(self)
+        row.update(estimate=self.estimate, uncertainty=self.uncertainty,
+                   request_rtt=self.request_rtt, confirm_latency=self.confirm_latency)
+        return row
+
+
+def combined_window(timings: list[ShutterTiming]) -> tuple[float, float, float] | None:
+    """
+    Best single transition estimate for several cameras fired together.
+    Returns (estimate, earliest, latest): the median of the per-camera estimates
+    and the union of their windows, or None if no camera confirmed.
+    """
+    confirmed = [t for t in timings if t.window is not None]
+    if not confirmed:
+        return None
+    estimate = statistics.median(t.estimate for t in confirmed)
+    earliest = min(t.window[0] for t in confirmed)
+    latest = max(t.window[1] for t in confirmed)
+    return estimate, earliest, latest
+
+
+def summarize(values: list[float]) -> dict | None:
+    """count/min/median/p90/max of `values`, or None if there are none."""
+    if not values:
+        return None
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "min": values[0],
+        "median": statistics.median(values),
+        "p90": values[min(len(values) - 1, int(round(0.9 * (len(values) - 1))))],
+        "max": values[-1],
+    }
+
+
+def new_session_id() -> str:
+    return datetime.now().strftime("%Y%m%d_%H%M%S")
+
+
+@dataclass
+class SessionLatencyStats:
+    """Shutter timings collected during one recording session."""
+    session_id: str = field(default_factory=new_session_id)
+    timings: list[ShutterTiming] = field(default_factory=list)
+
+    def add(self, timings: list[ShutterTiming]):
+        self.timings.extend(timings)
+
+    def summary(self) -> dict:
+        def collect(attr, timings=None):
+            return [getattr(t, attr) for t in (self.timings if timings is None else timings)
+                    if getattr(t, attr) is not None]
+        starts = [t for t in self.timings if t.mode == "start"]
+        return {
+            "request_rtt": summarize(collect("request_rtt")),
+            "confirm_latency": summarize(collect("confirm_latency")),
+            "uncertainty": summarize(collect("uncertainty")),
+            "start_latency": {
+                "armed": summarize(collect("confirm_latency", [t for t in starts if t.armed])),
+                "cold": summarize(collect("confirm_latency", [t for t in starts if t.armed is False])),
+            },
+            "unconfirmed": sum(not t.confirmed for t in self.timings),
+        }
+
+    def export(self, directory: str = LATENCY_EXPORT_DIR, extra: dict | None = None) -> str:
+        """
+        Write the session's timings and summary to <directory>/<session_id>_shutter.json.
+        extra: additional top-level entries (e.g. the learned transition model)
+        """
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.session_id}_shutter.json")
+        data = {
+            "session_id": self.session_id,
+            "summary": self.summary(),
+            "timings": [t.to_dict() for t in self.timings],
+        }
+        data.update(extra or {})
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        return path
@@ -0,0 +1,176 @@
+"""
+GoPro status cache.
+
+`/gp/gpControl/status` returns a few hundred fields, but we only use a
+handful. StatusCache fetches the status at most once per TTL, lets
+concurrent callers share one in-flight request, keeps only a compact
+StatusSnapshot and notifies listeners when one of its fields flips.
+"""
+
+import threading
+
+from pylsl import local_clock
+
+from src.gopro_lsl.config import STATUS_CACHE_TTL
+
+# gpControl status IDs we decode
+STATUS_ENCODING = "10"      # 1 while the encoder is recording
+STATUS_BUSY = "8"           # 1 while the camera is busy (e.g. applying settings)
+STATUS_SD_REMAINING = "54"  # remaining SD space in kB
+STATUS_BATTERY = "70"       # internal battery percentage
+STATUS_VIDEO_REMAINING = "35"  # camera's estimate of recordable video time left (seconds)
+
+
+class StatusSnapshot:
+    """
+    Decoded subset of the camera status, plus the current settings ({setting id: option}).
+    `requested_at`/`fetched_at` are local_clock() stamps taken around the request.
+    """
+
+    __slots__ = ("encoding", "busy", "battery", "sd_remaining_kb", "video_remaining", "settings",
+                 "requested_at", "fetched_at")
+
+    FIELDS = ("encoding", "busy", "battery", "sd_remaining_kb")
+
+    def __init__(self, encoding: bool, busy: bool, battery: int | None,
+                 sd_remaining_kb: int | None, fetched_at: float, requested_at: float | None = None,
+                 settings: dict | None = None, video_remaining: int | None = None):
+        self.encoding = encoding
+        self.busy = busy
+        self.battery = battery
+        self.sd_remaining_kb = sd_remaining_kb
+        self.video_remaining = video_remaining
+        self.settings = settings or {}
+        self.requested_at = requested_at
+        self.fetched_at = fetched_at
+
+    @classmethod
+    def from_status(cls, status: dict, fetched_at: float | None = None, requested_at: float | None = None):
+        """Build a snapshot from the raw gpControl status JSON."""
+        fields = status.get("status", {})
+        return cls(
+            encoding=fields.get(STATUS_ENCODING) == 1,
+            busy=fields.get(STATUS_BUSY) == 1,
+            battery=fields.get(STATUS_BATTERY),
+            sd_remaining_kb=fields.get(STATUS_SD_REMAINING),
+            video_remaining=fields.get(STATUS_VIDEO_REMAINING),
+            fetched_at=local_clock() if fetched_at is None else fetched_at,
+            requested_at=requested_at,
+            settings={str(k): v for k, v in status.get("settings", {}).items()},
+        )
+
+    @property
+    def age(self) -> float:
+        return local_clock() - self.fetched_at
+
+    def changes_from(self, previous: "StatusSnapshot | None") -> dict:
+        """Returns {field: (old, new)} for fields that differ from `previous`."""
+        if previous is None:
+            return {}
+        return {name: (getattr(previous, name), getattr(self, name))
+                for name in self.FIELDS
+                if getattr(previous, name) != getattr(self, name)}
+
+    def __repr__(self):
+        values = ", ".join(f"{name}={getattr(self, name)}" for name in self.FIELDS)
+        return f"<StatusSnapshot {values}, age={self.age:.3f}s>"
+
+
+class StatusCache:
+    """
+    TTL cache around a status fetch function.
+
+    fetch: callable returning the raw status dict or None on failure.
+    Listeners are called as listener(field, old, new, snapshot) from the
+    thread that completed the fetch.
+    """
+
+    def __init__(self, fetch, ttl: float = STATUS_CACHE_TTL):
+        self.fetch = fetch
+        self.ttl = ttl
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._inflight = None  # [threading.Event, result] for the fetch currently running
+        self._listeners = []
+
+    @property
+    def latest(self) -> StatusSnapshot | None:
+        """Last snapshot without triggering a fetch (may be stale or None)."""
+        return self._snapshot
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def invalidate(self):
+        """Force the next get() to fetch, e.g. right after a shutter command."""
+        with self._lock:
+            if self._snapshot is not None:
+                # Keep the values for change detection but make them older than any TTL
+                self._snapshot.fetched_at = float("-inf")
+
+    def store(self, status: dict | None, requested_at: float | None = None) -> StatusSnapshot | None:
+        """
+        Cache a raw status fetched outside get() (e.g. by AsyncGoProCamera) and notify
+        listeners of changed fields. Returns the snapshot, or None if `status` is empty.
+        """
+        if not status:
+            return None
+        snapshot = StatusSnapshot.from_status(status, requested_at=requested_at)
+        with self._lock:
+            previous = self._snapshot
+            self._snapshot = snapshot
+        self._notify(snapshot.changes_from(previous), snapshot)
+        return snapshot
+
+    def get(self, max_age: float | None = None) -> StatusSnapshot | None:
+        """
+        Returns a snapshot no older than `max_age` (defaults to the TTL).
+        If another thread is already fetching, waits for and shares its result.
+        Returns None if the fetch failed.
+        """
+        max_age = self.ttl if max_age is None else max_age
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.age <= max_age:
+                return snapshot
+            inflight = self._inflight
+            if inflight is None:
+                inflight = self._inflight = [threading.Event(), None]
+                leader = True
+            else:
+                leader = False
+
+        if not leader:
+            inflight[0].wait()
+            return inflight[1]
+
+        snapshot = None
+        try:
+            requested_at = local_clock()
+            status = self.fetch()
+            if status:
+                snapshot = StatusSnapshot.from_status(status, requested_at=requested_at)
+        finally:
+            with self._lock:
+                previous = self._snapshot
+                if snapshot is not None:
+                    self._snapshot = snapshot
+                self._inflight = None
+            inflight[1] = snapshot
+            inflight[0].set()
+
+        if snapshot is not None:
+            self._notify(snapshot.changes_from(previous), snapshot)
+        return snapshot
+
+    def _notify(self, changes: dict, snapshot: StatusSnapshot):
+        for name, (old, new) in changes.items():
+            for listener in list(self._listeners):
+                try:
+                    listener(name, old, new, snapshot)
+                except Exception as e:
+                    print(f"[StatusCache] listener error: {e}")
@@ -0,0 +1,242 @@
+"""
+Battery / storage telemetry for GoPro cameras.
+
+One TelemetryPoller thread samples battery, free SD space and the camera's
+own remaining-video-time estimate for every camera, using the status cache:
+a sample reuses any snapshot that is recent enough (the scheduler's status
+job, shutter confirmations), so while recording it adds little or no HTTP
+load. The sampling rate adapts:
+  - slow while recording (TELEMETRY_INTERVAL_RECORDING)
+  - normal when idle (TELEMETRY_INTERVAL_IDLE)
+  - fast once a camera is predicted to run out soon (TELEMETRY_INTERVAL_LOW)
+
+Time-to-empty is predicted per resource from a least-squares trend over the
+recent samples. Every sample is handed to the registered listeners and,
+optionally, pushed to an LSL stream (TelemetryOutlet); the rpi_agent
+heartbeat publishes the latest values over MQTT.
+"""
+
+import math
+import threading
+from collections import deque
+from dataclasses import dataclass, asdict
+
+from pylsl import StreamInfo, StreamOutlet, local_clock
+
+from src.gopro_lsl.config import (
+    TELEMETRY_INTERVAL_IDLE,
+    TELEMETRY_INTERVAL_RECORDING,
+    TELEMETRY_INTERVAL_LOW,
+    TELEMETRY_LOW_THRESHOLD,
+    TELEMETRY_TREND_WINDOW,
+    TELEMETRY_MIN_TREND_SPAN,
+    TELEMETRY_STREAM_NAME,
+)
+
+
+def time_to_empty(samples: list[tuple[float, float]], min_span: float = TELEMETRY_MIN_TREND_SPAN) -> float | None:
+    """
+    Seconds until a decreasing value reaches zero, from a least-squares line through
+    (time, value) samples. None if the trend is flat/rising or the samples span too little time.
+    """
+    if len(samples) < 2 or samples[-1][0] - samples[0][0] < min_span:
+        return None
+    n = len(samples)
+    mt = sum(t for t, _ in samples) / n
+    mv = sum(v for _, v in samples) / n
+    stt = sum((t - mt) ** 2 for t, _ in samples)
+    if stt == 0:
+        return None
+    slope = sum((t - mt) * (v - mv) for t, v in samples) / stt
+    if slope >= 0:
+        return None
+    latest = mv + slope * (samples[-1][0] - mt)   # fitted value now, less noisy than the last reading
+    return max(0.0, latest / -slope)
+
+
+@dataclass
+class CameraTelemetry:
+    """One telemetry sample for one camera (times in local_clock() seconds, durations in seconds)."""
+    camera: str
+    sampled_at: float
+    recording: bool
+    battery: int | None = None
+    sd_remaining_kb: int | None = None
+    video_remaining: int | None = None     # camera's own estimate of recordable seconds
+    battery_empty_in: float | None = None  # predicted from the battery trend
+    sd_full_in: float | None = None        # predicted from the free-space trend
+    status_age: float | None = None        # age of the status snapshot the sample came from
+
+    @property
+    def record_time_left(self) -> float | None:
+        """Most pessimistic of the predictions and the camera's own estimate."""
+        candidates = [v for v in (self.battery_empty_in, self.sd_full_in, self.video_remaining) if v is not None]
+        return min(candidates) if candidates else None
+
+    def to_dict(self) -> dict:
+        row = asdict(self)
+        row["record_time_left"] = self.record_time_left
+        return row
+
+
+class CameraTrend:
+    """Recent (time, value) samples for one camera's battery and free space."""
+
+    def __init__(self, window: float = TELEMETRY_TREND_WINDOW):
+        self.window = window
+        self.battery = deque()
+        self.sd = deque()
+
+    def add(self, t: float, battery: int | None, sd_kb: int | None):
+        for samples, value in ((self.battery, battery), (self.sd, sd_kb)):
+            if value is None or (samples and t <= samples[-1][0]):
+                continue
+            # A jump up (battery swapped, files deleted) invalidates the old trend
+            if samples and value > samples[-1][1]:
+                samples.clear()
+            samples.append((t, value))
+            while samples and t - samples[0][0] > self.window:
+                samples.popleft()
+
+
+class TelemetryOutlet:
+    """
+    Numeric LSL stream with 4 channels per camera:
+    battery (%), free SD (MB), recordable time left (s), recording (0/1). Unknown values are NaN.
+    """
+
+    CHANNELS = ("battery", "sd_free_mb", "record_time_left", "recording")
+
+    def __init__(self, camera_names: list[str], stream_name: str = TELEMETRY_STREAM_NAME,
+                 source_id: str = "gopro_telemetry"):
+        self.camera_names = list(camera_names)
+        self.info = StreamInfo(name=stream_name, type="Telemetry",
+                               channel_count=len(self.CHANNELS) * len(self.camera_names),
+                               nominal_srate=0, channel_format="float32", source_id=source_id)
+        channels = self.info.desc().append_child("channels")
+        for name in self.camera_names:
+            for channel in self.CHANNELS:
+                channels.append_child("channel").append_child_value("label", f"{name}_{channel}")
+        self.outlet = StreamOutlet(self.info)
+        self._row = [math.nan] * self.info.channel_count()
+
+    def push(self, sample: CameraTelemetry):
+        """Update the camera's channels and push the whole row, stamped at the status fetch."""
+        if sample.camera not in self.camera_names:
+            return
+        base = self.camera_names.index(sample.camera) * len(self.CHANNELS)
+
+        def value(v):
+            return math.nan if v is None else float(v)
+
+        sd_mb = None if sample.sd_remaining_kb is None else sample.sd_remaining_kb / 1024
+        self._row[base:base + len(self.CHANNELS)] = [
+            value(sample.battery), value(sd_mb), value(sample.record_time_left), float(sample.recording)]
+        self.outlet.push_sample(self._row, sample.sampled_at)
+
+
+class TelemetryPoller:
+    def __init__(self, cameras, outlet: TelemetryOutlet | None = None):
+        """
+        cameras: GoProCamera instances (sampled through their status caches)
+        outlet: optional LSL stream every sample is pushed to
+        """
+        self.cameras = list(cameras)
+        self.outlet = outlet
+        self.latest = {}       # camera name -> last CameraTelemetry (written under _lock)
+        self._lock = threading.Lock()   # report() runs on other threads (MQTT heartbeat)
+        self.samples = 0
+        self._trends = {camera.name: CameraTrend() for camera in self.cameras}
+        self._due = {camera.name: 0.0 for camera in self.cameras}
+        self._listeners = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def subscribe(self, listener):
+        """listener(sample: CameraTelemetry) is called from the poller thread for every sample."""
+        self._listeners.append(listener)
+
+    # ------------ Sampling ------------ #
+
+    def interval(self, sample: CameraTelemetry | None) -> float:
+        if sample is None:
+            return TELEMETRY_INTERVAL_IDLE
+        left = sample.record_time_left
+        if left is not None and left < TELEMETRY_LOW_THRESHOLD:
+            return TELEMETRY_INTERVAL_LOW
+        return TELEMETRY_INTERVAL_RECORDING if sample.recording else TELEMETRY_INTERVAL_IDLE
+
+    def sample(self, camera) -> CameraTelemetry | None:
+        """Take one sample, reusing a cached status snapshot if it is young enough."""
+        max_age = self.interval(self.latest.get(camera.name)) / 2
+        snapshot = camera.status_snapshot(max_age=max_age)
+        if snapshot is None:
+            return None
+        previous = self.latest.get(camera.name)
+        fresh = previous is None or snapshot.fetched_at > previous.sampled_at
+        trend = self._trends[camera.name]
+        trend.add(snapshot.fetched_at, snapshot.battery, snapshot.sd_remaining_kb)
+        sample = CameraTelemetry(
+            camera=camera.name,
+            sampled_at=snapshot.fetched_at,
+            recording=snapshot.encoding,
+            battery=snapshot.battery,
+            sd_remaining_kb=snapshot.sd_remaining_kb,
+            video_remaining=snapshot.video_remaining,
+            battery_empty_in=time_to_empty(list(trend.battery)),
+            sd_full_in=time_to_empty(list(trend.sd)),
+            status_age=snapshot.age,
+        )
+        with self._lock:
+            self.latest[camera.name] = sample
+        if not fresh:
+            return sample   # same status as last time: nothing new to publish
+        self.samples += 1
+        if self.outlet is not None:
+            self.outlet.push(sample)
+        for listener in list(self._listeners):
+            try:
+                listener(sample)
+            except Exception as e:
+                print(f"[Telemetry] listener error: {e}")
+        left = sample.record_time_left
+        was_low = previous is not None and previous.record_time_left is not None \
+            and previous.record_time_left < TELEMETRY_LOW_THRESHOLD
+        if left is not None and left < TELEMETRY_LOW_THRESHOLD and not was_low:
+            print(f"[{camera.name}] ⚠ about {left / 60:.0f} min of recording left "
+                  f"(battery {sample.battery}%, SD {sample.sd_remaining_kb // 1024 if sample.sd_remaining_kb is not None else '?'} MB)")
+        return sample
+
+    def _loop(self):
+        while not self._stop.is_set():
+            now = local_clock()
+            for camera in self.cameras:
+                if now < self._due[camera.name]:
+                    continue
+                try:
+                    sample = self.sample(camera)
+                except Exception as e:
+                    print(f"[Telemetry] {camera.name} sample failed: {e}")
+                    sample = None
+                self._due[camera.name] = local_clock() + self.interval(sample or self.latest.get(camera.name))
+            wait = min(self._due.values()) - local_clock()
+            self._stop.wait(max(0.05, wait))
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True, name="gopro-telemetry")
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def report(self) -> list[dict]:
+        """Latest sample of every camera, as dicts (for MQTT / JSON). Safe from any thread."""
+        with self._lock:
+            samples = list(self.latest.values())
+        return [sample.to_dict() for sample in samples]
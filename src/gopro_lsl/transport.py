@@ -0,0 +1,237 @@
+"""
+Camera transport: USB and Wi-Fi links behind one client.
+
+A camera can be reachable over USB-Ethernet (http://172.2X.1YZ.51:8080) and
+over its own Wi-Fi access point (http://10.5.5.9). GoProTransport keeps one
+GoProHttpClient per link, all sharing the camera's command queue so requests
+stay serialized whichever link carries them, and:
+
+  - probes every link's reachability and round-trip time at startup and
+    again whenever probe() is called (the CameraScheduler does this
+    periodically)
+  - sends each request over the lowest-latency healthy link, switching only
+    when another link is clearly faster
+  - fails over to the next healthy link when a request cannot reach the
+    camera (connection error), e.g. the USB cable is pulled mid-session;
+    a dead link rejoins once a probe succeeds again. Non-idempotent commands
+    (HTTP_CONNECT_RETRY_ONLY, e.g. the shutter) are only resent on the other
+    link if the connection failed before the request was written
+
+It exposes the same get()/submit()/queue/close() interface as GoProHttpClient.
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+
+import requests
+
+from src.gopro_lsl.config import (
+    GOPRO_CONNECTION_MODE,
+    GOPRO_WIFI_IP,
+    GOPRO_HTTP_PORT,
+    GOPRO_USB_PORT,
+    TRANSPORT_PROBE_TIMEOUT,
+    TRANSPORT_PROBE_CONNECT_TIMEOUT,
+    TRANSPORT_RTT_SMOOTHING,
+    TRANSPORT_SWITCH_MARGIN,
+)
+from src.gopro_lsl.command_queue import CameraCommandQueue
+from src.gopro_lsl.http_session import GoProHttpClient, SessionPool, may_resend
+
+PROBE_PATH = "/gopro/camera/keep_alive"
+
+
+def usb_base_url(serial_last3: str) -> str:
+    """USB-Ethernet control URL for a camera: serial ...xyz -> http://172.2x.1yz.51:8080"""
+    x = serial_last3[0]
+    yz = serial_last3[1:]
+    camera_ip = f"172.2{x}.1{yz}.51"
+    return f"http://{camera_ip}:{GOPRO_USB_PORT}"
+
+
+def wifi_base_url(ip: str = GOPRO_WIFI_IP) -> str:
+    return f"http://{ip}:{GOPRO_HTTP_PORT}"
+
+
+def link_urls(serial_last3: str, mode: str = GOPRO_CONNECTION_MODE, wifi_ip: str | None = None) -> dict:
+    """
+    Link name -> base URL for a camera.
+    mode "usb": USB only; "wifi": Wi-Fi only; "auto": USB, plus Wi-Fi if the camera has a wifi_ip.
+    """
+    if mode == "usb":
+        return {"usb": usb_base_url(serial_last3)}
+    if mode == "wifi":
+        return {"wifi": wifi_base_url(wifi_ip or GOPRO_WIFI_IP)}
+    if mode == "auto":
+        links = {"usb": usb_base_url(serial_last3)}
+        if wifi_ip:
+            links["wifi"] = wifi_base_url(wifi_ip)
+        return links
+    raise ValueError(f"Unknown GOPRO_CONNECTION_MODE {mode!r} (expected 'usb', 'wifi' or 'auto')")
+
+
+class Link:
+    """One network path to a camera and its measured health."""
+
+    __slots__ = ("name", "client", "rtt", "healthy", "failures", "last_probe")
+
+    def __init__(self, name: str, client: GoProHttpClient):
+        self.name = name
+        self.client = client
+        self.rtt = None          # smoothed probe round-trip time (seconds)
+        self.healthy = False     # unknown until the first probe
+        self.failures = 0
+        self.last_probe = None
+
+    @property
+    def base_url(self) -> str:
+        return self.client.base_url
+
+    def record_rtt(self, rtt: float):
+        self.rtt = rtt if self.rtt is None else self.rtt + TRANSPORT_RTT_SMOOTHING * (rtt - self.rtt)
+
+    def __repr__(self):
+        rtt = f"{self.rtt * 1000:.1f} ms" if self.rtt is not None else "n/a"
+        return f"<Link {self.name} {self.base_url} healthy={self.healthy} rtt={rtt}>"
+
+
+class GoProTransport:
+    def __init__(self, name: str, links: dict, pool: SessionPool | None = None,
+                 policies: dict | None = None, queue: CameraCommandQueue | None = None):
+        """
+        name: camera name (for log messages)
+        links: link name -> base URL, in order of preference before the first probe
+        """
+        self.name = name
+        self.queue = queue or CameraCommandQueue(name)
+        self.links = [Link(link, GoProHttpClient(url, pool=pool, policies=policies, queue=self.queue))
+                      for link, url in links.items()]
+        self._active = self.links[0]
+        self._lock = threading.Lock()
+        self.failovers = 0
+        self.probe()
+
+    def __repr__(self):
+        return f"<GoProTransport {self.name} active={self._active.name} links={self.links}>"
+
+    @property
+    def active(self) -> Link:
+        return self._active
+
+    @property
+    def base_url(self) -> str:
+        return self._active.base_url
+
+    # ------------ Probing ------------ #
+
+    def _probe_link(self, link: Link) -> bool:
+        sent = []
+        try:
+            # "probe" policy: no retries, so an unreachable link costs one short connect timeout
+            r = link.client.get("probe", PROBE_PATH,
+                                timeout=(TRANSPORT_PROBE_CONNECT_TIMEOUT, TRANSPORT_PROBE_TIMEOUT),
+                                on_send=lambda: sent.append(time.perf_counter()))
+            rtt = time.perf_counter() - sent[-1]
+            ok = r.status_code < 500
+        except requests.exceptions.RequestException:
+            ok = False
+        link.last_probe = time.monotonic()
+        if ok:
+            link.record_rtt(rtt)
+            if link.failures:
+                print(f"[{self.name}] ✔ {link.name} link reachable again ({link.rtt * 1000:.1f} ms)")
+            link.failures = 0
+        else:
+            link.failures += 1
+        link.healthy = ok
+        return ok
+
+    def probe(self) -> list[Link]:
+        """Probe every link, then route over the fastest healthy one. Returns the links."""
+        for link in self.links:
+            self._probe_link(link)
+        self._select()
+        return self.links
+
+    def _select(self, exclude: Link | None = None):
+        with self._lock:
+            healthy = [link for link in self.links if link.healthy and link is not exclude]
+            if not healthy:
+                return
+            best = min(healthy, key=lambda link: link.rtt if link.rtt is not None else float("inf"))
+            current = self._active
+            keep = (current in healthy and current.rtt is not None and best.rtt is not None
+                    and best.rtt > current.rtt * (1 - TRANSPORT_SWITCH_MARGIN))
+            if best is not current and not keep:
+                self._active = best
+                print(f"[{self.name}] routing over {best.name} link {best!r}")
+
+    # ------------ Requests ------------ #
+
+    def get(self, endpoint: str, path: str, **kwargs) -> requests.Response:
+        """
+        GoProHttpClient.get() over the active link. If the request cannot reach
+        the camera, the link is marked down and the next healthy link is tried
+        (for a shutter only if the camera cannot have received it, see may_resend).
+        """
+        tried = []
+        while True:
+            link = self._active
+            tried.append(link)
+            try:
+                return link.client.get(endpoint, path, **kwargs)
+            except requests.exceptions.ConnectionError as e:
+                if not self._fail_over(link, endpoint, e, tried):
+                    raise
+
+    def submit(self, endpoint: str, path: str, **kwargs) -> Future:
+        """
+        GoProHttpClient.submit() over the active link: returns a Future right away.
+        Fails over like get(), by queueing the request again on the next healthy link.
+        """
+        result = Future()
+        tried = []
+
+        def attempt():
+            link = self._active
+            tried.append(link)
+            link.client.submit(endpoint, path, **kwargs).add_done_callback(lambda sent: done(link, sent))
+
+        def done(link: Link, sent: Future):
+            error = sent.exception()
+            if isinstance(error, requests.exceptions.ConnectionError) and self._fail_over(link, endpoint, error, tried):
+                attempt()
+            elif error is not None:
+                result.set_exception(error)
+            else:
+                result.set_result(sent.result())
+
+        attempt()
+        return result
+
+    def _fail_over(self, link: Link, endpoint: str, error: requests.exceptions.ConnectionError,
+                   tried: list) -> bool:
+        """Mark `link` down after `error`. True if the request may be sent again over the new active link."""
+        link.healthy = False
+        link.failures += 1
+        self._select(exclude=link)
+        if self._active in tried or not may_resend(endpoint, error):
+            return False
+        self.failovers += 1
+        print(f"[{self.name}] ⚠ {link.name} link failed, failing over to {self._active.name}")
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "active": self._active.name,
+            "failovers": self.failovers,
+            "links": {link.name: {"base_url": link.base_url, "healthy": link.healthy,
+                                  "rtt": link.rtt, "failures": link.failures}
+                      for link in self.links},
+        }
+
+    def close(self):
+        self.queue.close()
+        for link in self.links:
+            link.client.pool.release(link.base_url)
@@ -0,0 +1,35 @@
+"""
+Configuration for the shared LSL marker service.
+"""
+
+# One LSL marker stream per key; MarkerSender(stream=<key>) pushes into it.
+# chunk_size: samples liblsl groups per network transfer (0 = send every chunk at once)
+# max_buffered: seconds of markers the outlet keeps for consumers that connect late
+# pulse_name: companion numeric stream (seq, local_clock, beat index) for heartbeats and sync pulses (None = off)
+MARKER_STREAMS = {
+    "gopro": {"name": "GOPRO_MARKERS", "source_id": "gopro_rpi_agent", "chunk_size": 0, "max_buffered": 360,
+              "pulse_name": "GOPRO_PULSES"},
+    "motion": {"name": "MOTION_MARKERS", "source_id": "motion_capture_agent", "chunk_size": 0, "max_buffered": 360,
+               "pulse_name": "MOTION_PULSES"},
+}
+
+MARKER_DRAIN_BATCH = 256        # markers pushed per push_chunk call at most
+MARKER_DRAIN_IDLE_WAIT = 0.5    # seconds the drain thread sleeps between wake-ups when idle
+MARKER_LOG = True               # log every pushed marker through the async logger (src.log)
+
+# === Heartbeat scheduler ===
+HEARTBEAT_SPIN = 0.002                 # seconds before each beat spent spinning instead of sleeping
+HEARTBEAT_CATCH_UP = "skip"            # missed beats: "skip" to the next slot, or "burst" to send them late
+HEARTBEAT_MAX_BURST = 10               # "burst": at most this many missed beats are sent at once
+HEARTBEAT_REALTIME_PRIORITY = None     # SCHED_FIFO priority (1-99) for the beat thread; None = normal
+# Histogram bin edges in microseconds: lateness of each beat, and error of each beat-to-beat interval
+HEARTBEAT_JITTER_BINS_US = (0, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+HEARTBEAT_DRIFT_BINS_US = (-5000, -1000, -250, -50, 50, 250, 1000, 5000)
+HEARTBEAT_DIAGNOSTICS_STREAM = None    # LSL stream with per-beat lateness/interval error (None = off)
+
+# === Marker journal ===
+# Every pushed marker is also appended to <MARKER_JOURNAL_DIR>/<stream key>_markers.journal
+MARKER_JOURNAL_DIR = "sessions"              # None = no journal
+MARKER_JOURNAL_GROW = 1024 * 1024            # bytes the memory-mapped file grows by when full
+MARKER_JOURNAL_FSYNC_INTERVAL = 0.2          # seconds an appended marker may wait before it is flushed to disk
+MARKER_JOURNAL_FSYNC_BATCH = 32              # flush as soon as this many markers are waiting
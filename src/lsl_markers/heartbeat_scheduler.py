@@ -0,0 +1,248 @@
+"""
+High-precision heartbeat scheduler.
+
+Beats are due at fixed local_clock() slots t0 + index * interval, so timing
+errors never accumulate. Each wake-up sleeps until HEARTBEAT_SPIN before the
+slot and spins for the rest, which removes most of the sleep overshoot of a
+loaded Raspberry Pi; the beat thread can optionally run with SCHED_FIFO
+real-time priority where the OS permits it.
+
+Every emitted beat carries:
+  seq    -> count of beats emitted (gap-free)
+  index  -> slot number (jumps when beats are skipped)
+  time   -> local_clock() at emission
+
+If the thread wakes up more than one interval late, the missed slots are
+either skipped ("skip") or sent back to back ("burst", at most
+HEARTBEAT_MAX_BURST). Lateness (jitter) and beat-to-beat interval error
+(drift) are collected in histograms for stats() and can be pushed per beat
+to an LSL diagnostics stream.
+"""
+
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+from pylsl import StreamInfo, StreamOutlet, local_clock
+
+from src.lsl_markers.config import (
+    HEARTBEAT_SPIN,
+    HEARTBEAT_CATCH_UP,
+    HEARTBEAT_MAX_BURST,
+    HEARTBEAT_REALTIME_PRIORITY,
+    HEARTBEAT_JITTER_BINS_US,
+    HEARTBEAT_DRIFT_BINS_US,
+    HEARTBEAT_DIAGNOSTICS_STREAM,
+)
+
+CATCH_UP_POLICIES = ("skip", "burst")
+
+
+@dataclass
+class Beat:
+    """One emitted heartbeat (times in local_clock() seconds)."""
+    seq: int
+    index: int
+    scheduled: float
+    time: float
+
+    @property
+    def late(self) -> float:
+        return self.time - self.scheduled
+
+
+class Histogram:
+    """Counts of values (seconds) in microsecond bins; the first/last bins catch under/overflow."""
+
+    def __init__(self, edges_us):
+        self.edges_us = tuple(edges_us)
+        self.counts = [0] * (len(self.edges_us) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, seconds: float):
+        us = seconds * 1e6
+        i = 0
+        while i < len(self.edges_us) and us >= self.edges_us[i]:
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.total += seconds
+        self.total_sq += seconds * seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    def to_dict(self) -> dict:
+        mean = self.total / self.count if self.count else None
+        std = math.sqrt(max(0.0, self.total_sq / self.count - mean * mean)) if self.count else None
+        return {"edges_us": list(self.edges_us), "counts": list(self.counts),
+                "count": self.count, "mean": mean, "std": std, "min": self.min, "max": self.max}
+
+
+def set_realtime_priority(priority: int) -> bool:
+    """Give the calling thread SCHED_FIFO `priority`. Returns False where not permitted/supported."""
+    try:
+        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(priority))
+        return True
+    except (AttributeError, OSError) as e:   # not Linux, or no CAP_SYS_NICE / rtprio limit
+        print(f"[Heartbeat] ⚠ real-time priority {priority} unavailable: {e}")
+        return False
+
+
+class HeartbeatDiagnostics:
+    """LSL stream with one sample per beat: seq, index, lateness (s), interval error (s)."""
+
+    CHANNELS = ("seq", "index", "late", "interval_error")
+
+    def __init__(self, stream_name: str, interval: float, source_id: str | None = None):
+        self.info = StreamInfo(name=stream_name, type="Diagnostics", channel_count=len(self.CHANNELS),
+                               nominal_srate=1.0 / interval, channel_format="double64",
+                               source_id=source_id or f"{stream_name}_diag")
+        channels = self.info.desc().append_child("channels")
+        for channel in self.CHANNELS:
+            channels.append_child("channel").append_child_value("label", channel)
+        self.outlet = StreamOutlet(self.info)
+
+    def push(self, beat: Beat, interval_error: float | None):
+        self.outlet.push_sample([beat.seq, beat.index, beat.late,
+                                 math.nan if interval_error is None else interval_error], beat.time)
+
+
+class HeartbeatScheduler:
+    def __init__(self, interval: float, callback, name: str = "heartbeat",
+                 spin: float = HEARTBEAT_SPIN, catch_up: str = HEARTBEAT_CATCH_UP,
+                 max_burst: int = HEARTBEAT_MAX_BURST, realtime_priority: int | None = HEARTBEAT_REALTIME_PRIORITY,
+                 diagnostics_stream: str | None = HEARTBEAT_DIAGNOSTICS_STREAM):
+        """
+        interval: seconds between beats
+        callback: callback(beat: Beat), called on the beat thread (keep it fast)
+        spin: seconds before each slot spent spinning instead of sleeping
+        catch_up: "skip" or "burst" for slots missed by a late wake-up
+        realtime_priority: SCHED_FIFO priority for the beat thread (None = normal scheduling)
+        diagnostics_stream: LSL stream name for per-beat diagnostics (None = off)
+        """
+        if catch_up not in CATCH_UP_POLICIES:
+            raise ValueError(f"Unknown catch-up policy {catch_up!r} (expected one of {CATCH_UP_POLICIES})")
+        self.interval = interval
+        self.callback = callback
+        self.name = name
+        self.spin = spin
+        self.catch_up = catch_up
+        self.max_burst = max_burst
+        self.realtime_priority = realtime_priority
+        self.diagnostics_stream = diagnostics_stream
+        self.realtime = False
+        self._reset()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _reset(self):
+        self.seq = 0
+        self.missed = 0
+        self.burst = 0
+        self.first = None
+        self.last = None
+        self.jitter = Histogram(HEARTBEAT_JITTER_BINS_US)
+        self.drift = Histogram(HEARTBEAT_DRIFT_BINS_US)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    # ------------ Beat thread ------------ #
+
+    def _wait_until(self, deadline: float) -> bool:
+        """Sleep, then spin, until `deadline`. Returns False if stopped meanwhile."""
+        remaining = deadline - local_clock()
+        if remaining > self.spin and self._stop.wait(remaining - self.spin):
+            return False
+        while local_clock() < deadline:
+            time.sleep(0)   # yield the GIL while spinning
+        return not self._stop.is_set()
+
+    def _emit(self, index: int, scheduled: float, diagnostics: HeartbeatDiagnostics | None):
+        beat = Beat(seq=self.seq, index=index, scheduled=scheduled, time=local_clock())
+        self.seq += 1
+        interval_error = None
+        if self.last is not None:
+            interval_error = (beat.time - self.last.time) - (index - self.last.index) * self.interval
+            self.drift.add(interval_error)
+        self.jitter.add(beat.late)
+        if self.first is None:
+            self.first = beat
+        self.last = beat
+        try:
+            self.callback(beat)
+        except Exception as e:
+            print(f"[Heartbeat] {self.name} callback error: {e}")
+        if diagnostics is not None:
+            diagnostics.push(beat, interval_error)
+
+    def _loop(self):
+        if self.realtime_priority is not None:
+            self.realtime = set_realtime_priority(self.realtime_priority)
+        diagnostics = None
+        if self.diagnostics_stream:
+            try:
+                diagnostics = HeartbeatDiagnostics(self.diagnostics_stream, self.interval)
+            except Exception as e:
+                print(f"[Heartbeat] Diagnostics stream unavailable: {e}")
+
+        start = local_clock()
+        index = 0
+        while self._wait_until(start + index * self.interval):
+            behind = int((local_clock() - start) / self.interval) - index
+            if behind > 0:
+                if self.catch_up == "burst":
+                    sent = min(behind, self.max_burst)
+                    for slot in range(index, index + sent):
+                        self._emit(slot, start + slot * self.interval, diagnostics)
+                    self.burst += sent
+                    self.missed += behind - sent
+                else:
+                    self.missed += behind
+                index += behind
+            self._emit(index, start + index * self.interval, diagnostics)
+            index += 1
+
+    def start(self):
+        if self.running:
+            return
+        self._reset()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True, name=self.name)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    # ------------ Metrics ------------ #
+
+    @property
+    def drift_ppm(self) -> float | None:
+        """Mean beat rate error over the whole run, from the first and last beat."""
+        first, last = self.first, self.last
+        if first is None or last is None or last.index == first.index:
+            return None
+        return ((last.time - first.time) / ((last.index - first.index) * self.interval) - 1) * 1e6
+
+    def stats(self) -> dict:
+        return {
+            "interval": self.interval,
+            "beats": self.seq,
+            "missed": self.missed,
+            "burst": self.burst,
+            "catch_up": self.catch_up,
+            "realtime": self.realtime,
+            "drift_ppm": self.drift_ppm,
+            "jitter": self.jitter.to_dict(),
+            "interval_error": self.drift.to_dict(),
+        }
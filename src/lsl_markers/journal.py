@@ -0,0 +1,334 @@
+"""
+Durable marker journal.
+
+A marker pushed while no recorder is connected (and older than the outlet's
+max_buffered) is gone from LSL. The marker service therefore also appends
+every marker it pushes to a local, append-only journal file:
+
+  - the file is memory-mapped and grown in MARKER_JOURNAL_GROW steps; the
+    drain thread writes records into the map, and flushes (msync) in batches,
+    every MARKER_JOURNAL_FSYNC_BATCH records or MARKER_JOURNAL_FSYNC_INTERVAL
+    seconds, whichever comes first
+  - every record carries its LSL timestamp, the wall time, the stream key,
+    the session it belongs to and the writer's epoch, plus a CRC
+  - each writer open starts a new epoch: local_clock() restarts with the host,
+    so LSL timestamps are only compared within one epoch
+  - corrupt bytes are copied to "<path>.corrupt" before they are cleared: a
+    corrupt record in the middle is skipped and the scan resumes at the next
+    valid record; a torn record at the end (power loss mid-write) is
+    overwritten by the next append
+  - one writer per file: a writer holds an exclusive lock on it (flock, or
+    msvcrt on Windows), so a second process journaling the same stream key
+    fails to open instead of overwriting records; readers take no lock
+  - on open the file is scanned once to rebuild an index by session and by
+    (epoch, timestamp), so find(session, start, end) does not rescan the file
+
+Journaled markers can be re-emitted to a late consumer (replay) or merged into
+an XDF recording (see xdf_merge.py and src/scripts/marker_journal.py).
+"""
+
+import bisect
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+
+from pylsl import StreamInfo, StreamOutlet, local_clock
+
+from src.log.logger import logger
+from src.lsl_markers.config import (
+    MARKER_STREAMS,
+    MARKER_JOURNAL_GROW,
+    MARKER_JOURNAL_FSYNC_INTERVAL,
+    MARKER_JOURNAL_FSYNC_BATCH,
+)
+
+MAGIC = b"LSLMJRN\x02"
+HEADER_SIZE = 16
+# size, crc32 of everything after it, epoch, LSL timestamp, wall time, stream key length, session length
+RECORD = struct.Struct("<IIIddHH")
+WINDOWS_LOCK_OFFSET = 0x7FFFFFFE   # byte locked by msvcrt, past any data so mapped reads are unaffected
+
+
+class JournalLockedError(RuntimeError):
+    """Another process has the journal open for writing."""
+
+
+def _lock_exclusive(file, path: str):
+    """Take a non-blocking exclusive lock on `file` for this writer (released when it is closed)."""
+    try:
+        import fcntl
+    except ImportError:
+        import msvcrt
+        try:
+            file.seek(WINDOWS_LOCK_OFFSET)
+            msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            raise JournalLockedError(f"{path} is already open for writing by another process") from None
+        finally:
+            file.seek(0)
+        return
+    try:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        raise JournalLockedError(f"{path} is already open for writing by another process") from None
+
+
+@dataclass
+class JournalRecord:
+    stream: str
+    marker: str
+    timestamp: float   # LSL local_clock() time the marker carries
+    wall: float        # Unix time it was journaled
+    session: str | None
+    epoch: int         # writer run it was journaled in (timestamps compare within one epoch)
+    offset: int
+
+
+class MarkerJournal:
+    def __init__(self, path: str, readonly: bool = False, grow: int = MARKER_JOURNAL_GROW,
+                 fsync_interval: float = MARKER_JOURNAL_FSYNC_INTERVAL,
+                 fsync_batch: int = MARKER_JOURNAL_FSYNC_BATCH):
+        """
+        path: journal file, created if missing (unless readonly)
+        readonly: open an existing journal for lookups only (e.g. while the agent is writing it)
+        Raises JournalLockedError if another writer has the file open.
+        """
+        self.path = path
+        self.readonly = readonly
+        self.grow = grow
+        self.fsync_interval = fsync_interval
+        self.fsync_batch = fsync_batch
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._synced_at = time.monotonic()
+        self.syncs = 0
+        self.skipped = 0   # corrupt bytes skipped while scanning
+        # Index: sorted (epoch, timestamp, offset) overall and per session
+        self._all = []
+        self._sessions = {}
+
+        if readonly:
+            self._file = open(path, "rb")
+            size = os.fstat(self._file.fileno()).st_size
+            self._map = mmap.mmap(self._file.fileno(), size, access=mmap.ACCESS_READ) if size else None
+        else:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(path, "r+b" if os.path.exists(path) else "w+b")
+            try:
+                _lock_exclusive(self._file, path)
+            except JournalLockedError:
+                self._file.close()
+                raise
+            if os.fstat(self._file.fileno()).st_size < HEADER_SIZE:
+                self._file.truncate(max(grow, HEADER_SIZE))
+            self._map = mmap.mmap(self._file.fileno(), 0)
+            if self._map[:len(MAGIC)] != MAGIC:
+                if any(self._map[:HEADER_SIZE]):
+                    raise ValueError(f"{path} is not a marker journal")
+                self._map[:len(MAGIC)] = MAGIC
+        if self._map is not None and self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a marker journal")
+        self._end = self._scan()
+        # Writers start a new epoch; readers look up the latest one by default
+        latest = self._all[-1][0] if self._all else 0
+        self.epoch = latest if readonly else latest + 1
+        data_end = self._data_end()
+        if not readonly and data_end > self._end:
+            # Torn record after a crash: cleared so stale bytes can never pass for a record later
+            logger.log(f"[Journal] {path}: partial record at offset {self._end} "
+                       f"({data_end - self._end} bytes) moved to {path}.corrupt")
+            self._set_aside(self._end, data_end)
+
+    def __len__(self):
+        return len(self._all)
+
+    def __repr__(self):
+        return f"<MarkerJournal {self.path} records={len(self)} sessions={len(self._sessions)}>"
+
+    # ------------ Reading ------------ #
+
+    def _read(self, offset: int) -> tuple[JournalRecord, int] | None:
+        """Record at `offset` and the offset after it, or None at the end / a torn record."""
+        buf = self._map
+        if buf is None or offset + RECORD.size > len(buf):
+            return None
+        size, crc, epoch, timestamp, wall, key_len, session_len = RECORD.unpack_from(buf, offset)
+        if size < RECORD.size or offset + size > len(buf):
+            return None
+        if zlib.crc32(buf[offset + 8:offset + size]) != crc:
+            return None
+        pos = offset + RECORD.size
+        key = buf[pos:pos + key_len].decode("utf-8")
+        pos += key_len
+        session = buf[pos:pos + session_len].decode("utf-8") if session_len else None
+        pos += session_len
+        marker = buf[pos:offset + size].decode("utf-8")
+        return JournalRecord(key, marker, timestamp, wall, session, epoch, offset), offset + size
+
+    def _index(self, epoch: int, timestamp: float, offset: int, session: str | None):
+        entry = (epoch, timestamp, offset)
+        bisect.insort(self._all, entry)
+        bisect.insort(self._sessions.setdefault(session, []), entry)
+
+    def _data_end(self) -> int:
+        """Offset after the last non-zero byte (the file is grown with zeros)."""
+        buf = self._map
+        end = len(buf) if buf is not None else HEADER_SIZE
+        while end > HEADER_SIZE:
+            start = max(HEADER_SIZE, end - 65536)
+            data = buf[start:end].rstrip(b"\0")
+            if data:
+                return start + len(data)
+            end = start
+        return HEADER_SIZE
+
+    def _scan(self) -> int:
+        """Index every valid record; returns the offset after the last one."""
+        offset = HEADER_SIZE
+        data_end = None
+        while True:
+            result = self._read(offset)
+            if result is not None:
+                record, next_offset = result
+                self._index(record.epoch, record.timestamp, offset, record.session)
+                offset = next_offset
+                continue
+            if data_end is None:
+                data_end = self._data_end()
+            # Resume at the next valid record; with none left this is the end (or a torn tail)
+            resume = next((pos for pos in range(offset + 1, data_end) if self._read(pos) is not None), None)
+            if resume is None:
+                return offset
+            self._skip_corrupt(offset, resume)
+            offset = resume
+
+    def _skip_corrupt(self, start: int, end: int):
+        """Corrupt bytes between valid records: keep a copy next to the journal and clear them."""
+        if not any(self._map[start:end]):
+            return   # cleared on an earlier open
+        self.skipped += end - start
+        logger.log(f"[Journal] ⚠ {self.path}: skipping {end - start} corrupt byte(s) at offset {start}")
+        if not self.readonly:
+            self._set_aside(start, end)
+
+    def _set_aside(self, start: int, end: int):
+        """Append bytes [start, end) to <path>.corrupt, then clear them so the next open does not copy them again."""
+        with open(f"{self.path}.corrupt", "ab") as f:
+            f.write(self._map[start:end])
+            f.flush()
+            os.fsync(f.fileno())
+        self._map[start:end] = bytes(end - start)
+        self._map.flush()
+
+    def sessions(self) -> list[str]:
+        """Session ids in the journal, in order of their first marker."""
+        with self._lock:
+            return [session for session, entries in sorted(self._sessions.items(), key=lambda item: item[1][0])
+                    if session is not None]
+
+    def epochs(self) -> list[int]:
+        """Epochs (writer runs) with at least one record, oldest first."""
+        with self._lock:
+            return sorted({epoch for epoch, _, _ in self._all})
+
+    def find(self, session: str | None = None, start: float | None = None, end: float | None = None,
+             stream: str | None = None, epoch: int | None = None) -> list[JournalRecord]:
+        """
+        Records ordered by epoch and timestamp, optionally limited to one
+        session, one epoch, a [start, end] LSL time range and one stream key.
+        A time range applies within one epoch: `epoch`, else the latest epoch
+        of the selected records (the session's, or the current one).
+        """
+        with self._lock:
+            entries = self._all if session is None else self._sessions.get(session, [])
+            if start is not None or end is not None:
+                if epoch is None:
+                    epoch = entries[-1][0] if entries else self.epoch
+                lo = bisect.bisect_left(entries, (epoch, -float("inf") if start is None else start))
+                hi = bisect.bisect_right(entries, (epoch, float("inf") if end is None else end, float("inf")))
+            elif epoch is not None:
+                lo, hi = bisect.bisect_left(entries, (epoch,)), bisect.bisect_left(entries, (epoch + 1,))
+            else:
+                lo, hi = 0, len(entries)
+            records = [self._read(offset)[0] for _, _, offset in entries[lo:hi]]
+        return [record for record in records if stream is None or record.stream == stream]
+
+    # ------------ Writing ------------ #
+
+    def append(self, stream: str, marker: str, timestamp: float, session: str | None = None):
+        """Append one record (drain thread). Flushed to disk in batches, see sync()."""
+        key = stream.encode("utf-8")
+        session_bytes = (session or "").encode("utf-8")
+        body = key + session_bytes + marker.encode("utf-8")
+        size = RECORD.size + len(body)
+        with self._lock:
+            if self.readonly:
+                raise ValueError(f"{self.path} is open read-only")
+            if self._end + size > len(self._map):
+                self._grow(self._end + size)
+            record = bytearray(RECORD.pack(size, 0, self.epoch, timestamp, time.time(), len(key),
+                                           len(session_bytes)) + body)
+            struct.pack_into("<I", record, 4, zlib.crc32(record[8:]))
+            self._map[self._end:self._end + size] = record
+            self._index(self.epoch, timestamp, self._end, session)
+            self._end += size
+            self._unsynced += 1
+        self.sync(force=False)
+
+    def _grow(self, needed: int):
+        self._map.flush()
+        self._map.close()
+        new_size = max(needed, os.fstat(self._file.fileno()).st_size + self.grow)
+        self._file.truncate(new_size)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+
+    def sync(self, force: bool = True):
+        """Flush appended records to disk; without force only if a batch is full or overdue."""
+        with self._lock:
+            if self.readonly or not self._unsynced:
+                return
+            due = self._unsynced >= self.fsync_batch or time.monotonic() - self._synced_at >= self.fsync_interval
+            if not (force or due):
+                return
+            self._map.flush()
+            self._unsynced = 0
+            self._synced_at = time.monotonic()
+            self.syncs += 1
+
+    def close(self):
+        self.sync()
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._file.close()
+
+
+def replay(records: list[JournalRecord], stream: str, wait: float = 10.0) -> int:
+    """
+    Re-emit journaled markers of `stream` (a MARKER_STREAMS key) with their
+    original timestamps on a "<name>_REPLAY" outlet, once a consumer connects.
+    Returns how many markers were pushed (0 if nobody connected within `wait` seconds).
+    """
+    config = MARKER_STREAMS[stream]
+    records = [record for record in records if record.stream == stream]
+    if not records:
+        return 0
+    info = StreamInfo(name=f"{config['name']}_REPLAY", type="Markers", channel_count=1, nominal_srate=0,
+                      channel_format="string", source_id=f"{config['source_id']}_replay")
+    info.desc().append_child_value("replayed_at", f"{local_clock():.6f}")
+    outlet = StreamOutlet(info)
+    print(f"[Journal] Waiting up to {wait:.0f} s for a consumer of {info.name()}...")
+    if not outlet.wait_for_consumers(wait):
+        print(f"[Journal] ⚠ nobody connected to {info.name()}, nothing replayed")
+        return 0
+    outlet.push_chunk([[record.marker] for record in records], [record.timestamp for record in records])
+    time.sleep(0.5)   # let the consumer pull before the outlet goes away
+    print(f"[Journal] ✔ replayed {len(records)} marker(s) on {info.name()}")
+    return len(records)
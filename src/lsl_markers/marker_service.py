@@ -0,0 +1,356 @@
+"""
+Shared, non-blocking LSL marker service.
+
+Callers never touch an LSL outlet directly. send_marker() stamps the marker
+with local_clock() at call time and appends it to the stream's deque (an
+atomic, lock-free append), so it returns in microseconds even from an MQTT
+callback or a capture thread. One drain thread per process empties every
+stream's deque and pushes what it found with a single push_chunk call
+carrying the original per-marker timestamps; marker listeners and logging
+run on that thread as well.
+
+Streams are configured per key in config.MARKER_STREAMS (name, source_id,
+buffering) and created on first use. Every stream counts pushed markers,
+chunks, queue depth and push latency (call time -> marker handed to liblsl).
+
+Before a chunk is pushed its markers are appended to the stream's durable
+journal (journal.py), tagged with the current session, so markers sent while
+no recorder was connected can be replayed or merged into the XDF later.
+
+A stream with a pulse_name also gets a numeric companion (PulseStream):
+heartbeats and sync pulses as double64 samples instead of string labels, so
+recorders can check loss and jitter without parsing strings.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from pylsl import StreamInfo, StreamOutlet, local_clock
+
+from src.lsl_markers.config import MARKER_STREAMS, MARKER_DRAIN_BATCH, MARKER_DRAIN_IDLE_WAIT, MARKER_LOG
+from src.lsl_markers.config import MARKER_JOURNAL_DIR
+from src.lsl_markers.journal import MarkerJournal
+from src.lsl_markers.heartbeat_scheduler import Beat, HeartbeatScheduler
+from src.log.logger import logger
+
+
+@dataclass
+class MarkerStreamConfig:
+    name: str
+    source_id: str
+    stream_type: str = "Markers"
+    chunk_size: int = 0        # samples per network transfer (0 = whatever each push_chunk holds)
+    max_buffered: int = 360    # seconds kept for consumers that connect late
+    pulse_name: str | None = None   # numeric heartbeat/sync pulse stream
+
+
+class PulseStream:
+    """
+    Numeric heartbeat / sync pulse stream, 3 double64 channels per sample:
+      seq          -> gap-free sample counter (a jump means lost samples)
+      local_clock  -> sender's local_clock() at the pulse, kept even if a recorder dejitters timestamps
+      beat_index   -> heartbeat slot number, -1 for sync pulses outside the beat schedule
+    All channels are double64 (LSL has one format per stream; counters stay exact up to 2**53).
+    """
+
+    CHANNELS = ("seq", "local_clock", "beat_index")
+
+    def __init__(self, name: str, source_id: str):
+        self.info = StreamInfo(name=name, type="Pulses", channel_count=len(self.CHANNELS),
+                               nominal_srate=0, channel_format="double64", source_id=source_id)
+        channels = self.info.desc().append_child("channels")
+        for channel in self.CHANNELS:
+            channels.append_child("channel").append_child_value("label", channel)
+        self.outlet = StreamOutlet(self.info)
+        self.seq = 0
+        self._lock = threading.Lock()   # heartbeat thread and callers share the counter
+
+    def push(self, timestamp: float, beat_index: int = -1) -> int:
+        """Push one pulse stamped `timestamp`. Returns its sequence number."""
+        with self._lock:
+            seq = self.seq
+            self.seq += 1
+            self.outlet.push_sample([seq, timestamp, beat_index], timestamp)
+        return seq
+
+
+class MarkerStream:
+    """One string marker outlet fed through a lock-free deque."""
+
+    def __init__(self, key: str, config: MarkerStreamConfig, journal_dir: str | None = MARKER_JOURNAL_DIR):
+        self.key = key
+        self.config = config
+        self.session = None     # session id journaled with every marker queued from now on
+        self.journal = None
+        if journal_dir:
+            try:
+                self.journal = MarkerJournal(os.path.join(journal_dir, f"{key}_markers.journal"))
+            except (OSError, ValueError) as e:
+                print(f"[LSL] ⚠ {config.name}: marker journal unavailable: {e}")
+        self.info = StreamInfo(name=config.name, type=config.stream_type, channel_count=1,
+                               nominal_srate=0, channel_format="string", source_id=config.source_id)
+        self.outlet = StreamOutlet(self.info, chunk_size=config.chunk_size, max_buffered=config.max_buffered)
+        self.pulses = PulseStream(config.pulse_name, f"{config.source_id}_pulses") if config.pulse_name else None
+        self._queue = deque()   # (marker, timestamp, queued_at, session)
+        self._listeners = []
+        self._wake = None       # set by the service: called after every append
+
+        # Counters, written by the drain thread only
+        self.pushed = 0
+        self.chunks = 0
+        self.max_depth = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.errors = 0
+
+    def __repr__(self):
+        return f"<MarkerStream {self.key} name={self.config.name} depth={self.depth}>"
+
+    @property
+    def depth(self) -> int:
+        """Markers queued but not yet pushed."""
+        return len(self._queue)
+
+    def push(self, marker: str, timestamp: float | None = None) -> float:
+        """
+        Queue a marker. Never blocks on LSL.
+        timestamp: local_clock() time to stamp the marker with (defaults to now)
+        Returns the timestamp the marker carries.
+        """
+        queued_at = local_clock()
+        timestamp = queued_at if timestamp is None else timestamp
+        self._queue.append((marker, timestamp, queued_at, self.session))
+        if self._wake is not None:
+            self._wake()
+        return timestamp
+
+    def subscribe(self, listener):
+        """listener(marker, timestamp) is called on the drain thread after each marker is pushed."""
+        self._listeners.append(listener)
+
+    def drain(self, limit: int = MARKER_DRAIN_BATCH) -> int:
+        """Push up to `limit` queued markers as one chunk (drain thread). Returns how many."""
+        depth = len(self._queue)
+        if not depth:
+            return 0
+        self.max_depth = max(self.max_depth, depth)
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.popleft())
+            except IndexError:
+                break
+        if self.journal is not None:
+            # Journal first: a marker the outlet fails to push is still on disk
+            try:
+                for marker, timestamp, _, session in batch:
+                    self.journal.append(self.key, marker, timestamp, session)
+            except (OSError, ValueError) as e:
+                print(f"[LSL] ⚠ {self.config.name}: journal write failed: {e}")
+        try:
+            self.outlet.push_chunk([[marker] for marker, _, _, _ in batch], [t for _, t, _, _ in batch])
+        except Exception as e:
+            self.errors += 1
+            print(f"[LSL] {self.config.name}: push_chunk failed, {len(batch)} marker(s) lost: {e}")
+            return len(batch)
+        pushed_at = local_clock()
+        self.pushed += len(batch)
+        self.chunks += 1
+        for marker, timestamp, queued_at, _ in batch:
+            latency = pushed_at - queued_at
+            self.latency_total += latency
+            self.latency_max = max(self.latency_max, latency)
+            if MARKER_LOG:
+                logger.log(f"[LSL] {self.config.name}: {marker} @ {timestamp:.6f}")
+            for listener in list(self._listeners):
+                try:
+                    listener(marker, timestamp)
+                except Exception as e:
+                    print(f"[LSL] marker listener error: {e}")
+        return len(batch)
+
+    def stats(self) -> dict:
+        return {
+            "name": self.config.name,
+            "source_id": self.config.source_id,
+            "pushed": self.pushed,
+            "chunks": self.chunks,
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "push_latency_mean": self.latency_total / self.pushed if self.pushed else None,
+            "push_latency_max": self.latency_max,
+            "errors": self.errors,
+            "pulses": None if self.pulses is None else self.pulses.seq,
+            "journaled": None if self.journal is None else len(self.journal),
+        }
+
+
+class MarkerService:
+    """Owns every MarkerStream of the process and the thread that drains them."""
+
+    def __init__(self, streams: dict | None = None):
+        """streams: key -> MarkerStreamConfig fields (defaults to config.MARKER_STREAMS)"""
+        self.configs = dict(MARKER_STREAMS if streams is None else streams)
+        self.streams = {}
+        self._lock = threading.Lock()
+        self._event = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def stream(self, key: str) -> MarkerStream:
+        """The stream configured under `key`, created (and the drain thread started) on first use."""
+        stream = self.streams.get(key)
+        if stream is not None:
+            return stream
+        with self._lock:
+            if key not in self.streams:
+                if key not in self.configs:
+                    raise KeyError(f"Unknown marker stream {key!r} (known: {', '.join(self.configs)})")
+                stream = MarkerStream(key, MarkerStreamConfig(**self.configs[key]))
+                stream._wake = self._wake
+                self.streams[key] = stream
+            self._start()
+            return self.streams[key]
+
+    def _wake(self):
+        if not self._event.is_set():
+            self._event.set()
+
+    # ------------ Drain thread ------------ #
+
+    def _drain_all(self) -> int:
+        return sum(stream.drain() for stream in list(self.streams.values()))
+
+    def _sync_journals(self, force: bool = False):
+        for stream in list(self.streams.values()):
+            if stream.journal is not None:
+                stream.journal.sync(force)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self._event.wait(MARKER_DRAIN_IDLE_WAIT)
+            self._event.clear()
+            while self._drain_all():
+                pass
+            self._sync_journals()   # flush a partial batch once its interval is over
+        while self._drain_all():   # whatever arrived before close()
+            pass
+        self._sync_journals(force=True)
+
+    def _start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True, name="lsl-markers")
+        self._thread.start()
+
+    def flush(self, timeout: float = 1.0) -> bool:
+        """Wait until every queued marker was pushed. Returns False on timeout."""
+        deadline = time.monotonic() + timeout
+        while any(stream.depth for stream in list(self.streams.values())):
+            if time.monotonic() > deadline:
+                return False
+            self._wake()
+            time.sleep(0.001)
+        return True
+
+    def close(self):
+        """Push what is still queued and stop the drain thread."""
+        self._stop.set()
+        self._event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {key: stream.stats() for key, stream in self.streams.items()}
+
+
+# Shared service used by every MarkerSender
+marker_service = MarkerService()
+
+
+class MarkerSender:
+    """Marker stream handle with optional periodic heartbeat markers (see heartbeat_scheduler)."""
+
+    def __init__(self, stream: str = "gopro", heartbeat_hz: float = 1.0,
+                 service: MarkerService = marker_service):
+        """
+        stream: key in config.MARKER_STREAMS
+        heartbeat_hz: rate of the HB_<seq> markers while the heartbeat runs
+        """
+        self.stream = service.stream(stream)
+        self.service = service
+        self.heartbeat_hz = heartbeat_hz
+        self._heartbeat = None
+
+    def send_marker(self, marker: str, timestamp: float | None = None) -> float:
+        """
+        Send a single LSL event marker without blocking.
+        timestamp: local_clock() time to stamp the marker with (defaults to now)
+        Returns the marker's timestamp.
+        """
+        return self.stream.push(marker, timestamp)
+
+    def pulse(self, timestamp: float | None = None) -> float:
+        """
+        Push a sync pulse on the numeric pulse stream (beat index -1), if the stream has one.
+        timestamp: local_clock() time of the pulse (defaults to now)
+        """
+        timestamp = local_clock() if timestamp is None else timestamp
+        if self.stream.pulses is not None:
+            self.stream.pulses.push(timestamp)
+        return timestamp
+
+    def subscribe(self, listener):
+        """listener(marker, timestamp) is called after every marker is pushed (on the drain thread)."""
+        self.stream.subscribe(listener)
+
+    def stats(self) -> dict:
+        return self.stream.stats()
+
+    def begin_session(self, session_id: str):
+        """Journal every marker sent from now on under `session_id`."""
+        self.stream.session = session_id
+
+    def end_session(self):
+        self.stream.session = None
+
+    # ------------ HEARTBEAT ------------ #
+
+    def _beat(self, beat: Beat):
+        self.send_marker(f"HB_{beat.seq}", beat.time)   # Heartbeat marker, stamped at emission
+        if self.stream.pulses is not None:
+            self.stream.pulses.push(beat.time, beat.index)
+
+    def start_heartbeat(self):
+        """Start the background periodic heartbeat marker."""
+        if self._heartbeat is not None and self._heartbeat.running:
+            print("[LSL] Heartbeat already running.")
+            return
+
+        print("[LSL] Starting heartbeat...")
+        self._heartbeat = HeartbeatScheduler(1.0 / self.heartbeat_hz, self._beat,
+                                             name=f"heartbeat-{self.stream.key}")
+        self._heartbeat.start()
+
+    def stop_heartbeat(self):
+        """Stop the heartbeat."""
+        if self._heartbeat is None or not self._heartbeat.running:
+            print("[LSL] Heartbeat was not running.")
+            return
+
+        print("[LSL] Stopping heartbeat...")
+        self._heartbeat.stop()
+        stats = self._heartbeat.stats()
+        jitter = stats["jitter"]
+        if jitter["count"]:
+            print(f"[LSL] Heartbeat: {stats['beats']} beats, {stats['missed']} missed, "
+                  f"lateness mean {jitter['mean'] * 1e6:.0f} us / max {jitter['max'] * 1e6:.0f} us")
+
+    def heartbeat_stats(self) -> dict | None:
+        """Jitter/drift metrics of the current or last heartbeat run."""
+        return None if self._heartbeat is None else self._heartbeat.stats()
@@ -0,0 +1,163 @@
+"""
+Merge journaled markers into an XDF recording.
+
+The input XDF is copied unchanged and a new marker stream
+("<name>_JOURNAL") is appended as standard XDF chunks: StreamHeader,
+Samples, ClockOffset, StreamFooter. The clock offsets are copied from the
+live marker stream of the same sender (same source_id) when the recording
+has it, so XDF readers (pyxdf, ...) map the journaled timestamps exactly like
+the live ones. By default only markers the recording is missing are added.
+
+XDF chunk layout: [length byte count: 1|4|8][length][tag: uint16][content],
+where the length covers tag and content; see the XDF specification.
+"""
+
+import shutil
+import struct
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape
+
+from src.lsl_markers.config import MARKER_STREAMS
+
+TAG_STREAM_HEADER = 2
+TAG_SAMPLES = 3
+TAG_CLOCK_OFFSET = 4
+TAG_STREAM_FOOTER = 6
+
+
+def _varlen(value: int) -> bytes:
+    if value < 256:
+        return struct.pack("<BB", 1, value)
+    if value < 2 ** 32:
+        return struct.pack("<BI", 4, value)
+    return struct.pack("<BQ", 8, value)
+
+
+def _read_varlen(data: bytes, pos: int) -> tuple[int, int]:
+    width = data[pos]
+    fmt = {1: "<B", 4: "<I", 8: "<Q"}[width]
+    return struct.unpack_from(fmt, data, pos + 1)[0], pos + 1 + width
+
+
+def _chunk(tag: int, content: bytes) -> bytes:
+    return _varlen(len(content) + 2) + struct.pack("<H", tag) + content
+
+
+def iter_chunks(data: bytes):
+    """Yield (tag, content) for every chunk of an XDF file's bytes."""
+    if data[:4] != b"XDF:":
+        raise ValueError("not an XDF file")
+    pos = 4
+    while pos < len(data):
+        length, pos = _read_varlen(data, pos)
+        tag = struct.unpack_from("<H", data, pos)[0]
+        yield tag, data[pos + 2:pos + length]
+        pos += length
+
+
+def _string_samples(content: bytes) -> list[tuple[float | None, str]]:
+    """(timestamp or None, value) of a 1-channel string Samples chunk (stream id stripped)."""
+    count, pos = _read_varlen(content, 0)
+    samples = []
+    for _ in range(count):
+        has_time = content[pos]
+        pos += 1
+        timestamp = None
+        if has_time == 8:
+            timestamp = struct.unpack_from("<d", content, pos)[0]
+            pos += 8
+        length, pos = _read_varlen(content, pos)
+        samples.append((timestamp, content[pos:pos + length].decode("utf-8", "replace")))
+        pos += length
+    return samples
+
+
+def read_streams(data: bytes) -> dict:
+    """stream id -> {"info": XML root, "offsets": [ClockOffset contents], "markers": [(t, value)]}"""
+    streams = {}
+    for tag, content in iter_chunks(data):
+        if tag not in (TAG_STREAM_HEADER, TAG_SAMPLES, TAG_CLOCK_OFFSET):
+            continue
+        stream_id = struct.unpack_from("<I", content)[0]
+        if tag == TAG_STREAM_HEADER:
+            streams[stream_id] = {"info": ET.fromstring(content[4:].decode("utf-8")), "offsets": [], "markers": []}
+            continue
+        stream = streams.get(stream_id)
+        if stream is None:
+            continue
+        if tag == TAG_CLOCK_OFFSET:
+            stream["offsets"].append(content[4:])
+        elif stream["info"].findtext("channel_format") == "string" and stream["info"].findtext("channel_count") == "1":
+            last = stream["markers"][-1][0] if stream["markers"] else None
+            for timestamp, value in _string_samples(content[4:]):
+                last = timestamp if timestamp is not None else last
+                stream["markers"].append((last, value))
+    return streams
+
+
+def _header_xml(name: str, source_id: str, hostname: str | None) -> str:
+    return ('<?xml version="1.0"?><info>'
+            f"<name>{escape(name)}</name><type>Markers</type><channel_count>1</channel_count>"
+            "<nominal_srate>0</nominal_srate><channel_format>string</channel_format>"
+            f"<source_id>{escape(source_id)}</source_id>"
+            + (f"<hostname>{escape(hostname)}</hostname>" if hostname else "")
+            + "<desc><origin>marker journal</origin></desc></info>")
+
+
+def merge_into_xdf(records, xdf_in: str, xdf_out: str, stream: str, missing_only: bool = True,
+                   tolerance: float = 1e-6) -> int:
+    """
+    Append journal `records` of `stream` (a MARKER_STREAMS key) to a copy of `xdf_in`
+    as a new "<name>_JOURNAL" stream, written to `xdf_out`.
+    missing_only: skip markers the live stream already has (same text, timestamp within `tolerance`)
+    Returns the number of markers written.
+    """
+    config = MARKER_STREAMS[stream]
+    with open(xdf_in, "rb") as f:
+        data = f.read()
+    streams = read_streams(data)
+    live = next((s for s in streams.values() if s["info"].findtext("source_id") == config["source_id"]
+                 and s["info"].findtext("name") == config["name"]), None)
+
+    records = [record for record in records if record.stream == stream]
+    if live is None:
+        print(f"[Journal] ⚠ {xdf_in} has no {config['name']} stream: no clock offsets to copy, "
+              "journaled times are assumed to be in the recorder's clock")
+    elif missing_only:
+        recorded = {}
+        for timestamp, value in live["markers"]:
+            recorded.setdefault(value, []).append(timestamp)
+        records = [record for record in records
+                   if not any(t is not None and abs(t - record.timestamp) <= tolerance
+                              for t in recorded.get(record.marker, ()))]
+    if not records:
+        if xdf_in != xdf_out:
+            shutil.copyfile(xdf_in, xdf_out)
+        return 0
+
+    records = sorted(records, key=lambda record: record.timestamp)
+    stream_id = max(streams, default=0) + 1
+    sid = struct.pack("<I", stream_id)
+    hostname = live["info"].findtext("hostname") if live is not None else None
+    header = _header_xml(f"{config['name']}_JOURNAL", f"{config['source_id']}_journal", hostname)
+
+    samples = bytearray(_varlen(len(records)))
+    for record in records:
+        value = record.marker.encode("utf-8")
+        samples += struct.pack("<Bd", 8, record.timestamp) + _varlen(len(value)) + value
+    footer = ('<?xml version="1.0"?><info>'
+              f"<first_timestamp>{records[0].timestamp!r}</first_timestamp>"
+              f"<last_timestamp>{records[-1].timestamp!r}</last_timestamp>"
+              f"<sample_count>{len(records)}</sample_count></info>")
+
+    chunks = [_chunk(TAG_STREAM_HEADER, sid + header.encode("utf-8")),
+              _chunk(TAG_SAMPLES, sid + bytes(samples))]
+    chunks += [_chunk(TAG_CLOCK_OFFSET, sid + offset) for offset in (live["offsets"] if live else [])]
+    chunks.append(_chunk(TAG_STREAM_FOOTER, sid + footer.encode("utf-8")))
+
+    if xdf_in != xdf_out:
+        shutil.copyfile(xdf_in, xdf_out)
+    with open(xdf_out, "ab") as f:
+        for chunk in chunks:
+            f.write(chunk)
+    return len(records)
@@ -2,26 +2,45 @@
 High-level functions for sending commands to one or many Raspberry Pi devices.
 """
 
+import json
+import time
 from .mqtt_publisher import publish
-from .config import TOPIC_PREFIX
+from .config import TOPIC_PREFIX, SEND_STAMP
 
-def send_command(device_id: str, cmd: str):
+def stamp_command(cmd: str) -> str:
+    """
+    Add the commander's send time ("sent_at", Unix seconds) to a JSON command,
+    so agents can measure transit latency. Non-object payloads are returned unchanged.
+    Called by publish() after the broker connection is up, so connecting is not counted as transit.
+    """
+    try:
+        command = json.loads(cmd)
+    except json.JSONDecodeError:
+        return cmd
+    if not isinstance(command, dict):
+        return cmd
+    command["sent_at"] = time.time()
+    return json.dumps(command)
+
+def send_command(device_id: str, cmd: str, stamp: bool = SEND_STAMP):
     """
     Send a command to a specific Raspberry Pi device.
 
     Args:
         device_id (str): Device identifier (matches RPi agent config).
         cmd (str): Command payload (JSON string).
+        stamp (bool): Add the send time to the payload (see stamp_command).
     """
     topic = f"{TOPIC_PREFIX}/{device_id}/cmd"
-    publish(topic, cmd)
+    publish(topic, (lambda: stamp_command(cmd)) if stamp else cmd)
 
-def broadcast_command(cmd: str):
+def broadcast_command(cmd: str, stamp: bool = SEND_STAMP):
     """
     Send a command to all devices (broadcast).
 
     Args:
         cmd (str): Command payload (JSON string).
+        stamp (bool): Add the send time to the payload (see stamp_command).
     """
     topic = f"{TOPIC_PREFIX}/all/cmd"
-    publish(topic, cmd)
\ No newline at end of file
+    publish(topic, (lambda: stamp_command(cmd)) if stamp else cmd)
\ No newline at end of file
@@ -3,4 +3,5 @@ MQTT configuration for the PC commander
 """
 MQTT_BROKER = "localhost" # Change to your broker IP
 MQTT_PORT = 1883
-TOPIC_PREFIX = "rpi" # Base topic prefix for RPi device
\ No newline at end of file
+TOPIC_PREFIX = "rpi" # Base topic prefix for RPi device
+SEND_STAMP = True # Add the send time ("sent_at", Unix seconds) to every JSON command
\ No newline at end of file
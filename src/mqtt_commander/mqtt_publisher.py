@@ -5,18 +5,19 @@ Basic MQTT publisher for sending commands to Raspberry Pi devices
 import paho.mqtt.client as mqtt
 from .config import MQTT_BROKER, MQTT_PORT
 
-def publish(topic: str, message: str):
+def publish(topic: str, message):
     """
     Publish a message to a specific MQTT topic.
 
     Args:
         topic (str): MQTT topic to publish to.
-        message (str): Message payload (usually JSON string).
+        message (str | callable): Message payload (usually JSON string), or a callable
+            returning it, called once the broker connection is up (e.g. to stamp the send time).
     """
     client = mqtt.Client()
     try:
         client.connect(MQTT_BROKER, MQTT_PORT)
-        client.publish(topic, message)
+        client.publish(topic, message() if callable(message) else message)
     except Exception as e:
         print(f"Error publishing MQTT message: {e}")
     finally:
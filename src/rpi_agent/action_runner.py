@@ -0,0 +1,77 @@
+"""
+Background asyncio loop for executing MQTT commands.
+
+The paho network thread only enqueues commands here, so a slow action (e.g. a
+GoPro shutter waiting for confirmation) never stalls command intake. Commands
+run in arrival order on a dedicated event loop thread:
+  - coroutine results (async actions, e.g. AsyncGoProCamera calls) are awaited on the loop
+  - plain blocking actions run in the loop's default thread pool
+"""
+
+import asyncio
+import inspect
+import threading
+
+
+class ActionRunner:
+    def __init__(self, execute):
+        """
+        execute: callable taking the command dict; may be sync or async.
+        """
+        self.execute = execute
+        self.loop = asyncio.new_event_loop()
+        self._queue = None
+        self._consumer = None
+        self._thread = None
+        self._ready = threading.Event()
+
+    def start(self):
+        """Start the event loop thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True, name="action-runner")
+        self._thread.start()
+        self._ready.wait()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self._queue = asyncio.Queue()
+        self._consumer = self.loop.create_task(self._consume())
+        self._ready.set()
+        self.loop.run_forever()
+
+    async def _consume(self):
+        while True:
+            command = await self._queue.get()
+            try:
+                if inspect.iscoroutinefunction(self.execute):
+                    await self.execute(command)
+                else:
+                    result = await self.loop.run_in_executor(None, self.execute, command)
+                    if inspect.isawaitable(result):
+                        await result
+            except Exception as e:
+                print(f"[ActionRunner] Error executing {command}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def dispatch(self, command: dict):
+        """Queue a command for execution. Returns immediately; safe from any thread."""
+        self.loop.call_soon_threadsafe(self._queue.put_nowait, command)
+
+    def submit(self, coro):
+        """Run a coroutine on the runner's loop (e.g. a keep-alive timer). Returns a concurrent Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def stop(self, timeout: float = 2.0):
+        """Stop the loop thread. Commands still queued are dropped."""
+        if not self._thread:
+            return
+        self.loop.call_soon_threadsafe(self._shutdown)
+        self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def _shutdown(self):
+        for task in asyncio.all_tasks(self.loop):
+            task.cancel()
+        self.loop.call_soon(self.loop.stop)
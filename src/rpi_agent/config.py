@@ -6,4 +6,10 @@ MQTT_BROKER = "192.168.10.219"  # Replace with broker IP (commander)
 MQTT_PORT = 1883
 DEVICE_ID = "rpi1"        # Unique ID for this Raspberry Pi
 TOPIC_PREFIX = "rpi"
-HEARTBEAT_INTERVAL = 10
\ No newline at end of file
+HEARTBEAT_INTERVAL = 10
+
+# Command timing markers: "<CMD_RECEIVED> <cmd> [<transit s>]" stamped when the MQTT message
+# arrived, "<CMD_DONE> <cmd> <seconds since arrival>" stamped when the action finished
+COMMAND_MARKERS = True
+MARKER_COMMAND_RECEIVED = "CMD_RECEIVED"
+MARKER_COMMAND_DONE = "CMD_DONE"
\ No newline at end of file
@@ -3,7 +3,46 @@ Define actions that the Raspberry Pi can perform when receiving MQTT commands.
 This can include GPIO control, camera triggers, LEDs, motors, etc.
 """
 
-from src.gopro_lsl.recorder import start_record_session, stop_record_session
+from pylsl import local_clock
+from src.gopro_lsl import recorder
+from src.gopro_lsl.recorder import start_record_session, stop_record_session, arm_cameras, session
+from src.gopro_lsl.shutter_timing import new_session_id
+from src.rpi_agent.config import COMMAND_MARKERS, MARKER_COMMAND_RECEIVED, MARKER_COMMAND_DONE
+
+# Commands that open / close a recording session (and its marker journal session)
+SESSION_START_COMMANDS = ("camera_start", "all_start")
+SESSION_STOP_COMMANDS = ("camera_stop", "all_stop")
+
+_journal_session = None   # journal session this agent opened; only that one is ended here
+
+
+def warm_up():
+    """Prepare cameras and LSL outlets in the background once the agent is listening."""
+    session.warm_up_async()
+
+def telemetry() -> list[dict]:
+    """Latest camera battery/storage telemetry (empty until the cameras are up)."""
+    return session.telemetry_report()
+
+def _mark_received(cmd_type: str, command: dict) -> float:
+    """Push the receive-time marker; returns the arrival time (now if the command was not stamped)."""
+    received_at = command.get("received_at")
+    if received_at is None:
+        received_at = local_clock()
+    if COMMAND_MARKERS:
+        label = f"{MARKER_COMMAND_RECEIVED} {cmd_type}"
+        sent_at, received_wall = command.get("sent_at"), command.get("received_wall")
+        if sent_at is not None and received_wall is not None:
+            label += f" {received_wall - sent_at:.6f}"   # commander -> agent transit (wall clocks)
+        session.marker_sender.send_marker(label, timestamp=received_at)
+    return received_at
+
+def _mark_done(cmd_type: str, received_at: float):
+    done_at = local_clock()
+    if COMMAND_MARKERS:
+        session.marker_sender.send_marker(f"{MARKER_COMMAND_DONE} {cmd_type} {done_at - received_at:.6f}",
+                                          timestamp=done_at)
+    print(f"[Device Actions] {cmd_type} done {(done_at - received_at) * 1000:.1f} ms after arrival")
 
 def execute_action(command: dict):
     """
@@ -12,9 +51,32 @@ def execute_action(command: dict):
     Args:
         command (dict): JSON parsed command payload, e.g.,
             {"cmd": "gpio_write", "pin": 17, "value": 1}
+            The agent adds "received_at" (local_clock() at message arrival) and
+            "received_wall"; the commander may add "sent_at". Receive and
+            completion times are pushed as CMD_RECEIVED / CMD_DONE markers;
+            those of a start/stop command are journaled inside the session.
     """
+    global _journal_session
     cmd_type = command.get("cmd")
+    session_id = None
+    if cmd_type in SESSION_START_COMMANDS and not recorder.recording_active and _journal_session is None:
+        session_id = _journal_session = new_session_id()
+        session.marker_sender.begin_session(session_id)   # before CMD_RECEIVED
+    received_at = _mark_received(cmd_type, command)
+    try:
+        known = _run_action(cmd_type, command, session_id)
+    finally:
+        _mark_done(cmd_type, received_at)
+        # After CMD_DONE: a stop ends the agent's session, and so does a start that did not record.
+        # Sessions opened elsewhere (e.g. by the recorder itself) are left to their owner.
+        ends = cmd_type in SESSION_STOP_COMMANDS or session_id is not None
+        if ends and _journal_session is not None and not recorder.recording_active:
+            session.marker_sender.end_session()
+            _journal_session = None
+    return known
 
+def _run_action(cmd_type: str, command: dict, session_id: str | None = None) -> bool:
+    """Run one command; False if the command is unknown."""
     if cmd_type == "gpio_write":
         pin = command.get("pin")
         value = command.get("value")
@@ -22,7 +84,7 @@ def execute_action(command: dict):
         # TODO: implement actual GPIO control using RPi.GPIO or gpiozero
 
     elif cmd_type == "all_start":
-        start_record_session()
+        start_record_session(session_id)
         # TODO: implement all devices start
 
     elif cmd_type == "all_stop":
@@ -39,11 +101,18 @@ def execute_action(command: dict):
 
     elif cmd_type == "camera_start":
         print("[Device Actions] Camera Started")
-        start_record_session()
+        start_record_session(session_id)
+
+    elif cmd_type == "camera_arm":
+        print("[Device Actions] Camera Arm")
+        arm_cameras()
 
     elif cmd_type == "camera_stop":
         print("[Device Actions] Camera Stopped")
         stop_record_session()
 
     else:
-        print(f"[Device Actions] Unknown command: {command}")
\ No newline at end of file
+        print(f"[Device Actions] Unknown command: {command}")
+        return False
+
+    return True
\ No newline at end of file
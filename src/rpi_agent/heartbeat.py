@@ -1,6 +1,8 @@
 """
 Optional heartbeat: publishes alive messages to MQTT broker at regular intervals.
 Useful for monitoring Raspberry Pi health/status.
+If a telemetry provider is given, camera battery/storage telemetry is included in
+every heartbeat and also published on its own topic.
 """
 
 import time
@@ -10,14 +12,19 @@ import paho.mqtt.client as mqtt
 from src.rpi_agent.config import MQTT_BROKER, MQTT_PORT, DEVICE_ID, TOPIC_PREFIX, HEARTBEAT_INTERVAL
 
 HEARTBEAT_TOPIC = f"{TOPIC_PREFIX}/{DEVICE_ID}/heartbeat"
+TELEMETRY_TOPIC = f"{TOPIC_PREFIX}/{DEVICE_ID}/telemetry"
 
 class Heartbeat(threading.Thread):
     """
     Thread that sends periodic heartbeat messages to the MQTT broker.
     """
-    def __init__(self):
+    def __init__(self, telemetry=None):
+        """
+        telemetry: optional callable returning a list of per-camera telemetry dicts
+        """
         super().__init__()
         self.client = mqtt.Client()
+        self.telemetry = telemetry
         self.running = True
 
     def run(self):
@@ -25,12 +32,22 @@ class Heartbeat(threading.Thread):
             self.client.connect(MQTT_BROKER, MQTT_PORT)
             self.client.loop_start()
             while self.running:
-                payload = json.dumps({
+                message = {
                     "device_id": DEVICE_ID,
                     "status": "alive",
                     "timestamp": time.time()
-                })
-                self.client.publish(HEARTBEAT_TOPIC, payload)
+                }
+                cameras = []
+                if self.telemetry is not None:
+                    try:
+                        cameras = self.telemetry()
+                    except Exception as e:   # never let telemetry stop the heartbeat
+                        print(f"Heartbeat telemetry error: {e}")
+                if cameras:
+                    message["cameras"] = cameras
+                    self.client.publish(TELEMETRY_TOPIC, json.dumps(
+                        {"device_id": DEVICE_ID, "timestamp": message["timestamp"], "cameras": cameras}))
+                self.client.publish(HEARTBEAT_TOPIC, json.dumps(message))
                 time.sleep(HEARTBEAT_INTERVAL)
         except Exception as e:
             print(f"Heartbeat error: {e}")
@@ -6,13 +6,18 @@ Listens for commands from the PC commander and executes them.
 import json
 import time
 import paho.mqtt.client as mqtt
-from src.rpi_agent.device_actions import execute_action
+from pylsl import local_clock
+from src.rpi_agent.device_actions import execute_action, warm_up
+from src.rpi_agent.action_runner import ActionRunner
 from src.rpi_agent.config import MQTT_BROKER, MQTT_PORT, DEVICE_ID, TOPIC_PREFIX
 
 # Topics to listen on
 TOPIC_ALL = f"{TOPIC_PREFIX}/all/cmd"
 TOPIC_DEVICE = f"{TOPIC_PREFIX}/{DEVICE_ID}/cmd"
 
+# Commands execute on a background loop so the MQTT network thread never blocks
+runner = ActionRunner(execute_action)
+
 # MQTT callback when connected
 def on_connect(client, userdata, flags, rc):
     print(f"Connected to MQTT broker with result code {rc}")
@@ -21,10 +26,16 @@ def on_connect(client, userdata, flags, rc):
 
 # MQTT callback when a message is received
 def on_message(client, userdata, msg):
+    # Capture time first: decoding, printing and queueing all happen after the message arrived
+    received_at = local_clock()
+    received_wall = time.time()
     print(f"Received command on topic {msg.topic}: {msg.payload.decode()}")
     try:
         command = json.loads(msg.payload.decode())
-        execute_action(command)
+        if isinstance(command, dict):
+            command["received_at"] = received_at      # LSL time of arrival
+            command["received_wall"] = received_wall  # Unix time, comparable to the commander's sent_at
+        runner.dispatch(command)
     except json.JSONDecodeError:
         print("Invalid JSON payload")
 
@@ -33,14 +44,17 @@ def run_agent():
     client = mqtt.Client()
     client.on_connect = on_connect
     client.on_message = on_message
+    runner.start()
     try:
         client.connect(MQTT_BROKER, MQTT_PORT, 60)
     except Exception as e:
         print(f"Failed to connect to MQTT broker: {e}")
+        runner.stop()
         return
 
     client.loop_start()
     print("Raspberry Pi agent running, listening for commands...")
+    warm_up()  # cameras/LSL come up in the background; commands are already accepted
 
     try:
         while True:
@@ -50,6 +64,7 @@ def run_agent():
     finally:
         client.loop_stop()
         client.disconnect()
+        runner.stop()
 
 # Run agent if this script is executed directly
 if __name__ == '__main__':
@@ -0,0 +1,77 @@
+"""
+Script: align_gopro_rebocap.py
+Estimates the offset and drift between a GoPro's IMU and the Rebocap motion
+capture by cross-correlating their angular speeds (see gopro_lsl/imu_alignment.py).
+
+GoPro input: an MP4 linked to a session (--session/--camera), or a .npz from
+extract_gpmf.py with GYRO_lsl_times. Rebocap input: an XDF recording (needs
+pyxdf) or a .npz with "times" and "samples" (N x 96).
+
+python -m src.scripts.align_gopro_rebocap offload/default/100GOPRO/GX010001.MP4 recording.xdf --session 20250101_120000 --camera default
+"""
+
+import argparse
+import json
+import os
+import numpy as np
+from src.gopro_lsl.gpmf import GPMFReader, link_to_session
+from src.gopro_lsl.imu_alignment import gopro_angular_speed, rebocap_angular_speed, load_rebocap_xdf, align
+from src.gopro_lsl.config import REBOCAP_JOINT, ALIGN_MAX_LAG
+
+def load_gopro(path, session, camera, recording, media_offset):
+    if path.lower().endswith(".npz"):
+        data = np.load(path)
+        key = "GYRO_lsl_times" if "GYRO_lsl_times" in data else "GYRO_times"
+        if key == "GYRO_times":
+            print("[Align] ⚠ no GYRO_lsl_times in the .npz, using media times")
+        return data[key], np.linalg.norm(data["GYRO_values"], axis=1)
+    with GPMFReader(path) as reader:
+        gyro = reader.read_stream("GYRO")
+    if session:
+        link_to_session(gyro, session, camera, recording, media_offset)
+    else:
+        print("[Align] ⚠ no --session given, using media times")
+    return gopro_angular_speed(gyro)
+
+def load_rebocap(path):
+    if path.lower().endswith(".npz"):
+        data = np.load(path)
+        return data["times"], data["samples"]
+    return load_rebocap_xdf(path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Align GoPro IMU data to Rebocap motion capture.")
+    parser.add_argument("gopro", type=str, help="GoPro MP4, or .npz from extract_gpmf.py")
+    parser.add_argument("rebocap", type=str, help="XDF recording, or .npz with times/samples")
+    parser.add_argument("--session", type=str, default=None,
+                        help="Session id whose START marker the MP4 is linked to")
+    parser.add_argument("--camera", type=str, default=None,
+                        help="Camera name in the session (required with --session)")
+    parser.add_argument("--recording", type=int, default=0,
+                        help="Which start of the session the MP4 belongs to (default: 0)")
+    parser.add_argument("--media-offset", type=float, default=0.0,
+                        help="Seconds into the recording where the MP4 starts (split chapters)")
+    parser.add_argument("--joint", type=int, default=REBOCAP_JOINT,
+                        help=f"Rebocap joint the camera is mounted on (default: {REBOCAP_JOINT})")
+    parser.add_argument("--max-lag", type=float, default=ALIGN_MAX_LAG,
+                        help=f"Seconds of offset searched in either direction (default: {ALIGN_MAX_LAG})")
+    parser.add_argument("--out", type=str, default=None,
+                        help="Output JSON (default: next to the GoPro file)")
+    args = parser.parse_args()
+
+    gopro_times, gopro_speed = load_gopro(args.gopro, args.session, args.camera, args.recording, args.media_offset)
+    rebocap_times, samples = load_rebocap(args.rebocap)
+    rebocap_times, rebocap_speed = rebocap_angular_speed(rebocap_times, samples, args.joint)
+    print(f"[Align] GoPro {len(gopro_speed)} samples, Rebocap {len(rebocap_speed)} samples")
+
+    result = align(gopro_times, gopro_speed, rebocap_times, rebocap_speed, max_lag=args.max_lag)
+    mark = "✔" if result.confidence >= 0.5 else "⚠"
+    print(f"[Align] {mark} {result.summary()}")
+
+    out = args.out or os.path.splitext(args.gopro)[0] + "_alignment.json"
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(result.to_dict(), f, indent=2)
+    print(f"[Align] Written to {out}")
+
+if __name__ == "__main__":
+    main()
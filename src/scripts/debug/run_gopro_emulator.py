@@ -0,0 +1,80 @@
+"""
+Runs the local GoPro HTTP emulator, optionally benchmarking the fleet shutter against it.
+
+Usage:
+    python -m src.scripts.debug.run_gopro_emulator --cameras 4                 # serve until Ctrl+C
+    python -m src.scripts.debug.run_gopro_emulator --cameras 8 --bench 20      # 20 start/stop cycles
+    python -m src.scripts.debug.run_gopro_emulator --latency 0.02 --error-rate 0.05 --bench 10
+"""
+
+import argparse
+import statistics
+import time
+
+from src.gopro_lsl.emulator import GoProEmulator
+from src.gopro_lsl.config import (
+    EMULATOR_BASE_PORT,
+    EMULATOR_LATENCY,
+    EMULATOR_TRANSITION_DELAY,
+    EMULATOR_ERROR_RATE,
+)
+
+
+def benchmark(emulator: GoProEmulator, cycles: int):
+    from src.gopro_lsl.fleet import GoProFleet
+
+    fleet = GoProFleet.from_config(emulator.camera_configs())
+    send_skews, confirm_latencies = [], []
+    try:
+        for _ in range(cycles):
+            for mode in ("start", "stop"):
+                report = fleet.shutter_all(mode)
+                send_skews.append(report.send_skew or 0.0)
+                confirm_latencies += [t.confirm_latency for t in report.results if t.confirm_latency is not None]
+    finally:
+        fleet.close()
+
+    def ms(values, q):
+        values = sorted(values)
+        return values[min(len(values) - 1, int(q * (len(values) - 1)))] * 1000 if values else float("nan")
+
+    print("--------- Emulator Benchmark ---------")
+    print(f"Cameras: {len(emulator.cameras)}, shutter commands: {cycles * 2}")
+    print(f"Send skew        median {ms(send_skews, 0.5):.2f} ms, p90 {ms(send_skews, 0.9):.2f} ms")
+    print(f"Confirm latency  median {ms(confirm_latencies, 0.5):.1f} ms, p90 {ms(confirm_latencies, 0.9):.1f} ms"
+          f" (mean {statistics.mean(confirm_latencies) * 1000 if confirm_latencies else float('nan'):.1f} ms)")
+    print(f"HTTP requests served: {sum(c.requests for c in emulator.cameras)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local GoPro HTTP emulator")
+    parser.add_argument("--cameras", type=int, default=1, help="Number of virtual cameras (default: 1)")
+    parser.add_argument("--port", type=int, default=EMULATOR_BASE_PORT,
+                        help=f"First port; camera i uses port+i, 0 picks free ports (default: {EMULATOR_BASE_PORT})")
+    parser.add_argument("--latency", type=float, default=EMULATOR_LATENCY,
+                        help=f"Response latency in seconds (default: {EMULATOR_LATENCY})")
+    parser.add_argument("--transition", type=float, default=EMULATOR_TRANSITION_DELAY,
+                        help=f"Encoder transition delay in seconds (default: {EMULATOR_TRANSITION_DELAY})")
+    parser.add_argument("--error-rate", type=float, default=EMULATOR_ERROR_RATE,
+                        help=f"Fraction of requests answered with HTTP 500 (default: {EMULATOR_ERROR_RATE})")
+    parser.add_argument("--bench", type=int, default=0, help="Run N fleet start/stop cycles, then exit")
+    args = parser.parse_args()
+
+    emulator = GoProEmulator(args.cameras, base_port=args.port, latency=args.latency,
+                             transition_delay=args.transition, error_rate=args.error_rate)
+    with emulator:
+        if args.bench:
+            benchmark(emulator, args.bench)
+            return
+        print("Emulator running, Ctrl+C to stop. CAMERAS entries:")
+        for entry in emulator.camera_configs():
+            print(f"    {entry},")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Script: extract_gpmf.py
+Extracts GPMF sensor streams (GYRO, ACCL, ...) from a GoPro MP4 into a .npz
+file, optionally with LSL timestamps linked to a recorded session.
+
+python -m src.scripts.extract_gpmf offload/default/100GOPRO/GX010001.MP4 --session 20250101_120000 --camera default
+"""
+
+import argparse
+import os
+import numpy as np
+from src.gopro_lsl.gpmf import GPMFReader, link_to_session
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract GPMF telemetry from a GoPro MP4.")
+    parser.add_argument("mp4", type=str, help="GoPro MP4 file")
+    parser.add_argument("--streams", type=str, nargs="+", default=["GYRO", "ACCL"],
+                        help="Stream keys to extract (default: GYRO ACCL)")
+    parser.add_argument("--out", type=str, default=None,
+                        help="Output .npz (default: next to the MP4)")
+    parser.add_argument("--session", type=str, default=None,
+                        help="Session id whose START marker the samples are linked to")
+    parser.add_argument("--camera", type=str, default=None,
+                        help="Camera name in the session (required with --session)")
+    parser.add_argument("--recording", type=int, default=0,
+                        help="Which start of the session this file belongs to (default: 0)")
+    parser.add_argument("--media-offset", type=float, default=0.0,
+                        help="Seconds into the recording where this file starts (split chapters)")
+    args = parser.parse_args()
+
+    arrays = {}
+    with GPMFReader(args.mp4) as reader:
+        print(f"[GPMF] {args.mp4}: {len(reader)} payloads, {reader.duration:.1f} s, streams {reader.stream_keys()}")
+        for key in args.streams:
+            data = reader.read_stream(key)
+            if args.session:
+                link_to_session(data, args.session, args.camera, args.recording, args.media_offset)
+                arrays[f"{key}_lsl_times"] = data.lsl_times
+            arrays[f"{key}_times"] = data.times
+            arrays[f"{key}_values"] = data.values
+            print(f"[GPMF] {key}: {len(data.values)} samples at {data.rate:.1f} Hz ({data.units})")
+
+    out = args.out or os.path.splitext(args.mp4)[0] + "_gpmf.npz"
+    np.savez(out, **arrays)
+    print(f"[GPMF] Written to {out}")
+
+if __name__ == "__main__":
+    main()
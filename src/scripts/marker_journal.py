@@ -0,0 +1,73 @@
+"""
+Script: marker_journal.py
+Inspect the durable marker journal, replay markers to a late LSL consumer, or
+merge them into an XDF recording (see src/lsl_markers/journal.py).
+
+python -m src.scripts.marker_journal list
+python -m src.scripts.marker_journal show --session 20250101_120000
+python -m src.scripts.marker_journal replay --session 20250101_120000
+python -m src.scripts.marker_journal merge recording.xdf --session 20250101_120000
+"""
+
+import argparse
+import os
+import sys
+from src.lsl_markers.config import MARKER_JOURNAL_DIR
+from src.lsl_markers.journal import MarkerJournal, replay
+from src.lsl_markers.xdf_merge import merge_into_xdf
+
+def main():
+    parser = argparse.ArgumentParser(description="Marker journal tools.")
+    parser.add_argument("action", choices=["list", "show", "replay", "merge"])
+    parser.add_argument("xdf", type=str, nargs="?", default=None, help="XDF recording (merge only)")
+    parser.add_argument("--stream", type=str, default="gopro",
+                        help="Marker stream key in MARKER_STREAMS (default: gopro)")
+    parser.add_argument("--journal", type=str, default=None,
+                        help="Journal file (default: <MARKER_JOURNAL_DIR>/<stream>_markers.journal)")
+    parser.add_argument("--session", type=str, default=None, help="Only markers of this session")
+    parser.add_argument("--epoch", type=int, default=None,
+                        help="Only markers of this writer run (--start/--end default to the latest one)")
+    parser.add_argument("--start", type=float, default=None, help="Only markers at or after this LSL time")
+    parser.add_argument("--end", type=float, default=None, help="Only markers at or before this LSL time")
+    parser.add_argument("--out", type=str, default=None,
+                        help="Merged XDF (default: <xdf>_merged.xdf)")
+    parser.add_argument("--all", action="store_true",
+                        help="Merge every journaled marker, not only those missing from the recording")
+    parser.add_argument("--wait", type=float, default=30.0,
+                        help="Seconds replay waits for a consumer (default: 30)")
+    args = parser.parse_args()
+
+    path = args.journal or os.path.join(MARKER_JOURNAL_DIR or ".", f"{args.stream}_markers.journal")
+    if not os.path.exists(path):
+        print(f"[Journal] ✖ no marker journal at {path} (see --journal / --stream)")
+        sys.exit(1)
+    try:
+        journal = MarkerJournal(path, readonly=True)
+    except (OSError, ValueError) as e:
+        print(f"[Journal] ✖ cannot read {path}: {e}")
+        sys.exit(1)
+
+    if args.action == "list":
+        print(f"[Journal] {path}: {len(journal)} marker(s), epochs {journal.epochs()}")
+        for session in journal.sessions():
+            records = journal.find(session=session)
+            print(f"  {session}: {len(records)} marker(s), epoch {records[0].epoch}, "
+                  f"{records[0].timestamp:.6f} - {records[-1].timestamp:.6f}")
+        return
+
+    records = journal.find(session=args.session, start=args.start, end=args.end, stream=args.stream,
+                           epoch=args.epoch)
+    if args.action == "show":
+        for record in records:
+            print(f"{record.epoch}  {record.timestamp:.6f}  {record.session or '-'}  {record.marker}")
+    elif args.action == "replay":
+        replay(records, args.stream, wait=args.wait)
+    else:
+        if not args.xdf:
+            parser.error("merge needs an XDF file")
+        out = args.out or os.path.splitext(args.xdf)[0] + "_merged.xdf"
+        added = merge_into_xdf(records, args.xdf, out, args.stream, missing_only=not args.all)
+        print(f"[Journal] ✔ {added} marker(s) merged, written to {out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Script: offload_gopro_media.py
+Downloads all recorded media from the cameras in config.CAMERAS.
+Interrupted transfers resume on the next run; files already offloaded are skipped
+(by size and mtime, or by re-hashing them with --verify).
+
+python -m src.scripts.offload_gopro_media --dest offload
+python -m src.scripts.offload_gopro_media --dest offload --verify
+"""
+
+import argparse
+from src.gopro_lsl.fleet import GoProFleet
+from src.gopro_lsl.media_offload import MediaOffloader, BandwidthLimiter
+from src.gopro_lsl.config import OFFLOAD_DIR, OFFLOAD_PARALLEL_CAMERAS
+
+def main():
+    parser = argparse.ArgumentParser(description="Offload media from all configured GoPro cameras.")
+    parser.add_argument("--dest", type=str, default=OFFLOAD_DIR,
+                        help=f"Destination folder (default: {OFFLOAD_DIR})")
+    parser.add_argument("--parallel", type=int, default=OFFLOAD_PARALLEL_CAMERAS,
+                        help=f"Cameras offloaded at the same time (default: {OFFLOAD_PARALLEL_CAMERAS})")
+    parser.add_argument("--limit-mbps", type=float, default=None,
+                        help="Total bandwidth limit in MB/s across all cameras (default: unlimited)")
+    parser.add_argument("--verify", action="store_true",
+                        help="Re-hash files already offloaded instead of trusting their size and mtime")
+    args = parser.parse_args()
+
+    limiter = BandwidthLimiter(args.limit_mbps * 1e6 if args.limit_mbps else None)
+    offloader = MediaOffloader(dest_dir=args.dest, parallel_cameras=args.parallel, limiter=limiter,
+                               verify=args.verify)
+    fleet = GoProFleet.from_config()
+    try:
+        results = offloader.offload(fleet.cameras)
+    finally:
+        fleet.close()
+
+    print("--------- Offload Summary ---------")
+    for name, files in results.items():
+        ok = sum(r.ok for r in files)
+        total = sum(r.bytes_transferred for r in files)
+        print(f"{name}: {ok}/{len(files)} files ok, {total / 1e6:.1f} MB transferred")
+
+if __name__ == "__main__":
+    main()
@@ -6,14 +6,15 @@ Starts both the MQTT command listener and the heartbeat thread.
 import atexit
 from src.rpi_agent.mqtt_agent import run_agent
 from src.rpi_agent.heartbeat import Heartbeat
+from src.rpi_agent.device_actions import telemetry
 from src.log.logger import logger
 
 def main():
 
     atexit.register(logger.close)
 
-    # Start the heartbeat thread
-    hb = Heartbeat()
+    # Start the heartbeat thread (carries camera telemetry once the cameras are up)
+    hb = Heartbeat(telemetry=telemetry)
     hb.start()
     print("Heartbeat thread started")
 
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modules are imported as src.<package>, so the repository root must be importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
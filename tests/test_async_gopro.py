@@ -0,0 +1,64 @@
+import asyncio
+
+from src.gopro_lsl.async_gopro import AsyncGoProCamera, shutter_all
+from src.gopro_lsl.confirmation import AdaptivePoller, TransitionModel
+from src.gopro_lsl.emulator import GoProEmulator
+from src.gopro_lsl.gopro_control import GoProCamera
+from src.gopro_lsl.http_session import SessionPool
+
+
+def emulated_camera(virtual, **kwargs):
+    # Explicit `links` take precedence over base_url
+    return GoProCamera(virtual.name, virtual.serial_last3, base_url=virtual.base_url,
+                       poller=AdaptivePoller(TransitionModel(path=None)), **kwargs)
+
+
+def test_shutter_start_and_stop_are_confirmed():
+    with GoProEmulator(2, base_port=0, transition_delay=0.05) as emulator:
+        cameras = [emulated_camera(virtual) for virtual in emulator.cameras]
+        clients = [AsyncGoProCamera(camera) for camera in cameras]
+        try:
+            start = asyncio.run(shutter_all(clients, "start"))
+            assert all(t.confirmed and t.sent_at <= t.acked_at for t in start)
+            assert all(camera.status.latest.encoding for camera in cameras)   # stored in the shared cache
+
+            stop = asyncio.run(shutter_all(clients, "stop"))
+            assert all(t.confirmed for t in stop)
+            assert [len(virtual.media) for virtual in emulator.cameras] == [1, 1]
+        finally:
+            for camera in cameras:
+                camera.http.close()
+
+
+def test_status_requests_share_the_queue_and_cache():
+    with GoProEmulator(1, base_port=0) as emulator:
+        camera = emulated_camera(emulator.cameras[0])
+        client = AsyncGoProCamera(camera)
+        try:
+            async def poll():
+                return await asyncio.gather(*(client.get_status() for _ in range(10)))
+
+            assert all(asyncio.run(poll()))
+            status = camera.command_stats()["endpoints"]["status"]
+            assert status["sent"] + status["coalesced"] == 10 and status["sent"] < 10
+
+            snapshot = asyncio.run(client.status_snapshot(max_age=0))
+            assert camera.status_snapshot() is snapshot   # sync callers reuse the async fetch
+        finally:
+            camera.http.close()
+
+
+def test_submitted_requests_fail_over():
+    with GoProEmulator(1, base_port=0) as usb_side, GoProEmulator(1, base_port=0) as wifi_side:
+        sides = {"usb": usb_side, "wifi": wifi_side}
+        pool = SessionPool()
+        camera = emulated_camera(usb_side.cameras[0], pool=pool,
+                                 links={name: side.cameras[0].base_url for name, side in sides.items()})
+        try:
+            down = camera.http.active
+            sides[down.name].stop()
+            pool.release(down.base_url)
+            assert asyncio.run(AsyncGoProCamera(camera).keep_alive())
+            assert camera.http.active is not down and camera.http.failovers == 1
+        finally:
+            camera.http.close()
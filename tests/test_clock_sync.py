@@ -0,0 +1,84 @@
+import random
+
+from src.gopro_lsl.clock_sync import (
+    CameraClockSync,
+    fit_ticks,
+    merge_history,
+    parse_ogp_date_time,
+    parse_status_date_time,
+)
+from src.gopro_lsl.confirmation import AdaptivePoller, TransitionModel
+from src.gopro_lsl.emulator import GoProEmulator
+from src.gopro_lsl.gopro_control import GoProCamera
+
+
+def synthetic_ticks(first: int, count: int, offset: float, drift: float, noise: float = 0.002, seed: int = 1):
+    rng = random.Random(seed)
+    return [(second, offset + (1 + drift) * second + rng.uniform(-noise, noise), 0.01)
+            for second in range(first, first + count)]
+
+
+def test_parse_camera_clock():
+    assert parse_ogp_date_time({"date": "2023_1_31", "time": "3_4_5"}) == 1675134245
+    assert parse_status_date_time("%17%01%1F%03%04%05") == 1675134245
+    assert parse_status_date_time("garbage") is None
+
+
+def test_fit_recovers_offset_and_drift_with_an_outlier():
+    ticks = synthetic_ticks(1000, 120, offset=-950.0, drift=50e-6)
+    ticks[40] = (ticks[40][0], ticks[40][1] + 0.2, 0.01)
+    offset, slope, rms, accepted, rejected, drift_fitted = fit_ticks(ticks)
+    assert drift_fitted
+    assert rejected == 1 and len(accepted) == 119
+    assert abs((slope - 1) - 50e-6) < 10e-6
+    assert abs(offset + (slope - 1) * 1060 - (-950.0 + 50e-6 * 1060)) < 0.002
+    assert rms < 0.002
+
+
+def test_short_span_fits_offset_only():
+    offset, slope, _, _, _, drift_fitted = fit_ticks(synthetic_ticks(1000, 10, offset=5.0, drift=50e-6))
+    assert not drift_fitted and slope == 1.0
+    assert abs(offset - (5.0 + 50e-6 * 1005)) < 0.002
+
+
+def test_history_gives_the_drift_span():
+    first = synthetic_ticks(1000, 10, offset=5.0, drift=50e-6, seed=1)
+    second = synthetic_ticks(1300, 10, offset=5.0, drift=50e-6, seed=2)
+    merged, kept = merge_history(first, second)
+    assert kept and len(merged) == 20
+    _, slope, _, _, _, drift_fitted = fit_ticks(merged)
+    assert drift_fitted and abs((slope - 1) - 50e-6) < 10e-6
+
+
+def test_history_is_dropped_after_a_clock_jump():
+    first = synthetic_ticks(1000, 10, offset=5.0, drift=0.0)
+    jumped = synthetic_ticks(1300, 10, offset=7.0, drift=0.0)   # camera clock set 2 s back
+    merged, kept = merge_history(first, jumped)
+    assert not kept and merged == sorted(jumped)
+
+
+def test_history_is_limited_to_the_span():
+    old = synthetic_ticks(0, 10, offset=5.0, drift=0.0)
+    new = synthetic_ticks(5000, 10, offset=5.0, drift=0.0)
+    merged, kept = merge_history(old, new, span=3600)
+    assert kept and merged == new
+
+
+def test_sync_against_the_emulator_uses_earlier_ticks():
+    with GoProEmulator(1, base_port=0, clock_offset=3600.0) as emulator:
+        config = emulator.camera_configs()[0]
+        camera = GoProCamera(config["name"], config["serial_last3"], base_url=config["base_url"],
+                             poller=AdaptivePoller(TransitionModel(path=None)))
+        try:
+            first = CameraClockSync(camera, duration=2.5)
+            result = first.run()
+            assert result.ok and not result.drift_fitted and result.drift is None
+            # Pretend the same clock was also synced two minutes earlier
+            history = [(second - 120, tick - 120, width) for second, tick, width in first.history]
+            second = CameraClockSync(camera, duration=2.5, history=history)
+            result = second.run()
+        finally:
+            camera.close()
+    assert result.ok and result.drift_fitted
+    assert result.history_ticks == len(history) and result.span >= 120
+    assert abs(result.drift) < 1e-3
@@ -0,0 +1,67 @@
+import threading
+
+import pytest
+import requests
+
+from src.gopro_lsl.command_queue import CameraCommandQueue
+
+
+@pytest.fixture
+def queue():
+    queue = CameraCommandQueue("test")
+    yield queue
+    queue.close()
+
+
+def block(queue):
+    """Occupy the worker until the returned event is set."""
+    started, release = threading.Event(), threading.Event()
+
+    def hold():
+        started.set()
+        release.wait(2)
+
+    queue.submit("default", hold)
+    started.wait(2)
+    return release
+
+
+def test_higher_priority_commands_run_first(queue):
+    order = []
+    release = block(queue)
+    futures = [queue.submit(endpoint, lambda e=endpoint: order.append(e))
+               for endpoint in ("keep_alive", "status", "media_list", "status", "shutter")]
+    assert queue.depth == 5
+    release.set()
+    for future in futures:
+        future.result(2)
+    assert order == ["shutter", "status", "status", "media_list", "keep_alive"]   # FIFO within a priority
+
+
+def test_identical_waiting_status_requests_coalesce(queue):
+    calls = []
+    release = block(queue)
+    first = queue.submit("status", lambda: calls.append("a") or "a", key="same")
+    second = queue.submit("status", lambda: calls.append("b") or "b", key="same")
+    other = queue.submit("status", lambda: calls.append("c") or "c", key="other")
+    shutters = [queue.submit("shutter", lambda: "x", key="same") for _ in range(2)]   # never coalesced
+    assert second is first and other is not first and shutters[0] is not shutters[1]
+    release.set()
+    assert first.result(2) == "a" and other.result(2) == "c"
+    assert sorted(calls) == ["a", "c"]
+    assert queue.stats()["endpoints"]["status"]["coalesced"] == 1
+
+
+def test_request_made_by_a_running_command_runs_inline(queue):
+    assert queue.call("info", lambda: queue.call("status", lambda: "nested")) == "nested"
+
+
+def test_close_fails_waiting_and_later_commands(queue):
+    release = block(queue)
+    waiting = queue.submit("status", lambda: "never")
+    queue.close()
+    release.set()
+    with pytest.raises(requests.exceptions.ConnectionError):
+        waiting.result(2)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        queue.call("shutter", lambda: "too late")
@@ -0,0 +1,57 @@
+import pytest
+
+from src.gopro_lsl import recorder
+from src.rpi_agent import device_actions
+
+
+class FakeMarkerSender:
+    def __init__(self):
+        self.events = []
+
+    def begin_session(self, session_id):
+        self.events.append(("begin", session_id))
+
+    def end_session(self):
+        self.events.append(("end",))
+
+    def send_marker(self, label, timestamp=None):
+        return timestamp
+
+
+class FakeSession:
+    def __init__(self):
+        self.marker_sender = FakeMarkerSender()
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    fake = FakeSession()
+    monkeypatch.setattr(device_actions, "session", fake)
+    monkeypatch.setattr(device_actions, "_journal_session", None)
+    monkeypatch.setattr(recorder, "recording_active", False)
+    monkeypatch.setattr(device_actions, "start_record_session",
+                        lambda session_id=None: setattr(recorder, "recording_active", True))
+    monkeypatch.setattr(device_actions, "stop_record_session",
+                        lambda: setattr(recorder, "recording_active", False))
+    return fake.marker_sender
+
+
+def test_stop_ends_the_session_the_agent_opened(agent):
+    device_actions.execute_action({"cmd": "camera_start"})
+    device_actions.execute_action({"cmd": "camera_stop"})
+    assert [event[0] for event in agent.events] == ["begin", "end"]
+
+
+def test_stop_leaves_sessions_it_did_not_open(agent):
+    device_actions.execute_action({"cmd": "camera_stop"})   # nothing running
+    recorder.recording_active = True                        # started elsewhere, recorder owns its session
+    device_actions.execute_action({"cmd": "all_stop"})
+    assert agent.events == []
+
+
+def test_start_that_does_not_record_ends_its_session(agent, monkeypatch):
+    monkeypatch.setattr(device_actions, "start_record_session", lambda session_id=None: None)
+    device_actions.execute_action({"cmd": "all_start"})
+    assert [event[0] for event in agent.events] == ["begin", "end"]
+    device_actions.execute_action({"cmd": "all_stop"})
+    assert [event[0] for event in agent.events] == ["begin", "end"]
@@ -0,0 +1,95 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from src.gopro_lsl import fleet as fleet_module
+from src.gopro_lsl.fleet import GoProFleet, UNSYNCHRONIZED
+
+
+class FakeCamera:
+    """Just enough of GoProCamera for GoProFleet.shutter_all()."""
+
+    def __init__(self, name, delay=0.0):
+        self.name = name
+        self.delay = delay   # seconds before this camera's worker reaches the barrier
+        self.armed = False
+        self.sent = []
+
+    @contextmanager
+    def shutter_in_progress(self):
+        time.sleep(self.delay)
+        yield
+
+    def send_shutter(self, mode, timing=None):
+        timing.sent_at = timing.acked_at = time.perf_counter()
+        self.sent.append(mode)
+
+    def wait_for_recording(self, recording, timeout=None, poll_interval=None, timing=None):
+        timing.confirmed = True
+        return True
+
+    def arm(self, cancel=None):
+        return not cancel.wait(0.5)   # like GoProCamera.arm, gives way to a shutter
+
+    def close(self):
+        pass
+
+
+def test_broken_barrier_aborts_the_shutter(monkeypatch):
+    monkeypatch.setattr(fleet_module, "FLEET_BARRIER_TIMEOUT", 0.1)
+    cameras = [FakeCamera("a"), FakeCamera("b", delay=0.3)]
+    fleet = GoProFleet(cameras)
+    try:
+        report = fleet.shutter_all("start")
+    finally:
+        fleet.close()
+    assert report.unsynchronized
+    assert [r.error for r in report.results] == [UNSYNCHRONIZED, UNSYNCHRONIZED]
+    assert not any(camera.sent for camera in cameras)
+
+
+def test_shutter_does_not_wait_for_arming():
+    cameras = [FakeCamera("a"), FakeCamera("b")]
+    fleet = GoProFleet(cameras)
+    try:
+        arming = threading.Thread(target=fleet.arm)
+        arming.start()
+        time.sleep(0.05)   # both background workers are busy arming
+        started = time.perf_counter()
+        report = fleet.shutter_all("start")
+        elapsed = time.perf_counter() - started
+        arming.join()
+    finally:
+        fleet.close()
+    assert report.all_confirmed and not report.unsynchronized
+    assert elapsed < 0.3
+
+
+def test_shutter_interrupts_background_jobs():
+    cameras = [FakeCamera("a"), FakeCamera("b")]
+    fleet = GoProFleet(cameras)
+    results = {}
+
+    def long_job(camera):
+        return "interrupted" if fleet.interrupted.wait(5.0) else "finished"
+
+    try:
+        background = threading.Thread(target=lambda: results.update(first=fleet.run_all(long_job)))
+        background.start()
+        time.sleep(0.05)
+        # Both workers are busy, so this second batch is still queued when the shutter comes
+        queued = threading.Thread(target=lambda: results.update(second=fleet.run_all(long_job)))
+        queued.start()
+        time.sleep(0.05)
+        started = time.perf_counter()
+        report = fleet.shutter_all("start")
+        elapsed = time.perf_counter() - started
+        background.join()
+        queued.join()
+    finally:
+        fleet.close()
+    assert report.all_confirmed
+    assert elapsed < 1.0
+    assert results["first"] == ["interrupted", "interrupted"]
+    assert results["second"] == [None, None]
+    assert fleet.shutters == 1 and not fleet.interrupted.is_set()
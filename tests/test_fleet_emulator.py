@@ -0,0 +1,21 @@
+from src.gopro_lsl.confirmation import AdaptivePoller, TransitionModel
+from src.gopro_lsl.emulator import GoProEmulator
+from src.gopro_lsl.fleet import GoProFleet
+
+
+def test_start_stop_cycle():
+    with GoProEmulator(2, base_port=0, transition_delay=0.05) as emulator:
+        # A model without a path so the test never writes transition_model.json
+        fleet = GoProFleet.from_config(emulator.camera_configs(), poller=AdaptivePoller(TransitionModel(path=None)))
+        try:
+            start = fleet.start_recording()
+            assert start.all_confirmed
+            assert start.transition is not None
+            assert not any(camera.busy or camera.media for camera in emulator.cameras)   # recording, no file yet
+
+            stop = fleet.stop_recording()
+            assert stop.all_confirmed
+            assert [len(camera.media) for camera in emulator.cameras] == [1, 1]
+            assert all(timing.sent_at <= timing.estimate <= timing.confirmed_at for timing in stop.results)
+        finally:
+            fleet.close()
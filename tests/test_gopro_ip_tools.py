@@ -0,0 +1,61 @@
+import urllib.request
+
+import pytest
+
+from src.control_gui import gopro_ip_tools
+from src.control_gui.gopro_ip_tools import DiscoveredCamera
+from src.gopro_lsl.emulator import GoProEmulator
+
+
+def test_serial_and_ip_round_trip():
+    assert gopro_ip_tools.ip_from_serial("794") == "172.27.194.51"
+    assert gopro_ip_tools.serial_from_ip("172.27.194.51") == "794"
+    assert gopro_ip_tools.serial_from_ip("172.27.194.53") == "794"   # host side of the USB link
+    assert gopro_ip_tools.serial_from_ip("192.168.1.10") is None
+
+
+def test_discover_probes_each_serial_once(monkeypatch):
+    scans = []
+    monkeypatch.setattr(gopro_ip_tools, "local_ipv4_addresses",
+                        lambda: scans.append(1) or ["127.0.0.1", "172.27.194.53", "172.25.190.53"])
+    probed = []
+
+    def probe(serial, timeout):
+        probed.append(serial)
+        if serial == "590":
+            return None
+        return DiscoveredCamera(ip=gopro_ip_tools.ip_from_serial(serial), serial=serial, firmware="fw",
+                                model=None, latency_ms={"794": 9.0, "123": 3.0}[serial])
+
+    monkeypatch.setattr(gopro_ip_tools, "probe_camera", probe)
+    cameras, candidates = gopro_ip_tools.discover(extra_serials=["794", "123"], max_age=0)
+    assert sorted(probed) == ["123", "590", "794"]
+    assert [c.serial for c in cameras] == ["123", "794"]   # fastest first
+    assert candidates == ["172.27.194.53", "172.25.190.53"]
+    assert len(scans) == 1
+
+    # A second call within the cache TTL neither enumerates adapters nor probes again
+    assert gopro_ip_tools.discover(max_age=60)[0] == cameras
+    assert len(scans) == 1 and len(probed) == 3
+
+
+def test_probes_bypass_proxies(monkeypatch):
+    with GoProEmulator(1, base_port=0) as emulator:
+        url = f"{emulator.cameras[0].base_url}/gp/gpControl/info"
+        for name in ("NO_PROXY", "no_proxy"):
+            monkeypatch.delenv(name, raising=False)
+        monkeypatch.setenv("HTTP_PROXY", "http://127.0.0.1:9")   # nothing listens there
+        monkeypatch.setenv("http_proxy", "http://127.0.0.1:9")
+        with pytest.raises(OSError):
+            urllib.request.build_opener().open(url, timeout=1)
+        with gopro_ip_tools._probe_opener.open(url, timeout=1) as response:
+            assert response.status == 200
+
+
+def test_write_serial_updates_config(tmp_path):
+    config = tmp_path / "src" / "gopro_lsl" / "config.py"
+    config.parent.mkdir(parents=True)
+    config.write_text('GOPRO_SERIAL = "794"   # camera\n', encoding="utf-8")
+    gopro_ip_tools.write_serial(tmp_path, "590")
+    assert gopro_ip_tools.read_current_serial(tmp_path) == "590"
+    assert config.read_text(encoding="utf-8") == 'GOPRO_SERIAL = "590"   # camera\n'
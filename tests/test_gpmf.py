@@ -0,0 +1,52 @@
+import struct
+
+import numpy as np
+
+from src.gopro_lsl.gpmf import find_box, read_sample_table
+
+
+def box(kind: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), kind) + payload
+
+
+def full_box(kind: bytes, body: bytes) -> bytes:
+    return box(kind, b"\x00\x00\x00\x00" + body)
+
+
+def table(kind: bytes, rows: list[tuple], fmt: str = ">I") -> bytes:
+    body = struct.pack(">I", len(rows)) + b"".join(struct.pack(">" + fmt[1:] * len(row), *row) for row in rows)
+    return full_box(kind, body)
+
+
+def trak(timescale: int, sizes: list[int] | int, chunk_offsets: list[int], stsc: list[tuple],
+         stts: list[tuple]) -> bytes:
+    """A minimal trak box; `sizes` is a per-sample list, or one fixed size for every sample in stts."""
+    mdhd = full_box(b"mdhd", struct.pack(">IIII", 0, 0, timescale, 0) + b"\x00" * 4)
+    if isinstance(sizes, int):
+        stsz = full_box(b"stsz", struct.pack(">II", sizes, sum(count for count, _ in stts)))
+    else:
+        stsz = full_box(b"stsz", struct.pack(">II", 0, len(sizes)) + struct.pack(f">{len(sizes)}I", *sizes))
+    stbl = box(b"stbl", stsz + table(b"stco", [(o,) for o in chunk_offsets])
+               + table(b"stsc", stsc) + table(b"stts", stts))
+    return box(b"trak", box(b"mdia", mdhd + box(b"minf", stbl)))
+
+
+def test_sample_table_with_several_stsc_runs():
+    sizes = [10, 20, 30, 40, 50, 60, 70]
+    # chunk 1: 2 samples, chunks 2-3: 1 sample each, chunk 4: 3 samples
+    buf = trak(1000, sizes, [1000, 2000, 3000, 4000],
+               stsc=[(1, 2, 1), (2, 1, 1), (4, 3, 1)],
+               stts=[(3, 1000), (4, 500)])
+    table_ = read_sample_table(buf, find_box(buf, [b"trak"]))
+    assert len(table_) == 7
+    assert table_.offsets.tolist() == [1000, 1010, 2000, 3000, 4000, 4050, 4110]
+    assert table_.sizes.tolist() == sizes
+    assert np.allclose(table_.times, [0, 1, 2, 3, 3.5, 4, 4.5])
+    assert np.allclose(table_.durations, [1, 1, 1, 0.5, 0.5, 0.5, 0.5])
+
+
+def test_sample_table_with_fixed_size_and_single_run():
+    buf = trak(90000, 16, [500, 900], stsc=[(1, 2, 1)], stts=[(4, 90000)])
+    table_ = read_sample_table(buf, find_box(buf, [b"trak"]))
+    assert table_.offsets.tolist() == [500, 516, 900, 916]
+    assert table_.times.tolist() == [0.0, 1.0, 2.0, 3.0]
@@ -0,0 +1,61 @@
+import time
+
+import pytest
+
+from src.lsl_markers.heartbeat_scheduler import HeartbeatScheduler, Histogram
+
+
+def run(scheduler: HeartbeatScheduler, seconds: float):
+    scheduler.start()
+    time.sleep(seconds)
+    scheduler.stop()
+
+
+def test_beats_follow_fixed_slots():
+    beats = []
+    scheduler = HeartbeatScheduler(0.01, beats.append, realtime_priority=None, diagnostics_stream=None)
+    run(scheduler, 0.2)
+    assert len(beats) >= 10
+    assert [b.seq for b in beats] == list(range(len(beats)))
+    assert all(b.time >= b.scheduled for b in beats)
+    stats = scheduler.stats()
+    assert stats["beats"] == len(beats) and stats["jitter"]["count"] == len(beats)
+    assert stats["interval_error"]["count"] == len(beats) - 1
+    assert stats["drift_ppm"] is not None
+
+
+@pytest.mark.parametrize("catch_up", ["skip", "burst"])
+def test_late_wake_up_skips_or_bursts_missed_slots(catch_up):
+    beats = []
+
+    def slow_beat(beat):
+        beats.append(beat)
+        if beat.seq == 2:
+            time.sleep(0.055)   # misses about five 10 ms slots
+
+    scheduler = HeartbeatScheduler(0.01, slow_beat, catch_up=catch_up, max_burst=2,
+                                   realtime_priority=None, diagnostics_stream=None)
+    run(scheduler, 0.15)
+    indices = [b.index for b in beats]
+    assert [b.seq for b in beats] == list(range(len(beats)))
+    assert indices == sorted(indices)
+    if catch_up == "skip":
+        assert scheduler.missed >= 4 and scheduler.burst == 0
+        assert any(b - a > 1 for a, b in zip(indices, indices[1:]))
+    else:
+        assert scheduler.burst >= 2 and scheduler.missed >= 2
+
+
+def test_unknown_catch_up_policy_is_rejected():
+    with pytest.raises(ValueError):
+        HeartbeatScheduler(0.01, lambda beat: None, catch_up="later")
+
+
+def test_histogram_bins_and_moments():
+    histogram = Histogram((0, 100))
+    for seconds in (-1e-6, 50e-6, 150e-6, 250e-6):
+        histogram.add(seconds)
+    data = histogram.to_dict()
+    assert data["counts"] == [1, 1, 2]
+    assert data["min"] == -1e-6 and data["max"] == 250e-6
+    assert data["mean"] == pytest.approx(112.25e-6)
@@ -0,0 +1,53 @@
+import json
+
+from src.gopro_lsl.confirmation import AdaptivePoller, TransitionModel
+from src.gopro_lsl.emulator import GoProEmulator
+from src.gopro_lsl.gopro_control import GoProCamera
+from src.gopro_lsl.hilight import HilightTagger
+
+
+def emulated_cameras(emulator):
+    return [GoProCamera(c.name, c.serial_last3, base_url=c.base_url,
+                        poller=AdaptivePoller(TransitionModel(path=None)))
+            for c in emulator.cameras]
+
+
+def test_listed_markers_tag_every_recording_camera(tmp_path):
+    with GoProEmulator(2, base_port=0, transition_delay=0) as emulator:
+        for virtual in emulator.cameras:
+            virtual.shutter(True)
+        cameras = emulated_cameras(emulator)
+        tagger = HilightTagger(cameras, labels=["EVENT"])
+        try:
+            tagger.on_marker("EVENT", 100.0)
+            tagger.on_marker("OTHER", 101.0)
+        finally:
+            tagger.close()   # waits for the queued tags
+            for camera in cameras:
+                camera.http.close()
+
+        assert [len(virtual.hilights) for virtual in emulator.cameras] == [1, 1]
+        assert all(t.ok and t.sent_at <= t.estimate <= t.acked_at for t in tagger.timings)
+        summary = tagger.summary()
+        assert summary["tags"] == 2 and summary["failed"] == 0
+        assert summary["uncertainty"]["count"] == 2
+
+        path = tagger.export("session", directory=str(tmp_path))
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        assert [row["label"] for row in data["timings"]] == ["EVENT", "EVENT"]
+        assert tagger.export("session", directory=str(tmp_path)) is None   # nothing new since
+
+
+def test_tag_on_an_idle_camera_is_recorded_as_failed():
+    with GoProEmulator(1, base_port=0) as emulator:
+        cameras = emulated_cameras(emulator)
+        tagger = HilightTagger(cameras, labels=["EVENT"])
+        try:
+            tagger.on_marker("EVENT", 100.0)
+        finally:
+            tagger.close()
+            cameras[0].http.close()
+        [timing] = tagger.timings
+        assert not timing.ok and timing.estimate is None and "409" in timing.error
+        assert tagger.summary() == {"tags": 0, "failed": 1, "uncertainty": None, "marker_offset": None}
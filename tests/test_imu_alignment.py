@@ -0,0 +1,27 @@
+import numpy as np
+
+from src.gopro_lsl.imu_alignment import align
+
+
+def motion(seconds: float, rate: float, seed: int = 1) -> tuple[np.ndarray, np.ndarray]:
+    """Smoothed random angular speed, sampled at `rate` Hz."""
+    rng = np.random.default_rng(seed)
+    times = np.arange(0.0, seconds, 1.0 / rate)
+    kernel = np.hanning(int(0.3 * rate))
+    speed = np.abs(np.convolve(rng.normal(size=len(times)), kernel / kernel.sum(), mode="same"))
+    return times, speed
+
+
+def test_align_recovers_offset_and_drift():
+    offset, drift = 2.5, 200e-6
+    rebocap_times, rebocap_speed = motion(600.0, 100.0)
+    # GoPro time t is Rebocap time t + offset + drift * t
+    gopro_times = np.arange(5.0, 590.0, 1.0 / 200.0)
+    gopro_speed = np.interp(gopro_times + offset + drift * gopro_times, rebocap_times, rebocap_speed)
+
+    result = align(gopro_times, gopro_speed, rebocap_times, rebocap_speed)
+    expected = gopro_times + offset + drift * gopro_times
+    assert np.max(np.abs(result.apply(gopro_times) - expected)) < 0.005
+    assert abs(result.drift - drift) < 20e-6
+    assert result.rejected == 0
+    assert result.confidence > 0.9
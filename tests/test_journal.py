@@ -0,0 +1,90 @@
+import os
+
+import pytest
+
+from src.lsl_markers.journal import JournalLockedError, MarkerJournal, RECORD
+
+
+def write(path, markers, session="s1", start=100.0):
+    journal = MarkerJournal(path, grow=4096)
+    for i, marker in enumerate(markers):
+        journal.append("gopro", marker, start + i, session=session)
+    offsets = [record.offset for record in journal.find()]
+    journal.close()
+    return offsets
+
+
+def markers(journal, **kwargs):
+    return [record.marker for record in journal.find(**kwargs)]
+
+
+def test_find_by_session_and_time(tmp_path):
+    path = str(tmp_path / "gopro.journal")
+    write(path, ["A", "B", "C"], session="s1", start=10.0)
+    journal = MarkerJournal(path, readonly=True)
+    assert journal.sessions() == ["s1"]
+    assert markers(journal, session="s1", start=11.0) == ["B", "C"]
+    assert markers(journal, end=10.5) == ["A"]
+    assert markers(journal, session="other") == []
+
+
+def test_corrupt_record_in_the_middle_keeps_later_records(tmp_path):
+    path = str(tmp_path / "gopro.journal")
+    offsets = write(path, [f"M{i}" for i in range(6)])
+    with open(path, "r+b") as f:
+        f.seek(offsets[2] + RECORD.size + 1)
+        f.write(b"XX")
+    journal = MarkerJournal(path)
+    assert markers(journal) == ["M0", "M1", "M3", "M4", "M5"]
+    assert journal.skipped == offsets[3] - offsets[2]
+    assert os.path.getsize(path + ".corrupt") == offsets[3] - offsets[2]
+    journal.append("gopro", "M6", 200.0, session="s1")
+    journal.close()
+    # The corrupt bytes were set aside once; reopening finds the same records
+    journal = MarkerJournal(path, readonly=True)
+    assert markers(journal) == ["M0", "M1", "M3", "M4", "M5", "M6"]
+    assert os.path.getsize(path + ".corrupt") == offsets[3] - offsets[2]
+
+
+def test_torn_tail_is_set_aside(tmp_path):
+    path = str(tmp_path / "gopro.journal")
+    offsets = write(path, ["A", "B", "C"])
+    with open(path, "rb") as f:
+        f.seek(offsets[2])
+        tail = f.read(RECORD.size + 8)
+    with open(path, "r+b") as f:
+        f.seek(offsets[2] + RECORD.size)
+        f.write(b"\xff\xff")
+    journal = MarkerJournal(path)
+    assert markers(journal) == ["A", "B"]
+    with open(path + ".corrupt", "rb") as f:
+        saved = f.read()
+    assert saved[:RECORD.size] == tail[:RECORD.size] and b"\xff\xff" in saved
+    journal.append("gopro", "D", 103.0, session="s1")
+    journal.close()
+    assert markers(MarkerJournal(path, readonly=True)) == ["A", "B", "D"]
+
+
+def test_time_lookups_stay_within_one_epoch(tmp_path):
+    path = str(tmp_path / "gopro.journal")
+    write(path, ["before reboot"], session="s1", start=500.0)
+    write(path, ["after reboot"], session="s2", start=5.0)   # local_clock() restarted
+    journal = MarkerJournal(path, readonly=True)
+    assert journal.epochs() == [1, 2]
+    assert markers(journal) == ["before reboot", "after reboot"]
+    assert markers(journal, start=0.0, end=1000.0) == ["after reboot"]
+    assert markers(journal, start=0.0, end=1000.0, epoch=1) == ["before reboot"]
+    assert markers(journal, session="s1", start=0.0) == ["before reboot"]
+
+
+def test_second_writer_is_refused(tmp_path):
+    path = str(tmp_path / "gopro.journal")
+    writer = MarkerJournal(path)
+    try:
+        with pytest.raises(JournalLockedError):
+            MarkerJournal(path)
+        reader = MarkerJournal(path, readonly=True)   # readers take no lock
+        reader.close()
+    finally:
+        writer.close()
+    MarkerJournal(path).close()   # the lock went with the first writer
@@ -0,0 +1,75 @@
+import threading
+
+from src.lsl_markers.marker_service import MarkerService, MarkerStream, MarkerStreamConfig
+
+
+class FakeOutlet:
+    def __init__(self, fail: bool = False):
+        self.chunks = []
+        self.fail = fail
+
+    def push_chunk(self, samples, timestamps):
+        if self.fail:
+            raise RuntimeError("outlet gone")
+        self.chunks.append((samples, timestamps))
+
+
+def make_stream(tmp_path, outlet: FakeOutlet) -> MarkerStream:
+    stream = MarkerStream("test", MarkerStreamConfig(name="TEST_MARKERS", source_id="test_markers"),
+                          journal_dir=str(tmp_path))
+    stream.outlet = outlet
+    return stream
+
+
+def test_drain_pushes_one_chunk_with_the_original_timestamps(tmp_path):
+    outlet = FakeOutlet()
+    stream = make_stream(tmp_path, outlet)
+    heard = []
+    stream.subscribe(lambda marker, timestamp: heard.append((marker, timestamp)))
+    stream.session = "s1"
+    for i in range(5):
+        stream.push(f"M{i}", timestamp=100.0 + i)
+    assert stream.depth == 5
+
+    assert stream.drain(limit=3) == 3 and stream.drain(limit=3) == 2 and stream.drain() == 0
+    assert outlet.chunks == [([["M0"], ["M1"], ["M2"]], [100.0, 101.0, 102.0]),
+                             ([["M3"], ["M4"]], [103.0, 104.0])]
+    assert heard == [(f"M{i}", 100.0 + i) for i in range(5)]
+    stats = stream.stats()
+    assert stats["pushed"] == 5 and stats["chunks"] == 2 and stats["max_depth"] == 5 and stats["depth"] == 0
+    assert [r.marker for r in stream.journal.find(session="s1")] == [f"M{i}" for i in range(5)]
+    stream.journal.close()
+
+
+def test_markers_are_journaled_even_when_the_push_fails(tmp_path):
+    stream = make_stream(tmp_path, FakeOutlet(fail=True))
+    stream.push("LOST", timestamp=5.0)
+    assert stream.drain() == 1
+    assert stream.errors == 1 and stream.pushed == 0
+    assert [r.marker for r in stream.journal.find()] == ["LOST"]
+    stream.journal.close()
+
+
+def test_service_drains_markers_from_many_threads(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)   # the service journals under ./sessions
+    service = MarkerService({"test": {"name": "TEST_MARKERS", "source_id": "test_markers"}})
+    stream = service.stream("test")
+    outlet = stream.outlet = FakeOutlet()
+    try:
+        def send(n):
+            for i in range(50):
+                stream.push(f"T{n}-{i}")
+
+        threads = [threading.Thread(target=send, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert service.flush(timeout=2.0)
+    finally:
+        service.close()
+    pushed = [samples[0] for chunk, _ in outlet.chunks for samples in chunk]
+    assert len(pushed) == 200
+    for n in range(4):   # per-sender order is kept
+        assert [m for m in pushed if m.startswith(f"T{n}-")] == [f"T{n}-{i}" for i in range(50)]
+    stream.journal.close()
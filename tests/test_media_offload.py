@@ -0,0 +1,76 @@
+import hashlib
+import json
+import os
+
+from src.gopro_lsl.confirmation import AdaptivePoller, TransitionModel
+from src.gopro_lsl.emulator import GoProEmulator, media_bytes
+from src.gopro_lsl.gopro_control import GoProCamera
+from src.gopro_lsl.media_offload import MediaOffloader
+
+NAME = "GX010001.MP4"
+SIZE = 10 * 4096 + 123
+CHUNK = 4096
+
+
+class FailingOffloader(MediaOffloader):
+    """Drops the connection on the chunks starting at `fail_at`, like a pulled cable."""
+
+    def __init__(self, *args, fail_at=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fail_at = set(fail_at)
+
+    def _fetch_chunk(self, camera, media, part, start, end):
+        if start in self.fail_at:
+            raise OSError(f"connection lost at byte {start}")
+        return super()._fetch_chunk(camera, media, part, start, end)
+
+
+def emulated_camera(emulator):
+    virtual = emulator.cameras[0]
+    virtual.media.append((NAME, SIZE, 1700000000))
+    return GoProCamera(virtual.name, virtual.serial_last3, base_url=virtual.base_url,
+                       poller=AdaptivePoller(TransitionModel(path=None)))
+
+
+def test_interrupted_download_resumes_from_the_ledger(tmp_path):
+    with GoProEmulator(1, base_port=0) as emulator:
+        camera = emulated_camera(emulator)
+        try:
+            failing = FailingOffloader(str(tmp_path), chunk_size=CHUNK, connections_per_camera=1,
+                                       fail_at={5 * CHUNK})
+            first = failing.offload_camera(camera)[0]
+            assert not first.ok and "connection lost" in first.error
+            with open(first.dest + ".part.json", encoding="utf-8") as f:
+                done = json.load(f)["done"]
+            assert {0, 1, 2, 3, 4} <= set(done) and 5 not in done
+
+            offloader = MediaOffloader(str(tmp_path), chunk_size=CHUNK, connections_per_camera=2)
+            second = offloader.offload_camera(camera)[0]
+            assert second.ok and not second.skipped
+            missing = sum(min(CHUNK, SIZE - i * CHUNK) for i in range(-(-SIZE // CHUNK)) if i not in done)
+            assert second.bytes_transferred == missing   # finished chunks were not fetched again
+            with open(second.dest, "rb") as f:
+                content = f.read()
+            assert content == media_bytes(NAME, 0, SIZE - 1)
+            assert second.sha256 == hashlib.sha256(content).hexdigest()
+            assert not os.path.exists(second.dest + ".part") and not os.path.exists(second.dest + ".part.json")
+
+            third = offloader.offload_camera(camera)[0]
+            assert third.ok and third.skipped and third.sha256 == second.sha256
+        finally:
+            camera.http.close()
+
+
+def test_reply_for_a_different_file_size_is_rejected(tmp_path):
+    with GoProEmulator(1, base_port=0) as emulator:
+        camera = emulated_camera(emulator)
+        try:
+            offloader = MediaOffloader(str(tmp_path), chunk_size=CHUNK)
+            media = offloader.list_media(camera)[0]
+            media.size -= 1   # stale listing: the camera now reports one more byte
+            result = offloader.download(camera, media)
+            assert not result.ok
+            assert f"/{SIZE}" in result.error
+            assert not os.path.exists(result.dest)
+        finally:
+            camera.http.close()
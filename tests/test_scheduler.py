@@ -0,0 +1,74 @@
+import threading
+import time
+
+from src.gopro_lsl import scheduler as scheduler_module
+from src.gopro_lsl.scheduler import CameraScheduler, Job
+
+
+class FakeCamera:
+    """Just the parts of GoProCamera the keep-alive, status, health and armed jobs use."""
+
+    def __init__(self, name, reachable=True):
+        self.name = name
+        self.reachable = reachable
+        self.shutter_active = False
+        self.armed = False
+        self.keep_alives = []
+
+    def keep_alive(self):
+        self.keep_alives.append(time.monotonic())
+        return self.reachable
+
+    def status_snapshot(self, max_age=None):
+        return object() if self.reachable else None
+
+    def check_armed(self):
+        return True
+
+
+def run(scheduler, seconds):
+    scheduler.start()
+    try:
+        time.sleep(seconds)
+    finally:
+        scheduler.stop()
+
+
+def test_keep_alives_are_phase_spread_across_cameras():
+    cameras = [FakeCamera(f"cam{i}") for i in range(4)]
+    scheduler = CameraScheduler(jitter=0.0)
+    scheduler.add_cameras(cameras, keep_alive=0.2, status=None, health=None, probe=None, armed=None)
+    started = time.monotonic()
+    run(scheduler, 0.3)
+    firsts = sorted(camera.keep_alives[0] - started for camera in cameras)
+    assert all(abs(t - expected) < 0.02 for t, expected in zip(firsts, (0.0, 0.05, 0.1, 0.15)))
+    assert all(len(camera.keep_alives) == 2 for camera in cameras[:2])
+
+
+def test_jobs_wait_while_a_shutter_is_in_flight_but_health_does_not(monkeypatch):
+    monkeypatch.setattr(scheduler_module, "SCHEDULER_SHUTTER_BACKOFF", 0.02)
+    camera = FakeCamera("cam", reachable=False)
+    camera.shutter_active = True
+    scheduler = CameraScheduler(jitter=0.0)
+    scheduler.add_camera(camera, keep_alive=0.02, status=None, health=0.02, probe=None, armed=None)
+    run(scheduler, 0.2)
+    assert camera.keep_alives == []
+    assert {job.kind: job.runs for job in scheduler.jobs}["health"] > 0
+
+    camera.shutter_active = False
+    run(scheduler, 0.2)   # stop() kept the jobs; start() resumes them
+    assert len(camera.keep_alives) >= 3
+    assert not scheduler.stats()["health"]["cam"]["healthy"]   # 3 failed contacts in a row
+
+
+def test_a_job_still_running_is_skipped():
+    release = threading.Event()
+    camera = FakeCamera("cam")
+    job = Job(camera, "slow", 0.02, lambda cam: release.wait(1))
+    scheduler = CameraScheduler(jitter=0.0)
+    scheduler.add_job(job)
+    try:
+        run(scheduler, 0.15)
+    finally:
+        release.set()
+    assert job.skips >= 3 and job.runs <= 1
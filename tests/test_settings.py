@@ -0,0 +1,64 @@
+import json
+import time
+
+import pytest
+
+from src.gopro_lsl.settings import SettingsCache, diff, normalize, resolve
+
+
+def test_diff_keeps_only_changed_settings_in_wanted_order():
+    current = {"2": 1, "3": 8, "121": 4}
+    wanted = {"121": 4, "3": 5, "2": 9, "134": 3}
+    assert list(diff(current, wanted).items()) == [("3", 5), ("2", 9), ("134", 3)]
+    assert diff(wanted, wanted) == {}
+
+
+def test_normalize_and_unknown_preset():
+    assert normalize({2: "1", "3": 8}) == {"2": 1, "3": 8}
+    assert resolve({2: 1}) == {"2": 1}
+    with pytest.raises(KeyError):
+        resolve("no such preset")
+
+
+def test_cache_merges_and_persists(tmp_path):
+    path = str(tmp_path / "settings.json")
+    cache = SettingsCache(path)
+    assert cache.get("123") is None
+    cache.update("123", {"2": 1})
+    cache.update("123", {"3": 8})
+    assert cache.get("123") == {"2": 1, "3": 8}
+
+    reloaded = SettingsCache(path)
+    assert reloaded.get("123") == {"2": 1, "3": 8}
+    reloaded.forget("123")
+    assert reloaded.get("123") is None
+
+
+def test_cache_entries_expire(tmp_path):
+    path = tmp_path / "settings.json"
+    path.write_text(json.dumps({"123": {"settings": {"2": 1}, "updated": time.time() - 60}}))
+    cache = SettingsCache(str(path))
+    assert cache.get("123", max_age=30) is None
+    assert cache.get("123", max_age=120) == {"2": 1}
+
+
+def test_failed_save_keeps_the_previous_file(tmp_path, monkeypatch):
+    path = tmp_path / "settings.json"
+    cache = SettingsCache(str(path))
+    cache.update("123", {"2": 1})
+    before = path.read_text()
+
+    def dump_then_fail(data, f, **kwargs):
+        f.write("{")
+        raise OSError("disk full")
+
+    monkeypatch.setattr(json, "dump", dump_then_fail)
+    cache.update("123", {"3": 8})
+    assert path.read_text() == before
+    assert [p.name for p in tmp_path.iterdir()] == ["settings.json"]
+
+
+def test_cache_without_path_stays_in_memory():
+    cache = SettingsCache(None)
+    cache.update("123", {"2": 1})
+    assert cache.get("123") == {"2": 1}
@@ -0,0 +1,43 @@
+from src.gopro_lsl.shutter_timing import ShutterTiming, SessionLatencyStats, combined_window
+
+
+def timing(name, mode, sent_at, confirmed_at, armed=None, lower=None):
+    return ShutterTiming(name=name, mode=mode, sent_at=sent_at, acked_at=sent_at + 0.01,
+                         lower=lower, confirmed_at=confirmed_at, confirmed=True, armed=armed)
+
+
+def test_window_and_estimate():
+    t = timing("cam", "start", sent_at=10.0, confirmed_at=10.4, lower=10.2)
+    assert t.window == (10.2, 10.4)
+    assert abs(t.estimate - 10.3) < 1e-9
+    assert abs(t.uncertainty - 0.1) < 1e-9
+    assert abs(t.confirm_latency - 0.4) < 1e-9
+
+
+def test_combined_window_ignores_unconfirmed():
+    confirmed = timing("a", "start", sent_at=1.0, confirmed_at=1.2)
+    failed = ShutterTiming(name="b", mode="start", sent_at=1.0, error="refused")
+    estimate, earliest, latest = combined_window([confirmed, failed])
+    assert (earliest, latest) == (1.0, 1.2)
+    assert combined_window([failed]) is None
+
+
+def test_summary_with_empty_armed_category():
+    stats = SessionLatencyStats(session_id="test")
+    stats.add([timing("cam", "start", sent_at=0.0, confirmed_at=0.3, armed=False)])
+    stats.add([timing("cam", "stop", sent_at=5.0, confirmed_at=5.9)])
+    summary = stats.summary()
+    assert summary["start_latency"]["armed"] is None
+    cold = summary["start_latency"]["cold"]
+    assert cold["count"] == 1
+    assert abs(cold["max"] - 0.3) < 1e-9   # not the stop's latency
+    assert summary["confirm_latency"]["count"] == 2
+
+
+def test_summary_armed_vs_cold():
+    stats = SessionLatencyStats(session_id="test")
+    stats.add([timing("a", "start", sent_at=0.0, confirmed_at=0.05, armed=True),
+               timing("b", "start", sent_at=0.0, confirmed_at=0.6, armed=False)])
+    summary = stats.summary()["start_latency"]
+    assert summary["armed"]["count"] == 1 and abs(summary["armed"]["max"] - 0.05) < 1e-9
+    assert summary["cold"]["count"] == 1 and abs(summary["cold"]["max"] - 0.6) < 1e-9
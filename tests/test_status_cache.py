@@ -0,0 +1,61 @@
+import threading
+import time
+
+from src.gopro_lsl.status_cache import StatusCache
+
+
+def status(encoding=0, battery=90):
+    return {"status": {"10": encoding, "8": 0, "70": battery, "54": 1_000_000}, "settings": {"2": 1}}
+
+
+class CountingFetch:
+    def __init__(self, delay=0.0, result=None):
+        self.calls = 0
+        self.delay = delay
+        self.result = result or status()
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        return self.result
+
+
+def test_snapshots_are_reused_within_the_ttl():
+    fetch = CountingFetch()
+    cache = StatusCache(fetch, ttl=10.0)
+    first = cache.get()
+    assert cache.get() is first and fetch.calls == 1
+    assert first.battery == 90 and first.settings == {"2": 1} and not first.encoding
+    assert cache.get(max_age=0) is not first and fetch.calls == 2
+
+    cache.invalidate()
+    cache.get()
+    assert fetch.calls == 3
+
+
+def test_concurrent_callers_share_one_fetch():
+    fetch = CountingFetch(delay=0.1)
+    cache = StatusCache(fetch, ttl=0.0)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get())) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert fetch.calls == 1
+    assert len(results) == 5 and all(r is results[0] for r in results)
+
+
+def test_listeners_hear_flipped_fields_and_failures_keep_the_last_snapshot():
+    fetch = CountingFetch()
+    cache = StatusCache(fetch, ttl=0.0)
+    changes = []
+    cache.subscribe(lambda name, old, new, snapshot: changes.append((name, old, new)))
+    cache.get()
+    fetch.result = status(encoding=1, battery=89)
+    cache.get()
+    assert sorted(changes) == [("battery", 90, 89), ("encoding", False, True)]
+
+    fetch.result = None
+    assert cache.get() is None
+    assert cache.latest.encoding   # the failed fetch did not replace it
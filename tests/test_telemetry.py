@@ -0,0 +1,33 @@
+import pytest
+
+from src.gopro_lsl.telemetry import CameraTelemetry, CameraTrend, time_to_empty
+
+
+def test_time_to_empty_extrapolates_the_fitted_trend():
+    samples = [(t, 100 - 0.5 * t) for t in range(0, 121, 10)]   # 0.5 %/s, 40 % left at t=120
+    assert time_to_empty(samples, min_span=60) == pytest.approx(80.0)
+
+
+def test_time_to_empty_needs_a_falling_trend_over_enough_time():
+    assert time_to_empty([(0, 50), (100, 50)], min_span=60) is None           # flat
+    assert time_to_empty([(0, 50), (100, 60)], min_span=60) is None           # rising
+    assert time_to_empty([(0, 50), (30, 40)], min_span=60) is None            # too short
+    assert time_to_empty([(0, 10), (100, 0), (200, 0)], min_span=60) == 0.0   # already empty
+
+
+def test_trend_restarts_when_a_value_jumps_up():
+    trend = CameraTrend(window=1000)
+    for t, battery in ((0, 50), (10, 49), (20, 48)):
+        trend.add(t, battery, None)
+    trend.add(30, 100, 5000)   # battery swapped
+    assert list(trend.battery) == [(30, 100)] and list(trend.sd) == [(30, 5000)]
+    trend.add(30, 99, 4000)    # same time: ignored
+    assert list(trend.battery) == [(30, 100)]
+
+
+def test_record_time_left_is_the_most_pessimistic_estimate():
+    sample = CameraTelemetry(camera="c", sampled_at=0.0, recording=True,
+                             video_remaining=600, battery_empty_in=300.0, sd_full_in=None)
+    assert sample.record_time_left == 300.0
+    assert sample.to_dict()["record_time_left"] == 300.0
+    assert CameraTelemetry(camera="c", sampled_at=0.0, recording=False).record_time_left is None
@@ -0,0 +1,50 @@
+import socket
+import time
+
+from src.gopro_lsl.emulator import GoProEmulator
+from src.gopro_lsl.http_session import SessionPool
+from src.gopro_lsl.transport import GoProTransport
+
+
+def closed_port_url() -> str:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+
+def test_dead_link_probe_fails_fast_without_retries():
+    with GoProEmulator(1, base_port=0) as emulator:
+        started = time.perf_counter()
+        transport = GoProTransport("cam", {"usb": closed_port_url(), "wifi": emulator.cameras[0].base_url},
+                                   pool=SessionPool())
+        try:
+            assert time.perf_counter() - started < 0.5   # the keep_alive policy would retry after 0.5 s
+            usb, wifi = transport.links
+            assert not usb.healthy and usb.failures == 1
+            assert wifi.healthy and transport.active is wifi
+        finally:
+            transport.close()
+
+
+def test_fails_over_when_the_active_link_goes_down():
+    with GoProEmulator(1, base_port=0) as usb_side, GoProEmulator(1, base_port=0) as wifi_side:
+        sides = {"usb": usb_side, "wifi": wifi_side}
+        pool = SessionPool()
+        transport = GoProTransport("cam", {name: side.cameras[0].base_url for name, side in sides.items()},
+                                   pool=pool)
+        try:
+            assert all(link.healthy for link in transport.links)
+            down = transport.active
+            sides[down.name].stop()
+            pool.release(down.base_url)   # the pulled cable takes the keep-alive socket with it
+
+            r = transport.get("status", "/gp/gpControl/status")
+            assert r.status_code == 200
+            assert transport.active is not down and not down.healthy
+            assert transport.failovers == 1
+
+            transport.probe()   # still down: stays off the failed link
+            assert transport.active is not down
+        finally:
+            transport.close()